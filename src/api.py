@@ -17,9 +17,12 @@ from datasets.dataset_loader import DatasetLoader
 from datasets.dataset import Dataset
 from datasets.decorator import DatasetDecorator
 from utils import list2tuple, hashify
+from utils.filter_sessions import FilterSessions
+from utils.selections import register_selection, missing_selections
 from utils.filter import (
-    filter_sites_query,
+    filter_sites_mask,
     filter_files_query,
+    filter_files_mask,
     filter_dates_query,
     filter_weather_query,
     filter_feature_query,
@@ -66,6 +69,35 @@ def fetch_sites_tree(
     dataset = DATASETS.get_dataset(dataset_name)
     return dataset.sites_tree
 
+@functools.lru_cache(maxsize=64)
+def fetch_site_nodes(
+    dataset_name: str,
+    node: str | None = None,
+    search: str = "",
+    offset: int = 0,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    A page of nodes of the sites tree, either the children of a node (the root by default)
+    or every node whose path contains the search text, along with the total available.
+    """
+    dataset = DATASETS.get_dataset(dataset_name)
+    root = f"/{dataset.dataset_name}"
+    if search:
+        search = search.lower()
+        paths = [path for path in sorted(dataset.site_index) if path != root and search in path[len(root):].lower()]
+    else:
+        paths = dataset.site_children.get(node or root, [])
+    return dict(
+        root=root,
+        levels=max(path.count("/") for path in dataset.site_index) - 1,
+        total=len(paths),
+        nodes=[
+            dict(path=path, leaf=not len(dataset.site_children[path]))
+            for path in paths[offset:offset + limit]
+        ],
+    )
+
 def set_dataset_config(
     dataset_name: str,
     site_labels: List[str] = [],
@@ -76,16 +108,29 @@ def set_dataset_config(
     dataset.save_config()
     fetch_dataset_config.cache_clear()
     fetch_sites_tree.cache_clear()
+    fetch_site_nodes.cache_clear()
+    fetch_dataset_metadata.cache_clear()
     return { "SoundADE": dataset.soundade_config } | {
         section: dict(dataset.config.items(section))
         for section in dataset.config.sections()
     }
 
-def fetch_dataset_options(
+@functools.lru_cache(maxsize=3)
+def fetch_dataset_metadata(
     dataset_name: str
 ) -> Dict[str, Any]:
+    """
+    Column options and category orders of a dataset, computed once per dataset
+    and its config, for the client to label and order figures with.
+    """
     dataset = DATASETS.get_dataset(dataset_name)
-    return DatasetDecorator(dataset).options
+    decorator = DatasetDecorator(dataset)
+    return dict(options=decorator.options, category_orders=decorator.category_orders)
+
+def fetch_dataset_options(
+    dataset_name: str
+) -> Dict[str, Any]:
+    return fetch_dataset_metadata(dataset_name)["options"]
 
 def fetch_dataset_dropdown_option_groups(
     dataset_name: str,
@@ -98,8 +143,7 @@ def fetch_dataset_dropdown_option_groups(
 def fetch_dataset_category_orders(
     dataset_name: str
 ) -> Dict[str, Any]:
-    dataset = DATASETS.get_dataset(dataset_name)
-    return DatasetDecorator(dataset).category_orders
+    return fetch_dataset_metadata(dataset_name)["category_orders"]
 
 def fetch_species_list(
     dataset_name: str,
@@ -120,7 +164,7 @@ def set_species_list(
 @functools.lru_cache(maxsize=3)
 def fetch_files(
     dataset_name: str,
-    current_sites: Tuple[str, ...] = tuple(),
+    current_sites: Tuple[Tuple[str, ...], Tuple[str, ...]] = tuple(),
     current_date_range: Tuple[str, ...] = tuple(),
     current_feature: Tuple[str, Tuple[float, ...]] = tuple(),
     current_file_ids: Tuple[str, ...] = tuple(),
@@ -131,9 +175,12 @@ def fetch_files(
     dataset = DATASETS.get_dataset(dataset_name)
     files = (
         pd.read_parquet(dataset.path / "files_table.parquet", columns=["file_id", "valid", "duration", "site_id", "file_name", "file_path", "dddn", "timestamp", "hours after sunrise", "hours after dawn", "hours after noon", "hours after dusk", "hours after sunset"])
-        .query(f"{'valid == True and ' if valid_only else ''}{filter_files_query(current_file_ids)} and {filter_sites_query(dataset.locations, current_sites)} and {filter_dates_query(current_date_range)}")
+        .loc[filter_files_mask(dataset, current_file_ids)]
+        .loc[filter_sites_mask(dataset, current_sites)]
+        .query(f"{'valid == True and ' if valid_only else ''}{filter_files_query()} and {filter_dates_query(current_date_range)}")
         .assign(nearest_hour=lambda df: df["timestamp"].dt.round("h"))
     )
+    FilterSessions.abort_if_superseded()
     weather = (
         pd.read_parquet(dataset.path / "weather_table.parquet")
         .rename(columns=dict(timestamp="nearest_hour"))
@@ -160,6 +207,39 @@ def fetch_species(
     dataset = DATASETS.get_dataset(dataset_name)
     return dataset.species
 
+@functools.lru_cache(maxsize=64)
+def fetch_species_page(
+    dataset_name: str,
+    sort_by: str = "scientific_name",
+    search: str = "",
+    letter: str | None = None,
+    species_list: Tuple[str, ...] | None = None,
+    offset: int = 0,
+    limit: int = 120,
+) -> Dict[str, Any]:
+    """
+    A page of species ordered by scientific or common name, either those matching
+    the search text on either name or those starting with a letter, optionally only
+    those in a species list, along with the total number matching.
+    """
+    dataset = DATASETS.get_dataset(dataset_name)
+    species = dataset.species_index[sort_by]
+    mask = np.ones(len(species), dtype=bool)
+    if species_list is not None:
+        mask &= species["scientific_name"].isin(species_list).to_numpy()
+    if search:
+        search = search.lower()
+        mask &= (
+            species["scientific_name_key"].str.contains(search, regex=False, na=False) |
+            species["common_name_key"].str.contains(search, regex=False, na=False)
+        ).to_numpy()
+    elif letter is not None:
+        mask &= species[f"{sort_by}_key"].str.startswith(letter.lower(), na=False).to_numpy()
+    return dict(
+        total=int(mask.sum()),
+        species=species.loc[mask, ["scientific_name", "common_name"]].iloc[offset:offset + limit].to_dict(orient="records"),
+    )
+
 @functools.lru_cache(maxsize=3)
 def fetch_weather(
     dataset_name: str,
@@ -170,7 +250,7 @@ def fetch_weather(
 @functools.lru_cache(maxsize=10)
 def fetch_file_weather(
     dataset_name: str,
-    current_sites: Tuple[str, ...],
+    current_sites: Tuple[Tuple[str, ...], Tuple[str, ...]],
     current_date_range: Tuple[str, ...],
     current_feature: Tuple[str, Tuple[float, ...]],
     current_file_ids: Tuple[str, ...],
@@ -181,8 +261,11 @@ def fetch_file_weather(
     files = (
         pd.read_parquet(dataset.path / "files_table.parquet", columns=["file_id", "valid", "duration", "site_id", "file_name", "file_path", "dddn", "timestamp", "hours after sunrise", "hours after dawn", "hours after noon", "hours after dusk", "hours after sunset"])
         .assign(nearest_hour=lambda df: df["timestamp"].dt.round("h"))
-        .query(f"valid == True and {filter_files_query(current_file_ids)} and {filter_sites_query(dataset.locations, current_sites)} and {filter_dates_query(current_date_range)}")
+        .loc[filter_files_mask(dataset, current_file_ids)]
+        .loc[filter_sites_mask(dataset, current_sites)]
+        .query(f"valid == True and {filter_files_query()} and {filter_dates_query(current_date_range)}")
     )
+    FilterSessions.abort_if_superseded()
     weather = (
         pd.read_parquet(dataset.path / "weather_table.parquet")
         .rename(columns=dict(timestamp="nearest_hour"))
@@ -197,7 +280,7 @@ def fetch_file_weather(
 @functools.lru_cache(maxsize=10)
 def fetch_acoustic_features(
     dataset_name: str,
-    current_sites: Tuple[str, ...],
+    current_sites: Tuple[Tuple[str, ...], Tuple[str, ...]],
     current_date_range: Tuple[str, ...],
     current_feature: Tuple[str, Tuple[float, ...]],
     current_file_ids: Tuple[str, ...],
@@ -207,9 +290,12 @@ def fetch_acoustic_features(
     dataset = DATASETS.get_dataset(dataset_name)
     files = (
         pd.read_parquet(dataset.path / "files_table.parquet", columns=["file_id", "valid", "duration", "site_id", "file_name", "file_path", "dddn", "timestamp", "hours after sunrise", "hours after dawn", "hours after noon", "hours after dusk", "hours after sunset"])
-        .query(f"valid == True and {filter_files_query(current_file_ids)} and {filter_sites_query(dataset.locations, current_sites)} and {filter_dates_query(current_date_range)}")
+        .loc[filter_files_mask(dataset, current_file_ids)]
+        .loc[filter_sites_mask(dataset, current_sites)]
+        .query(f"valid == True and {filter_files_query()} and {filter_dates_query(current_date_range)}")
         .assign(nearest_hour=lambda df: df["timestamp"].dt.round("h"))
     )
+    FilterSessions.abort_if_superseded()
     weather = (
         pd.read_parquet(dataset.path / "weather_table.parquet")
         .rename(columns=dict(timestamp="nearest_hour"))
@@ -220,6 +306,7 @@ def fetch_acoustic_features(
         # .drop([col for col in weather.columns if col not in ["site_id", "nearest_hour"]], axis=1)
         .merge(dataset.locations, on="site_id", how="left")
     )
+    FilterSessions.abort_if_superseded()
     file_ids = ", ".join([f"'{file_id}'" for file_id in file_site_weather.file_id])
     features = (
         pd.read_parquet(dataset.path / "recording_acoustic_features_table.parquet", columns=["file_id", "segment_id", "offset", current_feature[0]])
@@ -233,7 +320,7 @@ def fetch_acoustic_features(
 def fetch_birdnet_species(
     dataset_name: str,
     threshold: float,
-    current_sites: Tuple[str, ...],
+    current_sites: Tuple[Tuple[str, ...], Tuple[str, ...]],
     current_date_range: Tuple[str, ...],
     current_feature: Tuple[str, Tuple[float, ...]],
     current_file_ids: Tuple[str, ...],
@@ -246,9 +333,12 @@ def fetch_birdnet_species(
 
     files = (
         pd.read_parquet(dataset.path / "files_table.parquet", columns=["file_id", "valid", "duration", "site_id", "file_name", "file_path", "dddn", "timestamp", "hours after sunrise", "hours after dawn", "hours after noon", "hours after dusk", "hours after sunset"])
-        .query(f"valid == True and {filter_files_query(current_file_ids)} and {filter_sites_query(dataset.locations, current_sites)} and {filter_dates_query(current_date_range)}")
+        .loc[filter_files_mask(dataset, current_file_ids)]
+        .loc[filter_sites_mask(dataset, current_sites)]
+        .query(f"valid == True and {filter_files_query()} and {filter_dates_query(current_date_range)}")
         .assign(nearest_hour=lambda df: df["timestamp"].dt.round("h"))
     )
+    FilterSessions.abort_if_superseded()
     weather = (
         pd.read_parquet(dataset.path / "weather_table.parquet")
         .rename(columns=dict(timestamp="nearest_hour"))
@@ -259,6 +349,7 @@ def fetch_birdnet_species(
         # .drop([col for col in weather.columns if col not in ["site_id", "nearest_hour"]], axis=1)
         .merge(dataset.locations, on="site_id", how="left")
     )
+    FilterSessions.abort_if_superseded()
     species = (
         pd.read_parquet(
             dataset.path.parent / "species_table.parquet",
@@ -284,7 +375,7 @@ def fetch_birdnet_species(
 @functools.lru_cache(maxsize=4)
 def fetch_acoustic_features_umap(
     dataset_name: str,
-    current_sites: Tuple[str, ...],
+    current_sites: Tuple[Tuple[str, ...], Tuple[str, ...]],
     current_date_range: Tuple[str, ...],
     current_feature: Tuple[str, Tuple[float, ...]],
     current_file_ids: Tuple[str, ...],
@@ -295,10 +386,13 @@ def fetch_acoustic_features_umap(
 
     files = (
         pd.read_parquet(dataset.path / "files_table.parquet", columns=["file_id", "valid", "duration", "site_id", "file_name", "file_path", "dddn", "timestamp", "hours after sunrise", "hours after dawn", "hours after noon", "hours after dusk", "hours after sunset"])
-        .query(f"valid == True and {filter_files_query(current_file_ids)} and {filter_sites_query(dataset.locations, current_sites)} and {filter_dates_query(current_date_range)}")
+        .loc[filter_files_mask(dataset, current_file_ids)]
+        .loc[filter_sites_mask(dataset, current_sites)]
+        .query(f"valid == True and {filter_files_query()} and {filter_dates_query(current_date_range)}")
         .assign(nearest_hour=lambda df: df["timestamp"].dt.round("h"))
         .drop("duration", axis=1)
     )
+    FilterSessions.abort_if_superseded()
     weather = (
         pd.read_parquet(dataset.path / "weather_table.parquet")
         .rename(columns=dict(timestamp="nearest_hour"))
@@ -308,6 +402,7 @@ def fetch_acoustic_features_umap(
         .query(filter_weather_query(current_weather))
         .merge(dataset.locations, on="site_id", how="left")
     )
+    FilterSessions.abort_if_superseded()
     file_ids = ", ".join([f"'{file_id}'" for file_id in file_site_weather.file_id])
     xy = dataset.umap(
         pd.read_parquet(dataset.path / "recording_acoustic_features_table.parquet")
@@ -318,6 +413,40 @@ def fetch_acoustic_features_umap(
         .merge(xy, on="file_id", how="left")
     )
 
+def fetch_point_details(
+    dataset_name: str,
+    action: str,
+    rows: Tuple[int, ...],
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Look up plotted points by row position in the (cached) selection they were drawn from.
+    """
+    data = dispatch(action, dataset_name=dataset_name, **kwargs)
+    return data.take([row for row in rows if 0 <= row < len(data)])
+
+def register_file_selection(
+    dataset_name: str,
+    file_ids: Tuple[str, ...],
+    invert: bool = False,
+) -> str:
+    """
+    Keep a selection of files server-side, returning the short id filters refer to it by.
+    Inverted, every other file of the dataset is selected.
+    """
+    dataset = DATASETS.get_dataset(dataset_name)
+    return register_selection(dataset, file_ids, invert=invert)
+
+def fetch_missing_file_selections(
+    dataset_name: str,
+    file_selection_ids: Tuple[str, ...],
+) -> Tuple[str, ...]:
+    """
+    The file selections filters refer to which have since been pruned, and so no longer filter anything.
+    """
+    dataset = DATASETS.get_dataset(dataset_name)
+    return missing_selections(dataset, file_selection_ids)
+
 from dash import exceptions
 
 def dispatch(
@@ -326,7 +455,8 @@ def dispatch(
     **payload: Dict[str, Any],
 ) -> Any:
     func = API[action]
-    return func(**payload)
+    # cached actions key on argument order, so equal payloads hit the same entry
+    return func(**dict(sorted(payload.items())))
 
 FETCH_DATASETS = "fetch_datasets"
 FETCH_DATASET = "fetch_dataset"
@@ -334,10 +464,12 @@ SET_CURRENT_DATASET = "set_current_dataset"
 FETCH_DATASET_CONFIG = "fetch_dataset_config"
 SET_DATASET_CONFIG = "set_dataset_config"
 FETCH_DATASET_SITES_TREE = "fetch_dataset_sites_tree"
+FETCH_SITE_NODES = "fetch_site_nodes"
 FETCH_BASE_FILTERS = "fetch_base_filters"
 FETCH_SPECIES_LIST = "fetch_species_list"
 SET_SPECIES_LIST = "set_species_list"
 
+FETCH_DATASET_METADATA = "fetch_dataset_metadata"
 FETCH_DATASET_OPTIONS = "fetch_dataset_options"
 FETCH_DATASET_CATEGORY_ORDERS = "fetch_dataset_category_orders"
 FETCH_DATASET_DROPDOWN_OPTION_GROUPS = "fetch_dataset_dropdown_option_groups"
@@ -350,6 +482,10 @@ FETCH_BIRDNET_SPECIES = "fetch_birdnet_species"
 FETCH_WEATHER = "fetch_weather"
 FETCH_FILE_WEATHER = "fetch_file_weather"
 FETCH_SPECIES = "fetch_species"
+FETCH_SPECIES_PAGE = "fetch_species_page"
+FETCH_POINT_DETAILS = "fetch_point_details"
+REGISTER_FILE_SELECTION = "register_file_selection"
+FETCH_MISSING_FILE_SELECTIONS = "fetch_missing_file_selections"
 
 API = {
     FETCH_DATASETS: fetch_datasets,
@@ -358,10 +494,12 @@ API = {
     FETCH_DATASET_CONFIG: fetch_dataset_config,
     SET_DATASET_CONFIG: set_dataset_config,
     FETCH_DATASET_SITES_TREE: fetch_sites_tree,
+    FETCH_SITE_NODES: fetch_site_nodes,
     FETCH_BASE_FILTERS: fetch_base_filters,
     FETCH_SPECIES_LIST: fetch_species_list,
     SET_SPECIES_LIST: set_species_list,
 
+    FETCH_DATASET_METADATA: fetch_dataset_metadata,
     FETCH_DATASET_OPTIONS: fetch_dataset_options,
     FETCH_DATASET_CATEGORY_ORDERS: fetch_dataset_category_orders,
     FETCH_DATASET_DROPDOWN_OPTION_GROUPS: fetch_dataset_dropdown_option_groups,
@@ -374,4 +512,8 @@ API = {
     FETCH_WEATHER: fetch_weather,
     FETCH_FILE_WEATHER: fetch_file_weather,
     FETCH_SPECIES: fetch_species,
+    FETCH_SPECIES_PAGE: fetch_species_page,
+    FETCH_POINT_DETAILS: fetch_point_details,
+    REGISTER_FILE_SELECTION: register_file_selection,
+    FETCH_MISSING_FILE_SELECTIONS: fetch_missing_file_selections,
 }
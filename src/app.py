@@ -16,7 +16,7 @@ import dash_bootstrap_components as dbc
 from dash import Dash, dcc, ctx
 from dash import Output, Input, State, callback, no_update
 from dash_iconify import DashIconify
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 THEME = {
     "fontFamily": "'Inter', sans-serif",
@@ -45,7 +45,7 @@ def create_dash_app() -> dash.Dash:
     from components.site_level_filter import SiteLevelFilter
     from components.environmental_filter import EnvironmentalFilter
     from store import global_store
-    from api import dispatch, FETCH_DATASETS
+    from api import dispatch, FETCH_DATASETS, FETCH_DATASET_METADATA
 
     def SplashPage():
         return dmc.Center(
@@ -168,6 +168,14 @@ def create_dash_app() -> dash.Dash:
                                     ),
                                 ]
                             ),
+                            dmc.Alert(
+                                id="file-filter-expired-alert",
+                                title="File filters expired",
+                                color="yellow",
+                                withCloseButton=True,
+                                hide=True,
+                                mt="sm",
+                            ),
                             dmc.Space(h="sm"),
                             dmc.Group(
                                 justify="flex-end",
@@ -228,6 +236,15 @@ def create_dash_app() -> dash.Dash:
     from callbacks import page_callbacks
     page_callbacks.register_callbacks()
 
+    from routes import audio_routes
+    audio_routes.register_routes(app.server)
+
+    from routes import spectrogram_routes
+    spectrogram_routes.register_routes(app.server)
+
+    from routes import archive_routes
+    archive_routes.register_routes(app.server)
+
     for page in dash.page_registry.values():
         mod = __import__(page["module"], fromlist=["register_callbacks"])
         if hasattr(mod, "register_callbacks"):
@@ -252,6 +269,23 @@ def create_dash_app() -> dash.Dash:
             current_dataset = dataset_options[0]["value"]
         return current_dataset, dataset_options, True
 
+    @callback(
+        Output("dataset-options", "data"),
+        Output("dataset-category-orders", "data"),
+        Input("dataset-select", "value"),
+    )
+    def fetch_dataset_metadata(dataset_name: str) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+        """
+        Hand figure callbacks the dataset's column labels and category orders once,
+        rather than having each look them up on every redraw.
+        """
+        if not dataset_name:
+            return no_update, no_update
+        action = FETCH_DATASET_METADATA
+        logger.debug(f"{ctx.triggered_id=} {action=}")
+        metadata = dispatch(action, dataset_name=dataset_name)
+        return metadata["options"], metadata["category_orders"]
+
     @callback(
         Output("progress-bar", "value"),
         Output("init-complete", "data"),
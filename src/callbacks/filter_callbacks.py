@@ -7,7 +7,7 @@ import itertools
 import numpy as np
 import pandas as pd
 
-from dash import callback, ctx, no_update, dcc
+from dash import callback, clientside_callback, ctx, no_update, dcc
 from dash import Output, Input, State
 from dash import ALL, MATCH
 from dash_iconify import DashIconify
@@ -16,14 +16,15 @@ from loguru import logger
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch
-from api import FETCH_DATASET_SITES_TREE, FETCH_DATASET_CONFIG, FETCH_DATASET_SITES_TREE, FETCH_DATASET_DROPDOWN_OPTION_GROUPS
+from api import FETCH_DATASET_SITES_TREE, FETCH_DATASET_CONFIG, FETCH_SITE_NODES, FETCH_DATASET_DROPDOWN_OPTION_GROUPS, FETCH_MISSING_FILE_SELECTIONS
 from api import FETCH_BASE_FILTERS, FETCH_FILES, FETCH_ACOUSTIC_FEATURES, FETCH_WEATHER, FETCH_FILE_WEATHER, FETCH_BIRDNET_SPECIES, FETCH_ACOUSTIC_FEATURES_UMAP
 from api import filter_dict_to_tuples
 from components.environmental_filter import EnvironmentalFilterSliderAccordion
-from components.site_level_filter import SiteLevelHierarchyAccordion, TreeNodeChip
+from components.site_level_filter import SiteLevelBreadcrumbs, SiteLevelChipGroup, TreeNodeChip, SITE_PAGE_LIMIT
 from utils.webhost import AudioAPI
 from utils import ceil, floor, audio_bytes_to_enc, index_to_float, float_to_index, capitalise_each
-from utils.filter import setup_filter_store
+from utils.filter import setup_filter_store, compact_site_selection, site_marks, site_selected, site_partially_selected, set_site_selection, site_selection_empty, RANGE_STEPS
+from utils.filter_sessions import FilterSessions, FilterSession
 
 Filters = Dict[str, Any]
 
@@ -34,25 +35,57 @@ def register_callbacks():
     )
     def init_dataset_filters(
         dataset_name: str,
-    ) -> Filters:
+    ) -> FilterSession:
         action = FETCH_BASE_FILTERS
         payload = dict(dataset_name=dataset_name)
         filters = dispatch(action, **payload)
-        return setup_filter_store(filters)
+        return FilterSessions.create(setup_filter_store(filters))
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
         Input("filter-reset-button", "n_clicks"),
         State("dataset-select", "value"),
+        State("filter-store", "data"),
         prevent_initial_call=True
     )
     def reset_dataset_filters(
         n_clicks: str,
         dataset_name: str,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
         if n_clicks == 0:
             return no_update
-        return set_filters(dataset_name)
+        filters = dispatch(FETCH_BASE_FILTERS, dataset_name=dataset_name)
+        return FilterSessions.save(filter_session, setup_filter_store(filters))
+
+    @callback(
+        Output("filter-view", "data"),
+        Input("filter-store", "data"),
+    )
+    def update_filter_view(
+        filter_session: FilterSession,
+    ) -> Dict[str, Any]:
+        """
+        The part of the filter state shown by the filter panel's controls, which
+        clientside callbacks keep in sync rather than a server request per control
+        """
+        filters = FilterSessions.load(filter_session)
+        current_feature = filters["current_feature"]
+        return dict(
+            date_range=filters["date_range"],
+            date_range_bounds=filters["date_range_bounds"],
+            current_feature=current_feature,
+            current_feature_range=filters["current_feature_range"],
+            feature_bounds=filters["acoustic_features"][current_feature],
+            features=[
+                dict(value=feature, label=capitalise_each(feature))
+                for feature in filters["acoustic_features"].keys()
+            ],
+            weather_variables={
+                variable_name: dict(variable_range=params["variable_range"], variable_range_bounds=params["variable_range_bounds"])
+                for variable_name, params in filters["weather_variables"].items()
+            },
+        )
 
     # @callback(
     #     Output("precache", "data"),
@@ -86,8 +119,9 @@ def register_callbacks():
     )
     def update_dates_filter_from_picker(
         selected_dates: List[str],
-        filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if selected_dates is None:
             return no_update
         if len(list(filter(None, selected_dates))) < 2:
@@ -95,7 +129,7 @@ def register_callbacks():
         if selected_dates == filters.get("date_range", None):
             return no_update
         filters["date_range"] = selected_dates
-        return filters
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -105,37 +139,45 @@ def register_callbacks():
     )
     def reset_dates_filter(
         n_clicks,
-        filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if n_clicks is None or n_clicks == 0:
             return no_update
         filters["date_range"] = filters["date_range_bounds"]
-        return filters
-
-    @callback(
+        return FilterSessions.save(filter_session, filters)
+
+    clientside_callback(
+        """
+        function (view) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const [min_date, max_date] = view.date_range_bounds;
+            return [min_date, max_date, view.date_range];
+        }
+        """,
         Output("date-picker", "minDate"),
         Output("date-picker", "maxDate"),
         Output("date-picker", "value"),
-        Input("filter-store", "data"),
+        Input("filter-view", "data"),
         prevent_initial_call=True,
     )
-    def update_date_picker_from_filter(
-        filters: Filters,
-    ) -> Tuple[str, str, str]:
-        date_range = filters["date_range"]
-        min_date, max_date = filters["date_range_bounds"]
-        return min_date, max_date, date_range
 
-    @callback(
+    clientside_callback(
+        """
+        function (view) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const [min_date, max_date] = view.date_range;
+            return `Current Range: ${min_date} - ${max_date}`;
+        }
+        """,
         Output("date-picker-text", "children"),
-        Input("filter-store", "data"),
+        Input("filter-view", "data"),
         prevent_initial_call=True,
     )
-    def update_date_picker_text_from_filter(
-        filters: Filters,
-    ) -> Tuple[str, str, str]:
-        min_date, max_date = filters["date_range"]
-        return f"Current Range: {min_date} - {max_date}"
 
     # ------ ACOUSTIC FEATURE FILTER ----- #
 
@@ -147,8 +189,9 @@ def register_callbacks():
     )
     def update_acoustic_feature_filter_from_select(
         selected_feature: str,
-        filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if selected_feature == filters.get("current_feature", None):
             return no_update
         selected_feature = filters["current_feature"] if not selected_feature else selected_feature
@@ -156,7 +199,7 @@ def register_callbacks():
         features = list(filters["acoustic_features"].keys())
         filters["current_feature"] = selected_feature
         filters["current_feature_range"] = feature_range
-        return filters
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -166,8 +209,9 @@ def register_callbacks():
     )
     def update_acoustic_feature_filter_from_slider(
         selected_feature_range: List[float],
-        filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         feature_range = filters.get("current_feature_range", [])
         feature_min, feature_max = filters["acoustic_features"][filters["current_feature"]]
         selected_feature_range = [index_to_float(x, feature_min, feature_max) for x in selected_feature_range]
@@ -175,44 +219,50 @@ def register_callbacks():
             return no_update
         filters["current_feature_range"] = selected_feature_range
         feature_min, feature_max = selected_feature_range
-        return filters
-
-    @callback(
+        return FilterSessions.save(filter_session, filters)
+
+    clientside_callback(
+        """
+        function (view) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return [view.current_feature, view.features];
+        }
+        """,
         Output("feature-select", "value"),
         Output("feature-select", "data"),
-        Input("filter-store", "data")
+        Input("filter-view", "data"),
     )
-    def update_acoustic_feature_select(
-        filters: Filters
-    ) -> Tuple[str, List[str]]:
-        return filters["current_feature"], [
-            dict(value=feature, label=capitalise_each(feature))
-            for feature  in list(filters["acoustic_features"].keys())
-        ]
 
-    @callback(
+    clientside_callback(
+        """
+        function (view, feature) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const [feature_min, feature_max] = view.feature_bounds;
+            const [range_min, range_max] = view.current_feature_range;
+            const to_index = (x) => Math.round((x - feature_min) / (feature_max - feature_min) * (SLIDER_STEPS - 1));
+            const floor = (x) => Math.round((x - 0.005) * 100) / 100;
+            const ceil = (x) => Math.round((x + 0.005) * 100) / 100;
+            return [
+                [to_index(range_min), to_index(range_max)],
+                [
+                    {value: 0, label: String(floor(feature_min))},
+                    {value: SLIDER_STEPS - 1, label: String(ceil(feature_max))},
+                ],
+                `Acoustic Feature Range: ${floor(range_min)} - ${ceil(range_max)}`,
+            ];
+        }
+        """.replace("SLIDER_STEPS", str(RANGE_STEPS)),
         Output("feature-range-slider", "value"),
         Output("feature-range-slider", "marks"),
         Output("feature-range-title", "children"),
-        Input("filter-store", "data"),
-        Input("feature-select", "value"),
+        Input("filter-view", "data"),
+        Input("feature-select", "value"), # to trigger re-draw of values
         prevent_initial_call=True,
     )
-    def update_acoustic_feature_slider(
-        filters: Filters,
-        feature: str, # to trigger re-draw of values
-    ) -> Tuple[str, List[str]]:
-        feature_range = filters["current_feature_range"]
-        current_feature = filters["current_feature"]
-        feature_bounds = filters["acoustic_features"][current_feature]
-        feature_min, feature_max = feature_bounds
-        range_description = f"{feature_min} - {feature_max}"
-        marks = [
-            dict(value=0, label=str(floor(feature_min, precision=2))),
-            dict(value=999, label=str(ceil(feature_max, precision=2)))
-        ]
-        values = [float_to_index(val, feature_min, feature_max) for val in feature_range]
-        return values, marks, f"Acoustic Feature Range: {floor(feature_range[0], precision=2)} - {ceil(feature_range[1], precision=2)}"
 
     # ------ WEATHER FILTER ----- #
 
@@ -246,8 +296,9 @@ def register_callbacks():
     def update_weather_filter(
         slider_values: List[str],
         slider_ids: List[str],
-        filters: Filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if not ctx.triggered_id:
             return no_update
         variable_name = ctx.triggered_id["index"]
@@ -264,7 +315,7 @@ def register_callbacks():
         if current_range == variable_params["variable_range"]:
             return no_update
         filters["weather_variables"][variable_name]["variable_range"] = current_range
-        return filters
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -274,14 +325,15 @@ def register_callbacks():
     )
     def reset_weather_filter(
         reset_clicks: List[str],
-        filters: Filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if not len(list(filter(None, reset_clicks))):
             return no_update
         variable_name = ctx.triggered_id["index"]
         variable_params = filters["weather_variables"][variable_name]
         filters["weather_variables"][variable_name]["variable_range"] = variable_params["variable_range_bounds"]
-        return filters
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -291,145 +343,178 @@ def register_callbacks():
     )
     def reset_weather_filter(
         reset_clicks: List[str],
-        filters: Filters,
-    ) -> Filters:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         if not reset_clicks:
             return no_update
         for variable_name, params in filters["weather_variables"].items():
             filters["weather_variables"][variable_name]["variable_range"] = params["variable_range_bounds"]
-        return filters
-
-    @callback(
+        return FilterSessions.save(filter_session, filters)
+
+    clientside_callback(
+        """
+        function (view) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            // match sliders to variables by id, whatever order they are laid out in
+            return window.dash_clientside.callback_context.outputs_list.map(({id}) => {
+                const params = view.weather_variables[id.index];
+                if (!params) {
+                    return window.dash_clientside.no_update;
+                }
+                const [min_val, max_val] = params.variable_range_bounds;
+                return params.variable_range.map((x) => Math.round((x - min_val) / (max_val - min_val) * (SLIDER_STEPS - 1)));
+            });
+        }
+        """.replace("SLIDER_STEPS", str(RANGE_STEPS)),
         Output({"type": "weather-variable-range-slider", "index": ALL}, "value"),
-        Input("filter-store", "data"),
+        Input("filter-view", "data"),
         prevent_initial_call=True,
     )
-    def update_weather_variable_slider(
-        filters: Filters
-    ) -> Tuple[str, List[str]]:
-        current_filter_values = list(map(
-            lambda params: params["variable_range"],
-            filters["weather_variables"].values()
-        ))
-        variable_bounds = list(map(
-            lambda params: params["variable_range_bounds"],
-            filters["weather_variables"].values()
-        ))
-        idx = []
-        for vals, bounds in zip(current_filter_values, variable_bounds):
-            min_val, max_val = bounds
-            idx.append([float_to_index(x, min_val, max_val) for x in vals])
-        return idx
 
-    @callback(
+    clientside_callback(
+        """
+        function (view) {
+            if (!view) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return window.dash_clientside.callback_context.outputs_list.map(({id}) => {
+                const params = view.weather_variables[id.index];
+                if (!params) {
+                    return window.dash_clientside.no_update;
+                }
+                const [minimum, maximum] = params.variable_range;
+                return `Current Range: ${minimum} - ${maximum}`;
+            });
+        }
+        """,
         Output({"type": "weather-variable-range-text", "index": ALL}, "children"),
-        Input("filter-store", "data"),
+        Input("filter-view", "data"),
         prevent_initial_call=True,
     )
-    def update_weather_variable_slider(
-        filters: Filters
-    ) -> Tuple[str, List[str]]:
-        current_filter_values = list(map(
-            lambda params: params["variable_range"],
-            filters["weather_variables"].values()
-        ))
-        values = []
-        for minimum, maximum in current_filter_values:
-            values.append(f"Current Range: {minimum} - {maximum}")
-        return values
 
     # ------ SITE LEVEL FILTER ----- #
 
     @callback(
-        Output("site-level-filter-group", "children"),
+        Output("site-level-filter-node", "data"),
+        Output("site-level-filter-search", "value"),
+        Output("site-level-filter-pagination", "value"),
         Input("dataset-select", "value"),
+        Input({"type": "site-level-filter-expand", "index": ALL}, "n_clicks"),
+        Input({"type": "site-level-filter-crumb", "index": ALL}, "n_clicks"),
+        Input("site-level-filter-search", "value"),
     )
-    def init_site_level_filters(
+    def navigate_site_level_filter(
         dataset_name: str,
-    ) -> dmc.Stack:
-        action = FETCH_DATASET_SITES_TREE
-        payload = dict(dataset_name=dataset_name)
+        expand_clicks: List[int],
+        crumb_clicks: List[int],
+        search: str,
+    ) -> Tuple[str | None, str, int]:
+        # searching lists matches from the first page
+        if ctx.triggered_id == "site-level-filter-search":
+            return no_update, no_update, 1
+        # a new dataset opens at the root
+        if not isinstance(ctx.triggered_id, dict):
+            return None, "", 1
+        # chips and crumbs rendered with a page are inputs too, only clicks open a node
+        if not ctx.triggered[0]["value"]:
+            return no_update, no_update, no_update
+        return ctx.triggered_id["index"], "", 1
+
+    @callback(
+        Output("site-level-filter-sites", "data"),
+        Input("filter-store", "data"),
+        State("site-level-filter-sites", "data"),
+    )
+    def sync_site_level_filter(
+        filter_session: FilterSession,
+        current_sites: Dict[str, List[str]] | None,
+    ) -> Dict[str, List[str]]:
+        # only a change of sites redraws the chips, not every other filter change
+        sites = site_marks(FilterSessions.load(filter_session))
+        if sites == current_sites:
+            return no_update
+        return sites
+
+    @callback(
+        Output("site-level-filter-group", "children"),
+        Output("site-level-filter-breadcrumbs", "children"),
+        Output("site-level-filter-pagination", "total"),
+        Input("site-level-filter-node", "data"),
+        Input("site-level-filter-search", "value"),
+        Input("site-level-filter-pagination", "value"),
+        Input("site-level-filter-sites", "data"),
+        State("dataset-select", "value"),
+    )
+    def render_site_level_filter(
+        node: str | None,
+        search: str | None,
+        page: int,
+        sites: Dict[str, List[str]] | None,
+        dataset_name: str,
+    ) -> Tuple[dmc.Stack, dmc.Breadcrumbs, int]:
+        if not dataset_name or sites is None:
+            return no_update
+        search = (search or "").strip()
+
+        action = FETCH_SITE_NODES
+        payload = dict(dataset_name=dataset_name, node=node, search=search, offset=SITE_PAGE_LIMIT * ((page or 1) - 1), limit=SITE_PAGE_LIMIT)
         logger.debug(f"{ctx.triggered_id=} {action=} {payload=}")
-        tree = dispatch(action, **payload)
+        nodes = dispatch(action, **payload)
 
         action = FETCH_DATASET_CONFIG
         payload = dict(dataset_name=dataset_name)
         logger.debug(f"{ctx.triggered_id=} {action=} {payload=}")
         config = dispatch(action, **payload)
-        return SiteLevelHierarchyAccordion(tree=tree, config=config.get("Site Hierarchy"))
+
+        node = node or nodes["root"]
+        if search:
+            level_name = f"Sites matching '{search}'"
+        else:
+            depth = node.count("/")
+            level_name = config.get("Site Hierarchy", {}).get(f"sitelevel_{depth}", f"Level {depth}/{nodes['levels']}")
+        chips = [
+            TreeNodeChip(
+                path=site["path"],
+                leaf=site["leaf"],
+                selected=site_selected(sites, site["path"]),
+                partial=site_partially_selected(sites, site["path"]),
+            )
+            for site in nodes["nodes"]
+        ]
+        return (
+            SiteLevelChipGroup(level_name=level_name, chips=chips or [dmc.Text("No sites found", size="sm")]),
+            SiteLevelBreadcrumbs(root=nodes["root"], node=node) if not search else None,
+            max(1, -(-nodes["total"] // SITE_PAGE_LIMIT)),
+        )
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
-        Input({"type": "checklist-locations-hierarchy", "index": ALL}, "value"),
+        Input({"type": "site-level-filter-chip", "index": ALL}, "checked"),
         State("filter-store", "data"),
-        State("dataset-select", "value"),
         prevent_initial_call=True,
     )
     def update_site_level_filter(
-        values: List[str],
-        filters: Filters,
-        dataset_name: str,
-    ) -> Filters:
-        flat_values = list(itertools.chain(*values))
-        # this shouldn't happen, but a guard will prevent bugs
-        if not len(flat_values):
+        checked: List[bool],
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        if not isinstance(ctx.triggered_id, dict):
             return no_update
-        # when nodes haven't changed, prevent update to stop graph reload triggering
-        current_nodes = [node.path_name for node in bt.list_to_tree(filters["current_sites"]).descendants]
-        if sorted(current_nodes) == sorted(flat_values):
+        filters = FilterSessions.load(filter_session)
+        sites = site_marks(filters)
+        path = ctx.triggered_id["index"]
+        shown = site_selected(sites, path) or site_partially_selected(sites, path)
+        # chips rendered with a page trigger this too, only a toggled chip changes the selection
+        if ctx.triggered[0]["value"] == shown:
             return no_update
-
-        action = FETCH_DATASET_SITES_TREE
-        payload = dict(dataset_name=dataset_name)
-        logger.debug(f"{ctx.triggered_id=} {action=} {payload=}")
-        tree = dispatch(action, **payload)
-        # find child nodes at specified depth
-        depth = ctx.triggered_id["index"]
-        nodes = bt.levelorder_iter(tree, filter_condition=lambda node: node.depth == depth + 2)
-        # remove all nodes where the parent is not present in selected values
-        nodes = filter(lambda node: node.parent and node.parent.path_name in flat_values, nodes)
-        nodes = sorted(nodes, key=lambda node: node.path_name)
-        # recursively build out child list using each preserved child node
-        children = [list(bt.tree_to_dict(node).keys()) for node in nodes]
-        # preserve tree up to depth, rebuild children based on filtering
-        values = values[:depth] + children
-        filters["current_sites"] = list(itertools.chain(*values))
-        return filters
-
-    @callback(
-        Output({"type": "checklist-locations-hierarchy", "index": ALL}, "value"),
-        Input("filter-store", "data"),
-        State({"type": "checklist-locations-hierarchy", "index": ALL}, "value"),
-        State("dataset-select", "value"),
-        prevent_initial_call=True,
-    )
-    def update_site_level_filters(
-        filters: str,
-        current_sites,
-        dataset_name: str,
-    ) -> Tuple[List[TreeNodeChip], List[str]]:
-        # FIXME: to prevent exception when changing dataaset, we should return the node chip rather than its values
-        # as the number of site chips may have changed
-        sites = filters["current_sites"]
-
-        payload = dict(dataset_name=dataset_name)
-        tree = dispatch(FETCH_DATASET_SITES_TREE, **payload)
-        config = dispatch(FETCH_DATASET_CONFIG, **payload)
-
-        values = []
-        if not len(sites):
-            # if all sites have been de-selected, re-select all of them
-            for depth in range(1, tree.max_depth):
-                nodes = sorted(bt.levelorder_iter(tree, filter_condition=lambda node: node.depth == depth + 1), key=lambda node: node.path_name)
-                values.append([node.path_name for node in nodes])
-        else:
-            # otherwise return only the values of selected sites
-            current_tree = bt.list_to_tree(sites)
-            for depth in range(1, tree.max_depth):
-                condition = lambda node: node.depth == depth + 1
-                nodes = sorted(bt.levelorder_iter(tree, filter_condition=condition), key=lambda node: node.path_name)
-                values.append([node.path_name for node in nodes if bool(bt.find_full_path(current_tree, node.path_name))])
-        return values
+        sites = set_site_selection(sites, path, ctx.triggered[0]["value"])
+        # if all sites have been de-selected, re-select all of them
+        if site_selection_empty(filters["tree"], sites):
+            sites = compact_site_selection(filters["tree"], filters["tree"])
+        filters["current_sites"] = sites
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -437,12 +522,13 @@ def register_callbacks():
         Input("site-filter-reset", "n_clicks"),
         prevent_initial_call=True,
     )
-    def update_site_level_filters(
-        filters: str,
-        current_sites,
-    ) -> Tuple[List[TreeNodeChip], List[str]]:
-        filters["current_sites"] = filters["tree"]
-        return filters
+    def reset_site_level_filter(
+        filter_session: FilterSession,
+        clicks: int,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
+        filters["current_sites"] = compact_site_selection(filters["tree"], filters["tree"])
+        return FilterSessions.save(filter_session, filters)
 
     # ------- FILE ID FILTER ------ #
 
@@ -454,12 +540,41 @@ def register_callbacks():
     )
     def remove_umap_selection(
         values: bool,
-        filters: Dict[str, List[str]],
-    ) -> Dict[str, List[str]]:
+        filter_session: FilterSession,
+    ) -> FilterSession:
+        filters = FilterSessions.load(filter_session)
         file_filters = filters["files"]
         # remove by index
         filters["files"] = {value: file_filters[value] for value in values}
-        return filters
+        return FilterSessions.save(filter_session, filters)
+
+    @callback(
+        Output("filter-store", "data", allow_duplicate=True),
+        Output("file-filter-expired-alert", "children"),
+        Output("file-filter-expired-alert", "hide"),
+        Input("filter-store", "data"),
+        State("dataset-select", "value"),
+        prevent_initial_call=True,
+    )
+    def drop_expired_file_filters(
+        filter_session: FilterSession,
+        dataset_name: str,
+    ) -> Tuple[FilterSession, str, bool]:
+        filters = FilterSessions.load(filter_session)
+        file_filters = filters["files"]
+        missing = set(dispatch(
+            FETCH_MISSING_FILE_SELECTIONS,
+            dataset_name=dataset_name,
+            file_selection_ids=tuple(ids for ids in file_filters.values() if isinstance(ids, str)),
+        ))
+        if not missing:
+            return no_update, no_update, no_update
+        # pruned selections no longer filter anything, so are dropped rather than left looking applied
+        filters["files"] = {key: ids for key, ids in file_filters.items() if not (isinstance(ids, str) and ids in missing)}
+        logger.warning(f"Dropped {len(missing)} expired file filters from filter session {filter_session.get('token')}")
+        expired = len(file_filters) - len(filters["files"])
+        message = f"{expired} file filter{'s' if expired > 1 else ''} expired and {'were' if expired > 1 else 'was'} removed."
+        return FilterSessions.save(filter_session, filters), message, False
 
     # ---- DUMP ---- #
 
@@ -690,7 +805,7 @@ def register_callbacks():
     #     chip_values: List[str],
     #     chip_ids: List[str],
     #     filters: Filters,
-    # ) -> Filters:
+    # ) -> FilterSession:
     #     if not ctx.triggered_id:
     #         return no_update
     #     variable_name = ctx.triggered_id["index"]
@@ -773,7 +888,7 @@ def register_callbacks():
     # def update_dates_filter_from_chips(
     #     chip_values: List[str],
     #     filters,
-    # ) -> Filters:
+    # ) -> FilterSession:
     #     min_date, max_date = filters["date_range_bounds"]
     #     dates_dict = {prefix: date for prefix, date in map(lambda s: s.split("="), chip_values)}
     #     date_range = [dates_dict.get("start_date", min_date), dates_dict.get("end_date", max_date)]
@@ -16,6 +16,7 @@ from api import filter_dict_to_tuples
 from utils import list2tuple, send_download
 from utils.sketch import default_layout
 from utils.figures.calendar import plot
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 400
 
@@ -34,9 +35,10 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         template: str,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters)
         fig = plot(data)
         title_text = "Recording Dates"
@@ -65,9 +67,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_dates",
@@ -16,6 +16,7 @@ from typing import Any, Dict, List, Tuple
 from api import dispatch, FETCH_LOCATIONS
 from utils import capitalise_each, send_download
 from utils.sketch import default_layout
+from utils.filter_sessions import FilterSession
 
 ROWS_PER_PAGE = 20
 PLOT_HEIGHT = 800
@@ -130,7 +131,7 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
         return send_download(
@@ -7,17 +7,21 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
 
-from dash import html, dcc, callback, ctx, no_update, clientside_callback
+from dash import html, dcc, callback, ctx, no_update, clientside_callback, Patch
 from dash import Output, Input, State, ALL, MATCH
 from loguru import logger
 from io import StringIO
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_FILES, DATASETS
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, send_download, safe_category_orders
 from utils.sketch import default_layout
+from utils.figures.encoding import encode_figure
+from utils.figures.fast import fast_figure
+from utils.figures.patch import cosmetic_patch
+from utils.hover import hover_params
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 400
 
@@ -32,8 +36,9 @@ def plot(
     opacity: int = 100,
     **kwargs: Any,
 ) -> go.Figure:
-    fig = px.scatter(
-        data_frame=df,
+    fig = fast_figure(
+        px.scatter,
+        df,
         x="date",
         y="time",
         opacity=opacity / 100,
@@ -56,19 +61,24 @@ def plot(
 def register_callbacks():
     @callback(
         Output("times-graph", "figure"),
+        Output("times-graph-traces", "data"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
-        Input("times-size-slider", "value"),
-        Input("times-opacity-slider", "value"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
+        State("times-size-slider", "value"),
+        State("times-opacity-slider", "value"),
         Input("times-colour-select", "value"),
         Input("times-symbol-select", "value"),
         Input("times-facet-row-select", "value"),
         Input("times-facet-column-select", "value"),
-        Input("plotly-theme", "data"),
+        State("plotly-theme", "data"),
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         dot_size: int,
         opacity: int,
         color: str,
@@ -76,9 +86,8 @@ def register_callbacks():
         facet_row: str,
         facet_col: str,
         template: str,
-    ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+    ) -> Tuple[go.Figure, int]:
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters, valid_only=False)
         fig = plot(
             data,
@@ -87,17 +96,20 @@ def register_callbacks():
             symbol=symbol,
             facet_row=facet_row,
             facet_col=facet_col,
-            hover_name="file_id",
-            hover_data=[
-                "file_name",
-                "file_path",
-                "timestamp",
-                "site_name",
-                "dddn",
-                "hour_categorical",
-                "week_of_year_categorical",
-                "duration",
-            ],
+            **hover_params(
+                data,
+                hover_name="file_id",
+                hover_data=[
+                    "file_name",
+                    "file_path",
+                    "timestamp",
+                    "site_name",
+                    "dddn",
+                    "hour_categorical",
+                    "week_of_year_categorical",
+                    "duration",
+                ],
+            ),
             labels={
                 "file_name": "File Name",
                 "file_path": "File Path",
@@ -119,7 +131,30 @@ def register_callbacks():
         fig.update_layout(default_layout(fig))
         fig.update_layout(title_text=title_text)
         fig.update_layout(template=template)
-        return fig
+        return encode_figure(fig), len(fig.data)
+
+    @callback(
+        Output("times-graph", "figure", allow_duplicate=True),
+        Input("times-graph-traces", "data"),
+        Input("times-size-slider", "value"),
+        Input("times-opacity-slider", "value"),
+        Input("plotly-theme", "data"),
+        prevent_initial_call=True,
+    )
+    def patch_figure(
+        num_traces: int,
+        dot_size: int,
+        opacity: int,
+        template: str,
+    ) -> Patch:
+        # a redraw reads these as they were when it started, so re-apply them all once it lands
+        redrawn = ctx.triggered_id == "times-graph-traces"
+        return cosmetic_patch(
+            num_traces,
+            dot_size=dot_size if redrawn or ctx.triggered_id == "times-size-slider" else None,
+            opacity=opacity / 100.0 if redrawn or ctx.triggered_id == "times-opacity-slider" else None,
+            template=template if redrawn or ctx.triggered_id == "plotly-theme" else None,
+        )
 
     clientside_callback(
         """
@@ -142,9 +177,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_birdnet_detections",
@@ -21,12 +21,65 @@ from api import (
     FETCH_DATASET_SITES_TREE,
     FETCH_DATASET_CATEGORY_ORDERS,
     FETCH_DATASET_OPTIONS,
-    FETCH_SPECIES,
+    FETCH_SPECIES_PAGE,
     SET_SPECIES_LIST,
 )
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PAGE_SIZE = 120
 
+def fetch_species_page(
+    dataset_name: str,
+    species_column: str,
+    search_term: str | None,
+    letter: str | None,
+    current_page: int,
+    species_list: Tuple[str, ...] | None = None,
+) -> Dict[str, Any]:
+    action = FETCH_SPECIES_PAGE
+    payload = dict(
+        dataset_name=dataset_name,
+        sort_by=species_column,
+        search=(search_term or "").strip(),
+        letter=letter,
+        species_list=species_list,
+        offset=(current_page - 1) * PAGE_SIZE,
+        limit=PAGE_SIZE,
+    )
+    logger.debug(f"{ctx.triggered_id=} {action=} {payload=}")
+    return dispatch(action, **payload)
+
+def species_checklist(
+    species: List[Dict[str, str]],
+    species_column: str,
+    species_list: List[str],
+    max_str_len: int = 30,
+    num_cols: int = 4,
+) -> List[dmc.GridCol]:
+    species_list = set(species_list)
+    items = []
+    for row in species:
+        label = row[species_column]
+        if len(label.strip()) == 0:
+            label = row["scientific_name"]
+        if len(label) > max_str_len:
+            label = label[:max_str_len] + "..."
+        checkbox = dmc.Checkbox(
+            id={"type": "species-checkbox", "index": row["scientific_name"]},
+            label=label,
+            value=row["scientific_name"],
+            checked=row["scientific_name"] in species_list,
+            pb="0.25rem",
+        )
+        items.append(checkbox)
+
+    num_rows = math.ceil(len(items) / num_cols)
+    columns = []
+    for i in range(num_cols):
+        col_items = items[i*num_rows:(i+1)*num_rows]
+        columns.append(dmc.GridCol(col_items, span=3))
+    return columns
+
 def register_callbacks():
     clientside_callback(
         """
@@ -132,58 +185,19 @@ def register_callbacks():
     )
     def render_species_list_checklist(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         species_column: str,
         letter: str,
         current_page: int,
         search_term: str,
     ) -> dmc.Box:
-        max_str_len = 30
-        data = dispatch(FETCH_SPECIES, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         species_list = filters["species"]
-        data = data[data["scientific_name"].isin(species_list)]
-
-        if search_term:
-            data = data[(
-                data["scientific_name"].str.lower().str.contains(search_term.lower()) |
-                data["common_name"].str.lower().str.contains(search_term.lower())
-            )]
-        elif letter is not None:
-            data = data[data[species_column].str.lower().str.startswith(letter.lower(), na=False)]
-
-        data = data.sort_values(by=species_column)
-        total = max(1, math.ceil(len(data) / PAGE_SIZE))
-
-        if not len(data):
+        page = fetch_species_page(dataset_name, species_column, search_term, letter, current_page, species_list=tuple(species_list))
+        total = max(1, math.ceil(page["total"] / PAGE_SIZE))
+        if not page["total"]:
             return "No species in your species list", total
-
-        start = (current_page - 1) * PAGE_SIZE
-        end = start + PAGE_SIZE
-        data = data.iloc[start:end]
-
-        items = []
-        for _, row in data.iterrows():
-            label = row[species_column]
-            if len(label.strip()) == 0:
-                label = row["scientific_name"]
-            if len(label) > max_str_len:
-                label = label[:max_str_len] + "..."
-            checkbox = dmc.Checkbox(
-                id={"type": "species-checkbox", "index": row["scientific_name"]},
-                label=label,
-                value=row["scientific_name"],
-                checked=row["scientific_name"] in species_list,
-                pb="0.25rem",
-            )
-            items.append(checkbox)
-
-        num_cols = 4
-        num_rows = math.ceil(len(items) / num_cols)
-        columns = []
-        for i in range(num_cols):
-            col_items = items[i*num_rows:(i+1)*num_rows]
-            columns.append(dmc.GridCol(col_items, span=3))
-        return columns, total
+        return species_checklist(page["species"], species_column, species_list), total
 
     @callback(
         Output("species-table-checklist", "children"),
@@ -198,53 +212,17 @@ def register_callbacks():
     )
     def render_species_table_checklist(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         species_column: str,
         letter: str,
         current_page: int,
         search_term: str,
     ) -> dmc.Box:
-        max_str_len = 30
-        data = dispatch(FETCH_SPECIES, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         species_list = filters["species"]
-
-        if search_term:
-            data = data[(
-                data["scientific_name"].str.lower().str.contains(search_term.lower()) |
-                data["common_name"].str.lower().str.contains(search_term.lower())
-            )]
-        elif letter is not None:
-            data = data[data[species_column].str.lower().str.startswith(letter.lower(), na=False)]
-
-        data = data.sort_values(by=species_column)
-        total = max(1, math.ceil(len(data) / PAGE_SIZE))
-        start = (current_page - 1) * PAGE_SIZE
-        end = start + PAGE_SIZE
-        data = data.iloc[start:end]
-
-        items = []
-        for _, row in data.iterrows():
-            label = row[species_column]
-            if len(label.strip()) == 0:
-                label = row["scientific_name"]
-            if len(label) > max_str_len:
-                label = label[:max_str_len] + "..."
-            checkbox = dmc.Checkbox(
-                id={"type": "species-checkbox", "index": row["scientific_name"]},
-                label=label,
-                value=row["scientific_name"],
-                checked=row["scientific_name"] in species_list,
-                pb="0.25rem",
-            )
-            items.append(checkbox)
-
-        num_cols = 4
-        num_rows = math.ceil(len(items) / num_cols)
-        columns = []
-        for i in range(num_cols):
-            col_items = items[i*num_rows:(i+1)*num_rows]
-            columns.append(dmc.GridCol(col_items, span=3))
-        return columns, total
+        page = fetch_species_page(dataset_name, species_column, search_term, letter, current_page)
+        total = max(1, math.ceil(page["total"] / PAGE_SIZE))
+        return species_checklist(page["species"], species_column, species_list), total
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -254,10 +232,11 @@ def register_callbacks():
         prevent_initial_call=True,
     )
     def add_species_to_store(
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         selected_species: List[str],
         check_boxes: List[bool],
     ) -> List[str]:
+        filters = FilterSessions.load(filter_session)
         current_species = set(filters["species"])
         for checked, scientific_name in zip(check_boxes, selected_species):
             if checked:
@@ -265,10 +244,10 @@ def register_callbacks():
             if not checked and scientific_name in current_species:
                 current_species.remove(scientific_name)
         species_list = sorted(list(current_species))
-        if species_list == current_species:
+        if species_list == filters["species"]:
             return no_update
         filters["species"] = species_list
-        return filters
+        return FilterSessions.save(filter_session, filters)
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -280,16 +259,17 @@ def register_callbacks():
     )
     def reset_species_store(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         n_clicks: int,
     ) -> List[str]:
+        filters = FilterSessions.load(filter_session)
         if n_clicks is None or n_clicks == 0:
             return no_update, no_update
         species_list = []
         dispatch(SET_SPECIES_LIST, dataset_name=dataset_name, species_list=species_list)
         filters["species"] = species_list
         time.sleep(0.5)
-        return filters, False
+        return FilterSessions.save(filter_session, filters), False
 
     clientside_callback(
         """
@@ -312,8 +292,9 @@ def register_callbacks():
     def save_species_list(
         n_clicks: int,
         dataset_name: str,
-        filters: List[str],
+        filter_session: FilterSession,
     ) -> List[str]:
+        filters = FilterSessions.load(filter_session)
         if n_clicks is None or n_clicks == 0:
             return no_update, False
         species_list = filters["species"]
@@ -15,10 +15,13 @@ from loguru import logger
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_ACOUSTIC_FEATURES
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, capitalise_each, send_download, safe_category_orders
 from utils.sketch import default_layout
+from utils.figures.encoding import encode_figure
+from utils.figures.fast import fast_figure
+from utils.hover import hover_params
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 800
 
@@ -33,6 +36,8 @@ def register_callbacks():
         Output("index-box-graph", "figure"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
         Input("index-box-plot-type-select", "value"),
         Input("index-box-time-aggregation", "value"),
         Input("index-box-outliers-tickbox", "checked"),
@@ -43,7 +48,9 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         plot_type: str,
         time_agg: str,
         outliers: bool,
@@ -52,12 +59,12 @@ def register_callbacks():
         facet_col: str,
         template: str,
     ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters)
         plot_types = {"box": px.box, "violin": functools.partial(px.violin, box=True)}
-        fig = plot_types[plot_type](
-            data_frame=data,
+        fig = fast_figure(
+            plot_types[plot_type],
+            data,
             x=time_agg,
             y="value",
             color=color,
@@ -65,18 +72,21 @@ def register_callbacks():
             facet_col=facet_col,
             # box=True,
             points="outliers" if outliers else False,
-            hover_name="file_id",
-            hover_data=[
-                "file_name",
-                "file_path",
-                "timestamp",
-                "site_name",
-                "dddn",
-                "hour_categorical",
-                "week_of_year_categorical",
-                "duration",
-                "offset",
-            ],
+            **hover_params(
+                data,
+                hover_name="file_id",
+                hover_data=[
+                    "file_name",
+                    "file_path",
+                    "timestamp",
+                    "site_name",
+                    "dddn",
+                    "hour_categorical",
+                    "week_of_year_categorical",
+                    "duration",
+                    "offset",
+                ],
+            ),
             # facet_col_wrap=4,
             labels={
                 "value": capitalise_each(filters["current_feature"]),
@@ -99,7 +109,7 @@ def register_callbacks():
         fig.update_layout(default_layout(fig, row_height=600))
         fig.update_layout(title_text=title_text)
         fig.update_layout(template=template)
-        return fig
+        return encode_figure(fig)
 
     clientside_callback(
         """
@@ -122,9 +132,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_acoustic_indices",
@@ -7,17 +7,21 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
 
-from dash import html, dcc, callback, ctx, no_update, clientside_callback
+from dash import html, dcc, callback, ctx, no_update, clientside_callback, Patch
 from dash import Output, Input, State, ALL, MATCH
 from io import StringIO
 from loguru import logger
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_ACOUSTIC_FEATURES
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, capitalise_each, send_download, safe_category_orders
 from utils.sketch import default_layout
+from utils.figures.encoding import encode_figure
+from utils.figures.fast import fast_figure
+from utils.figures.patch import cosmetic_patch
+from utils.hover import hover_params
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 800
 
@@ -30,20 +34,25 @@ def fetch_data(dataset_name, filters):
 def register_callbacks():
     @callback(
         Output("index-scatter-graph", "figure"),
+        Output("index-scatter-graph-traces", "data"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
-        Input("index-scatter-size-slider", "value"),
-        Input("index-scatter-opacity-slider", "value"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
+        State("index-scatter-size-slider", "value"),
+        State("index-scatter-opacity-slider", "value"),
         Input("index-scatter-x-axis-select", "value"),
         Input("index-scatter-colour-select", "value"),
         Input("index-scatter-symbol-select", "value"),
         Input("index-scatter-facet-row-select", "value"),
         Input("index-scatter-facet-column-select", "value"),
-        Input("plotly-theme", "data"),
+        State("plotly-theme", "data"),
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         dot_size: int,
         opacity: int,
         x_axis: str,
@@ -52,12 +61,12 @@ def register_callbacks():
         facet_row: str,
         facet_col: str,
         template: str,
-    ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+    ) -> Tuple[go.Figure, int]:
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters)
-        fig = px.scatter(
-            data_frame=data,
+        fig = fast_figure(
+            px.scatter,
+            data,
             x=x_axis,
             y="value",
             opacity=opacity / 100.0,
@@ -66,18 +75,21 @@ def register_callbacks():
             facet_row=facet_row,
             facet_col=facet_col,
             color_discrete_sequence=px.colors.qualitative.Plotly,
-            hover_name="file_id",
-            hover_data=[
-                "file_name",
-                "file_path",
-                "timestamp",
-                "site_name",
-                "dddn",
-                "hour_categorical",
-                "week_of_year_categorical",
-                "duration",
-                "offset",
-            ],
+            **hover_params(
+                data,
+                hover_name="file_id",
+                hover_data=[
+                    "file_name",
+                    "file_path",
+                    "timestamp",
+                    "site_name",
+                    "dddn",
+                    "hour_categorical",
+                    "week_of_year_categorical",
+                    "duration",
+                    "offset",
+                ],
+            ),
             labels={
                 "value": capitalise_each(filters["current_feature"]),
                 "file_name": "File Name",
@@ -102,7 +114,30 @@ def register_callbacks():
         fig.update_layout(default_layout(fig, row_height=600))
         fig.update_layout(title_text=title_text)
         fig.update_layout(template=template)
-        return fig
+        return encode_figure(fig), len(fig.data)
+
+    @callback(
+        Output("index-scatter-graph", "figure", allow_duplicate=True),
+        Input("index-scatter-graph-traces", "data"),
+        Input("index-scatter-size-slider", "value"),
+        Input("index-scatter-opacity-slider", "value"),
+        Input("plotly-theme", "data"),
+        prevent_initial_call=True,
+    )
+    def patch_figure(
+        num_traces: int,
+        dot_size: int,
+        opacity: int,
+        template: str,
+    ) -> Patch:
+        # a redraw reads these as they were when it started, so re-apply them all once it lands
+        redrawn = ctx.triggered_id == "index-scatter-graph-traces"
+        return cosmetic_patch(
+            num_traces,
+            dot_size=dot_size if redrawn or ctx.triggered_id == "index-scatter-size-slider" else None,
+            opacity=opacity / 100.0 if redrawn or ctx.triggered_id == "index-scatter-opacity-slider" else None,
+            template=template if redrawn or ctx.triggered_id == "plotly-theme" else None,
+        )
 
     clientside_callback(
         """
@@ -125,9 +160,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_acoustic_indices",
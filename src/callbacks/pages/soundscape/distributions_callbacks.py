@@ -12,11 +12,11 @@ from io import StringIO
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_ACOUSTIC_FEATURES
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, capitalise_each, send_download, safe_category_orders
 from utils.sketch import default_layout
 from utils.figures.histogram import plot
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 400
 
@@ -31,6 +31,8 @@ def register_callbacks():
         Output("distributions-graph", "figure"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
         Input("distributions-colour-select", "value"),
         Input("distributions-facet-row-select", "value"),
         Input("distributions-facet-column-select", "value"),
@@ -39,17 +41,18 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         color: str,
         facet_row: str,
         facet_col: str,
         normalised: bool,
         template: str,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         if not len(filters):
             return no_update
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
         data = fetch_data(dataset_name, filters)
         fig = plot(
             data,
@@ -92,9 +95,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_acoustic_features",
@@ -7,17 +7,21 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
 
-from dash import html, dcc, callback, ctx, no_update, clientside_callback
+from dash import html, dcc, callback, ctx, no_update, clientside_callback, Patch
 from dash import Output, Input, State, ALL, MATCH
 from io import StringIO
 from loguru import logger
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_ACOUSTIC_FEATURES_UMAP
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, send_download
 from utils.sketch import default_layout
+from utils.figures.encoding import encode_figure
+from utils.figures.fast import fast_figure
+from utils.figures.patch import cosmetic_patch
+from utils.hover import hover_params
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 800
 
@@ -37,8 +41,9 @@ def plot(
     labels: Dict[str, str] | None = None,
     **kwargs: Any,
 ) -> go.Figure:
-    fig = px.scatter(
-        data_frame=df,
+    fig = fast_figure(
+        px.scatter,
+        df,
         x="x",
         y="y",
         opacity=opacity / 100.0,
@@ -63,19 +68,24 @@ def plot(
 def register_callbacks():
     @callback(
         Output("umap-graph", "figure"),
+        Output("umap-graph-traces", "data"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
-        Input("umap-opacity-slider", "value"),
-        Input("umap-size-slider", "value"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
+        State("umap-opacity-slider", "value"),
+        State("umap-size-slider", "value"),
         Input("umap-colour-select", "value"),
         Input("umap-symbol-select", "value"),
         Input("umap-facet-row-select", "value"),
         Input("umap-facet-column-select", "value"),
-        Input("plotly-theme", "data"),
+        State("plotly-theme", "data"),
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         opacity: int,
         dot_size: int,
         color: str,
@@ -83,9 +93,8 @@ def register_callbacks():
         facet_row: str,
         facet_col: str,
         template: str,
-    ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+    ) -> Tuple[go.Figure, int]:
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters)
         fig = plot(
             data,
@@ -94,18 +103,21 @@ def register_callbacks():
             symbol=symbol,
             facet_row=facet_row,
             facet_col=facet_col,
-            hover_name="file_id",
-            hover_data=[
-                "file_name",
-                "file_path",
-                "timestamp",
-                "site_name",
-                "dddn",
-                "hour_categorical",
-                "week_of_year_categorical",
-                "duration",
-                "offset",
-            ],
+            **hover_params(
+                data,
+                hover_name="file_id",
+                hover_data=[
+                    "file_name",
+                    "file_path",
+                    "timestamp",
+                    "site_name",
+                    "dddn",
+                    "hour_categorical",
+                    "week_of_year_categorical",
+                    "duration",
+                    "offset",
+                ],
+            ),
             labels={
                 "x": "UMAP Dim 1",
                 "y": "UMAP Dim 2",
@@ -129,21 +141,30 @@ def register_callbacks():
         fig.update_layout(default_layout(fig, row_height=800))
         fig.update_layout(title_text="UMAP of Soundscape Descriptors")
         fig.update_layout(template=template)
-        return fig
+        return encode_figure(fig), len(fig.data)
 
-    # TODO: FINISH
-    # clientside_callback(
-    #     """
-    #     function (n_clicks, fig) {
-    #         fig.layout.template = (n_clicks % 2) ? 'plotly_dark' : 'plotly'
-    #         return fig
-    #     }
-    #     """,
-    #     Output("umap-graph", "figure", allow_duplicate=True),
-    #     Input("color-scheme-toggle", "n_clicks"),
-    #     State("umap-graph", "figure"),
-    #     prevent_initial_call=True,
-    # )
+    @callback(
+        Output("umap-graph", "figure", allow_duplicate=True),
+        Input("umap-graph-traces", "data"),
+        Input("umap-size-slider", "value"),
+        Input("umap-opacity-slider", "value"),
+        Input("plotly-theme", "data"),
+        prevent_initial_call=True,
+    )
+    def patch_figure(
+        num_traces: int,
+        dot_size: int,
+        opacity: int,
+        template: str,
+    ) -> Patch:
+        # a redraw reads these as they were when it started, so re-apply them all once it lands
+        redrawn = ctx.triggered_id == "umap-graph-traces"
+        return cosmetic_patch(
+            num_traces,
+            dot_size=dot_size if redrawn or ctx.triggered_id == "umap-size-slider" else None,
+            opacity=opacity / 100.0 if redrawn or ctx.triggered_id == "umap-opacity-slider" else None,
+            template=template if redrawn or ctx.triggered_id == "plotly-theme" else None,
+        )
 
     clientside_callback(
         """
@@ -166,9 +187,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         n_clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_acoustic_features_umap",
@@ -16,22 +16,21 @@ from io import StringIO
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_BIRDNET_SPECIES
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils.figures.species_matrix import species_matrix as plot
 from utils import list2tuple, send_download, safe_category_orders
 from utils.sketch import empty_figure, default_layout
+from utils.filter_sessions import FilterSessions, FilterSession
 
 def register_callbacks():
     @callback(
         Output("species-matrix-pagination-controls", "children"),
-        State("dataset-select", "value"),
+        State("dataset-options", "data"),
         Input("species-matrix-filter", "value"),
         Input("species-matrix-filter", "data"),
         prevent_initial_call=True,
     )
-    def set_matrix_pagination(dataset_name: str, opt_group: str, select_data: List[str]):
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
+    def set_matrix_pagination(options: Dict[str, Any], opt_group: str, select_data: List[str]):
         opts = options.get(opt_group)
         if not opts:
             return []
@@ -56,6 +55,8 @@ def register_callbacks():
         Output("species-community-graph", "figure"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
         Input("species-threshold-slider", "value"),
         Input("species-community-axis-select", "value"),
         Input("species-community-facet-column-select", "value"),
@@ -66,7 +67,9 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         threshold: float,
         axis_group: str,
         facet_col: str,
@@ -75,8 +78,7 @@ def register_callbacks():
         species_checkbox: bool,
         template: str,
     ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         action = FETCH_BIRDNET_SPECIES
         if not species_checkbox:
             filters["species"] = []
@@ -116,10 +118,11 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         threshold: float,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         action = FETCH_BIRDNET_SPECIES
         payload = dict(dataset_name=dataset_name, threshold=threshold, **filter_dict_to_tuples(filters))
         logger.debug(f"{ctx.triggered_id=} {action=} {payload=}")
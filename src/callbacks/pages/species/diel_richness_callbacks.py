@@ -15,11 +15,12 @@ from loguru import logger
 from typing import Any, Dict, List, Tuple
 
 from api import dispatch, FETCH_BIRDNET_SPECIES
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
 from api import filter_dict_to_tuples
 from utils import list2tuple, send_download, safe_category_orders
 from utils import sketch
 from utils.sketch import scatter_polar, default_layout
+from utils.figures.encoding import encode_figure
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 800
 
@@ -70,6 +71,8 @@ def register_callbacks():
         Output("species-richness-graph", "figure"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
         Input("species-richness-plot-type-select", "value"),
         Input("species-richness-primary-axis-select", "value"),
         Input("species-threshold-slider", "value"),
@@ -81,7 +84,9 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         plot_type: str,
         primary_axis: str,
         threshold: str,
@@ -91,8 +96,7 @@ def register_callbacks():
         species_checkbox: bool,
         template: str,
     ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         if not species_checkbox:
             filters["species"] = []
         data = fetch_data(dataset_name, threshold, filters)
@@ -127,7 +131,7 @@ def register_callbacks():
         fig.update_layout(default_layout(fig, row_height=600))
         fig.update_layout(title_text=title_text, margin=dict(t=100))
         fig.update_layout(template=template)
-        return fig
+        return encode_figure(fig)
 
     clientside_callback(
         """
@@ -152,9 +156,10 @@ def register_callbacks():
     def download_data(
         dataset_name: str,
         threshold: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, threshold, filters),
             f"{dataset_name}_birdnet_detections",
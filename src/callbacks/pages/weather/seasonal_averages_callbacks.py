@@ -10,11 +10,11 @@ from dash import Output, Input, State, ALL, MATCH
 from loguru import logger
 from typing import Any, Dict, List, Tuple
 
-from api import dispatch, FETCH_DATASET_OPTIONS, FETCH_FILE_WEATHER
-from api import FETCH_DATASET_OPTIONS, FETCH_DATASET_CATEGORY_ORDERS
+from api import dispatch, FETCH_FILE_WEATHER
 from api import filter_dict_to_tuples
 from utils import list2tuple, send_download, safe_category_orders
 from utils.sketch import default_layout
+from utils.filter_sessions import FilterSessions, FilterSession
 
 PLOT_HEIGHT = 800
 
@@ -29,6 +29,8 @@ def register_callbacks():
         Output("weather-hourly-graph", "figure"),
         State("dataset-select", "value"),
         Input("filter-store", "data"),
+        Input("dataset-options", "data"),
+        Input("dataset-category-orders", "data"),
         Input("weather-hourly-variable-select", "value"),
         Input("weather-hourly-time-aggregation", "value"),
         Input("weather-hourly-colour-select", "value"),
@@ -38,7 +40,9 @@ def register_callbacks():
     )
     def draw_figure(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        category_orders: Dict[str, List[str]],
         variable: str,
         time_agg: str,
         color: str,
@@ -46,8 +50,7 @@ def register_callbacks():
         annual_wrap: bool,
         template: str,
     ) -> go.Figure:
-        options = dispatch(FETCH_DATASET_OPTIONS, dataset_name=dataset_name)
-        category_orders = dispatch(FETCH_DATASET_CATEGORY_ORDERS, dataset_name=dataset_name)
+        filters = FilterSessions.load(filter_session)
         data = fetch_data(dataset_name, filters)
 
         if annual_wrap:
@@ -111,9 +114,10 @@ def register_callbacks():
     )
     def download_data(
         dataset_name: str,
-        filters,
+        filter_session: FilterSession,
         clicks,
     ) -> Dict[str, Any]:
+        filters = FilterSessions.load(filter_session)
         return send_download(
             fetch_data(dataset_name, filters),
             f"{dataset_name}_weather",
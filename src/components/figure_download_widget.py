@@ -7,6 +7,7 @@ from dash_iconify import DashIconify
 from loguru import logger
 
 from utils import render_fig_as_image_file
+from utils.figures.encoding import decode_figure
 
 def FigureDownloadWidget(
     plot_name: str,
@@ -48,7 +49,7 @@ def FigureDownloadWidget(
     )
     def download_fig(dataset, fig_dict, rqst):
         logger.debug(f"Trigger Callback: {dataset=} {rqst=}")
-        fig = go.Figure(fig_dict)
+        fig = go.Figure(decode_figure(fig_dict))
         fig.update_layout(width=rqst['width'], height=rqst['height'])
         return render_fig_as_image_file(fig,rqst['trigger'],f"{plot_name.strip('-graph')}_{dataset}_plot")
 
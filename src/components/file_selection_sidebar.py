@@ -3,22 +3,35 @@ import dash_mantine_components as dmc
 import dash_bootstrap_components as dbc
 import pandas as pd
 
-from dash import callback, dcc, html, ctx, no_update
+from dash import callback, clientside_callback, dcc, html, ctx, no_update
 from dash import Output, Input, State
 from dash import MATCH
 from dash import exceptions
 from dash_iconify import DashIconify
-from io import StringIO
 from loguru import logger
 from typing import Any, Dict, List, Tuple
 
-from api import dispatch, FETCH_FILES, FETCH_DATASET_CONFIG
-from api import filter_dict_to_tuples
-from utils import audio_bytes_to_enc
+from api import dispatch, FETCH_FILES, FETCH_DATASET_CONFIG, REGISTER_FILE_SELECTION
+from components.point_details import lookup_point_details
+from routes.archive_routes import archive_url
+from routes.audio_routes import audio_url
+from routes.spectrogram_routes import spectrogram_url
+from utils.filter_sessions import FilterSessions, FilterSession
+from utils.selected_points import SelectedPoints, PointSelection
 from utils.webhost import AudioAPI
+from utils.webhost.prefetch import AudioPrefetch
 
 PAGE_LIMIT = 10
 
+# seconds of context either side of a segment clip
+CLIP_PADDING = 1.0
+
+def audio_key(row: pd.Series) -> str:
+    """Accordion key for a file, or for a segment of it where points are segments"""
+    if pd.notna(row.get("offset")):
+        return f"{row['file_path']}#t={row['offset']}"
+    return row["file_path"]
+
 def FileSelectionSidebarIcon(
     context: str,
 ):
@@ -49,7 +62,9 @@ def FileSelectionSidebar(
     context: str,
     graph: str,
     sibling: str,
-    span: int = 4
+    span: int = 4,
+    action: str = FETCH_FILES,
+    fetch_kwargs: Dict[str, Any] | None = None,
 ) -> dmc.GridCol:
     """Render a sidebar for selecting and filtering data points.
     The sidebar is toggled by adjusting the style of itself and its sibling
@@ -60,6 +75,10 @@ def FileSelectionSidebar(
         The element ID for a dcc.Graph
     sibling: str
         The element ID for a sibling dmc.GridCol containing the graph
+    action: str
+        The API action the graph's data was fetched with, used to look up lean hover points
+    fetch_kwargs: dict
+        Any additional arguments the graph's data was fetched with
 
     Returns
     -------
@@ -178,6 +197,36 @@ def FileSelectionSidebar(
                                                     ),
                                                 ],
                                             ),
+                                            dmc.HoverCard(
+                                                children=[
+                                                    dmc.HoverCardTarget(
+                                                        children=dmc.ActionIcon(
+                                                            DashIconify(
+                                                                icon="material-symbols:download",
+                                                                width=24,
+                                                            ),
+                                                            id=f"{context}-file-sidebar-download-button",
+                                                            variant="light",
+                                                            color="blue",
+                                                            size="lg",
+                                                            n_clicks=0,
+                                                        ),
+                                                    ),
+                                                    dmc.HoverCardDropdown(
+                                                        dmc.Text("Download Audio for Selection"),
+                                                    ),
+                                                ],
+                                            ),
+                                            # posted natively, so the browser saves the streamed archive
+                                            html.Form(
+                                                id=f"{context}-file-sidebar-download-form",
+                                                method="POST",
+                                                style={"display": "none"},
+                                                children=[
+                                                    dcc.Input(id=f"{context}-file-sidebar-download-dataset", name="dataset_name", type="hidden"),
+                                                    dcc.Input(id=f"{context}-file-sidebar-download-selection", name="points_id", type="hidden"),
+                                                ],
+                                            ),
                                         ]
                                     )
                                 ]
@@ -316,13 +365,13 @@ def FileSelectionSidebar(
     )
     def toggle_selection_sidebar(
         dataset_name: str,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
         current_span: int,
         current_style: Dict[str, str],
         lassoo_data: Dict[str, Any],
         clicked_data: Dict[str, Any],
-    ) -> Tuple[int, int, Dict[str, str], str, str, int]:
-        """Toggle the sidebar and populate the selected data store
+    ) -> Tuple[int, int, Dict[str, str], PointSelection | None, str, int]:
+        """Toggle the sidebar and hold the selected files server-side
 
         Parameters
         ----------
@@ -343,8 +392,8 @@ def FileSelectionSidebar(
             Updated span of the sidebar element
         sidebar_style: dict
             Updated styling of the sidebar element (resetting display)
-        selected_data_json: str
-            The data for selected data points encoded as a json string
+        selection: dict
+            The handle of the selected files, held server-side
         selected_text: str
             Pagination text describing which page we are on
         total_pages: int
@@ -356,13 +405,16 @@ def FileSelectionSidebar(
                 sibling_span := 12 - current_span,
                 sidebar_span := current_span,
                 sidebar_style := current_style,
-                selected_data_json := "",
+                selection := None,
                 selected_text := "",
                 total_pages := 1,
             )
-        data = dispatch(FETCH_FILES, dataset_name=dataset_name, **filter_dict_to_tuples(filters))
-        data = data.loc[data["file_id"].isin([point["hovertext"] for point in points]), ["file_id", "file_path"]]
-        total = len(data)
+        filters = FilterSessions.load(filter_session)
+        details = lookup_point_details(points, dataset_name, filters, action, fetch_kwargs)
+        # where points are segments of a recording, just those segments are played
+        columns = ["file_id", "file_path", *(["offset"] if "offset" in details.columns else [])]
+        selection = SelectedPoints.create(details[columns].drop_duplicates())
+        total = selection["total"]
         start = 1
         end = min(total, PAGE_LIMIT * start)
 
@@ -370,30 +422,85 @@ def FileSelectionSidebar(
             sibling_span := 12 - span,
             sidebar_span := span,
             sidebar_style := style_visible,
-            selected_data_json := data.to_json(date_format="iso", orient="table"),
+            selection,
             selected_text := f"Showing {start} - {end} / {total}",
             total_pages := (total + PAGE_LIMIT - 1) // PAGE_LIMIT,
         )
 
+    @callback(
+        Output(f"{context}-file-sidebar-download-form", "action"),
+        Output(f"{context}-file-sidebar-download-dataset", "value"),
+        Output(f"{context}-file-sidebar-download-selection", "value"),
+        State("dataset-select", "value"),
+        Input(f"{context}-file-sidebar-store", "data"),
+        prevent_initial_call=True,
+    )
+    def set_download_selection(
+        dataset_name: str,
+        selection: PointSelection | None,
+    ) -> Tuple[str, str, str]:
+        """Fill the download form with the recordings in the current selection
+
+        Parameters
+        ----------
+        dataset_name: str
+            The name of the currently selected dataset
+        selection: dict
+            The handle of the selected files, held server-side
+
+        Returns
+        -------
+        action: str
+            The URL the form posts to
+        dataset_name: str
+            The dataset the recordings belong to
+        points_id: str
+            The id of the selection, resolved to file paths by the archive route
+        """
+        if not SelectedPoints.is_selection(selection):
+            return archive_url(), dataset_name, ""
+        return archive_url(), dataset_name, selection["points_id"]
+
+    clientside_callback(
+        """
+        function (n_clicks, points_id, form_id) {
+            if (n_clicks && points_id) {
+                document.getElementById(form_id).submit();
+            }
+            return window.dash_clientside.no_update
+        }
+        """,
+        Output(f"{context}-file-sidebar-download-form", "id"),
+        Input(f"{context}-file-sidebar-download-button", "n_clicks"),
+        State(f"{context}-file-sidebar-download-selection", "value"),
+        State(f"{context}-file-sidebar-download-form", "id"),
+        prevent_initial_call=True,
+    )
+
     @callback(
         Output(f"{context}-file-sidebar-files-accordion", "children"),
         Output(f"{context}-file-sidebar-files-count", "children", allow_duplicate=True),
+        State("dataset-select", "value"),
         State(f"{context}-file-sidebar-store", "data"),
         Input(f"{context}-file-sidebar-files-pagination", "value"),
         Input(f"{context}-file-sidebar-files-pagination", "total"),
         prevent_initial_call=True,
     )
     def change_page(
-        selected_json_data: str,
+        dataset_name: str,
+        selection: PointSelection | None,
         current_page: int,
         total_pages: int,
     ) -> dmc.Box:
-        """Populate the current page with an accordion for each file
+        """Populate the current page with an accordion for each file,
+        prefetching the audio for this page and the next in the background
 
         Parameters
         ----------
-        selected_json_data: str
-            The file data as JSON parsable as a table using pandas
+        dataset_name: str
+            The name of the currently selected dataset
+        selection: dict
+            The handle of the selected files, held server-side
         current_page: int
             The selected page number
         open_values: str
@@ -404,37 +511,49 @@ def FileSelectionSidebar(
         children: list
             A list of dmc.AccordionItems for each file_id
         """
-        if selected_json_data == "" or selected_json_data is None:
+        if not SelectedPoints.is_selection(selection):
             return (
                 accordion_items := "No files selected",
                 selected_text := "",
             )
 
-        data = pd.read_json(StringIO(selected_json_data), orient="table")
-        page_data = data.iloc[(current_page - 1):(current_page - 1) + PAGE_LIMIT]
+        # this page and the next, the next prefetched while this one is listened to
+        prefetch_data = SelectedPoints.page(selection, offset=PAGE_LIMIT * (current_page - 1), limit=2 * PAGE_LIMIT)
+        page_data = prefetch_data.iloc[:PAGE_LIMIT]
+
+        config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+        AudioPrefetch.prefetch(dataset_name, config, prefetch_data["file_path"])
 
         logger.debug(
             f"Trigger ID={ctx.triggered_id}: "
             f"{current_page=} selected={len(page_data)}"
         )
 
+        # where hosts catalogue their audio, files without any are marked rather than probed on opening
+        available = AudioAPI.audio_available(dataset_name, config, page_data["file_path"])
+
         accordion_items = [
             dmc.AccordionItem(
-                value=row["file_path"],
+                value=audio_key(row),
                 children=[
-                    dmc.AccordionControl(row["file_path"].split("/")[-1]),
+                    dmc.AccordionControl(
+                        row["file_path"].split("/")[-1]
+                        + (f" @ {row['offset']}s" if pd.notna(row.get("offset")) else "")
+                        + (" (no audio)" if available is not None and not available[index] else ""),
+                        disabled=available is not None and not available[index],
+                    ),
                     dmc.AccordionPanel(
                         dmc.Box(
-                            id={"type": f"{context}-file-sidebar-file-data", "index": row["file_path"]},
+                            id={"type": f"{context}-file-sidebar-file-data", "index": audio_key(row)},
                             children=[],
                         )
                     )
                 ]
             )
-            for _, row in page_data.iterrows()
+            for index, row in page_data.iterrows()
         ]
 
-        total = len(data)
+        total = selection["total"]
         start = PAGE_LIMIT * (current_page - 1) + 1
         end = min(total, PAGE_LIMIT * current_page)
         selected_text = f"Showing {start} - {end} / {total}",
@@ -451,21 +570,22 @@ def FileSelectionSidebar(
     )
     def toggle_file_panel(
         dataset_name: str,
-        selected_json_data: str,
+        selection: PointSelection | None,
         matched: str,
         open_values: str,
     ) -> dmc.Box:
         """Toggle the accordion panel for a single file,
-        showing file metadata and a html audio element
+        showing its spectrogram and a html audio element
 
         Parameters
         ----------
         dataset_name: str
             The name of the currently selected dataset
-        selected_json_data: str
-            The file data as JSON parsable as a table using pandas
+        selection: dict
+            The handle of the selected files, held server-side
         matched: str
-            The pattern matcher for the selected file, where 'index' is a file_id
+            The pattern matcher for the selected file, where 'index' is the file path,
+            suffixed with '#t=<offset>' for a segment
         open_values: str
             The list of file_ids present on the current page
 
@@ -474,19 +594,37 @@ def FileSelectionSidebar(
         component: dmc.Box
             A html element containing file metadata and audio
         """
-        if (file_path := matched["index"]) not in open_values:
+        if (key := matched["index"]) not in open_values:
             raise exceptions.PreventUpdate
+        file_path, _, offset = key.partition("#t=")
         config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
-        audio_bytes, mime_type, _ = AudioAPI.get_audio_bytes(file_path, dataset_name, config)
-        if audio_bytes is not None:
+        segment_duration = config.get("SoundADE", {}).get("segment_duration")
+        host_name, _ = AudioAPI.find_audio(file_path, dataset_name, config)
+        if host_name is not None:
+            if offset and segment_duration is not None:
+                src = audio_url(dataset_name, file_path, offset=float(offset), duration=float(segment_duration), padding=CLIP_PADDING)
+                image_src = spectrogram_url(dataset_name, file_path, offset=float(offset), duration=float(segment_duration))
+            else:
+                src = audio_url(dataset_name, file_path)
+                image_src = spectrogram_url(dataset_name, file_path)
             return dmc.Box([
-                dcc.Loading(
-                    html.Audio(
-                        id="audio-player",
-                        src=audio_bytes_to_enc(audio_bytes, mime_type),
-                        controls=True,
-                    ),
-                )
+                html.Img(
+                    src=image_src,
+                    alt="Spectrogram",
+                    loading="lazy",
+                    style={"width": "100%"},
+                ),
+                html.Audio(
+                    id="audio-player",
+                    src=src,
+                    controls=True,
+                    preload="metadata",
+                ),
+                dmc.Anchor(
+                    children=dmc.Text("Original recording", size="xs"),
+                    href=audio_url(dataset_name, file_path, original=True),
+                    target="_blank",
+                ),
             ])
         else:
             return dmc.Box([
@@ -507,15 +645,15 @@ def FileSelectionSidebar(
     def include_file_selection(
         n_clicks: int,
         dataset_name: str,
-        selected_json_data: str,
-        filters: Dict[str, Any],
+        selection: PointSelection | None,
+        filter_session: FilterSession,
     ) -> Dict[str, List[str]]:
-        """Add *all other* file_ids to the filter store
+        """Add *all other* file_ids to the filter store, as a selection kept server-side
 
         Parameters
         ----------
-        selected_json_data: str
-            The file data as JSON parsable as a table using pandas
+        selection: dict
+            The handle of the selected files, held server-side
         filtered_file_ids: list
             A list of unique file ids currently discluded from the graph
 
@@ -524,15 +662,15 @@ def FileSelectionSidebar(
         "filter-store": list
             An updated list of unique file ids to disclude from the graph
         """
+        filters = FilterSessions.load(filter_session)
         if not n_clicks: return no_update
-        selected_file_ids = pd.read_json(StringIO(selected_json_data), orient="table")["file_id"]
-        data = dispatch(FETCH_FILES, dataset_name=dataset_name, **filter_dict_to_tuples(filters))
-        file_ids = set(data.loc[~data["file_id"].isin(selected_file_ids), "file_id"].tolist())
+        selected_file_ids = set(SelectedPoints.load(selection)["file_id"].tolist())
         file_filter = filters["files"]
         selection_id = len(file_filter.keys()) + 1
-        file_filter[selection_id] = list(file_ids)
+        # every other file is filtered, registered as the selection's complement rather than listed
+        file_filter[selection_id] = dispatch(REGISTER_FILE_SELECTION, dataset_name=dataset_name, file_ids=tuple(sorted(selected_file_ids)), invert=True)
         filters["files"] = file_filter
-        return filters, 12, 0, style_hidden
+        return FilterSessions.save(filter_session, filters), 12, 0, style_hidden
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -540,34 +678,37 @@ def FileSelectionSidebar(
         Output(f"{context}-file-sidebar", "span", allow_duplicate=True),
         Output(f"{context}-file-sidebar", "style", allow_duplicate=True),
         Input(f"{context}-file-sidebar-disclude-button", "n_clicks"),
+        State("dataset-select", "value"),
         State(f"{context}-file-sidebar-store", "data"),
         State("filter-store", "data"),
         prevent_initial_call=True,
     )
     def disclude_file_selection(
         n_clicks: int,
-        selected_json_data: str,
-        filters: Dict[str, Any],
+        dataset_name: str,
+        selection: PointSelection | None,
+        filter_session: FilterSession,
     ) -> Dict[str, List[str]]:
-        """Add *selected* file_ids to the filter store
+        """Add *selected* file_ids to the filter store, as a selection kept server-side
 
         Parameters
         ----------
-        selected_json_data: str
-            The file data as JSON parsable as a table using pandas
+        selection: dict
+            The handle of the selected files, held server-side
         filters: dict
 
         Returns
         -------
         filters: dict
         """
+        filters = FilterSessions.load(filter_session)
         if not n_clicks: return no_update
-        file_ids = set(pd.read_json(StringIO(selected_json_data), orient="table")["file_id"].tolist())
+        file_ids = set(SelectedPoints.load(selection)["file_id"].tolist())
         file_filter = filters["files"]
         selection_id = len(file_filter.keys()) + 1
-        file_filter[selection_id] = list(file_ids)
+        file_filter[selection_id] = dispatch(REGISTER_FILE_SELECTION, dataset_name=dataset_name, file_ids=tuple(sorted(file_ids)))
         filters["files"] = file_filter
-        return filters, 12, 0, style_hidden
+        return FilterSessions.save(filter_session, filters), 12, 0, style_hidden
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -580,7 +721,7 @@ def FileSelectionSidebar(
     )
     def undo_last_file_selection(
         n_clicks: int,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
     ) -> str:
         """Remove the last file filter
 
@@ -588,6 +729,7 @@ def FileSelectionSidebar(
         -------
         filters: dict
         """
+        filters = FilterSessions.load(filter_session)
         if not n_clicks:
             return no_update
         file_filters = filters["files"]
@@ -597,8 +739,8 @@ def FileSelectionSidebar(
         file_filters.pop(str(max(selection_ids)), None)
         filters["files"] = file_filters
         if not len(file_filters):
-            return filters, 12, 0, style_hidden
-        return filters, no_update, no_update, no_update
+            return FilterSessions.save(filter_session, filters), 12, 0, style_hidden
+        return FilterSessions.save(filter_session, filters), no_update, no_update, no_update
 
     @callback(
         Output("filter-store", "data", allow_duplicate=True),
@@ -611,7 +753,7 @@ def FileSelectionSidebar(
     )
     def reset_file_selection(
         n_clicks: int,
-        filters: Dict[str, Any],
+        filter_session: FilterSession,
     ) -> str:
         """Reset the scope of the file filters, reverting back to the original graph data
 
@@ -619,9 +761,10 @@ def FileSelectionSidebar(
         -------
         filters: dict
         """
+        filters = FilterSessions.load(filter_session)
         if not n_clicks or not len(filters["files"]):
             return no_update
         filters["files"] = {}
-        return filters, 12, 0, style_hidden
+        return FilterSessions.save(filter_session, filters), 12, 0, style_hidden
 
     return component
@@ -0,0 +1,116 @@
+import dash_mantine_components as dmc
+import pandas as pd
+
+from dash import callback, ctx, no_update
+from dash import Output, Input, State
+from loguru import logger
+from typing import Any, Dict, List
+
+from api import dispatch, FETCH_POINT_DETAILS
+from api import filter_dict_to_tuples
+from config import lean_hover
+from utils.filter_sessions import FilterSessions, FilterSession
+from utils.hover import HOVER_COLUMNS, HOVER_LABELS, is_lean, point_rows
+
+def lookup_point_details(
+    points: List[Dict[str, Any]],
+    dataset_name: str,
+    filters: Dict[str, Any],
+    action: str,
+    fetch_kwargs: Dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """Fetch the rows behind a set of plotted points
+
+    Parameters
+    ----------
+    points: list
+        Points as returned by the 'hoverData', 'clickData' or 'selectedData' hooks on a plotly graph object
+    dataset_name: str
+        The name of the currently selected dataset
+    filters: dict
+        The current filter store, used to recover the cached selection the points were drawn from
+    action: str
+        The API action the figure's data was fetched with
+    fetch_kwargs: dict
+        Any additional arguments the figure's data was fetched with
+
+    Returns
+    -------
+    data: pd.DataFrame
+        One row per point, taken by the row position carried first in the points' customdata
+    """
+    fetch_kwargs = fetch_kwargs or {}
+    return dispatch(
+        FETCH_POINT_DETAILS,
+        dataset_name=dataset_name,
+        action=action,
+        rows=tuple(point_rows(points)),
+        **filter_dict_to_tuples(filters),
+        **fetch_kwargs,
+    )
+
+def PointDetails(
+    context: str,
+    graph: str,
+    action: str,
+    fetch_kwargs: Dict[str, Any] | None = None,
+    columns: List[str] = HOVER_COLUMNS,
+) -> dmc.Box:
+    """Render the details of the point currently hovered on a graph.
+    Only populated in lean hover mode, where the points themselves carry no hover text
+
+    Parameters
+    ----------
+    graph: str
+        The element ID for a dcc.Graph
+    action: str
+        The API action the graph's data was fetched with
+    fetch_kwargs: dict
+        Any additional arguments the graph's data was fetched with
+    columns: list
+        The columns to display
+
+    Returns
+    -------
+    dmc.Box
+        The details container
+    """
+    component = dmc.Box(id=f"{context}-point-details", px="1rem", children=[])
+    if not lean_hover:
+        return component
+
+    @callback(
+        Output(f"{context}-point-details", "children"),
+        State("dataset-select", "value"),
+        State("filter-store", "data"),
+        State("dataset-options", "data"),
+        Input(graph, "hoverData"),
+        prevent_initial_call=True,
+    )
+    def show_point_details(
+        dataset_name: str,
+        filter_session: FilterSession,
+        options: Dict[str, Any],
+        hover_data: Dict[str, Any],
+    ) -> List[dmc.Text]:
+        filters = FilterSessions.load(filter_session)
+        if hover_data is None or not len(points := hover_data["points"]) or not is_lean(points):
+            return no_update
+        data = lookup_point_details(points[:1], dataset_name, filters, action, fetch_kwargs)
+        logger.debug(f"Trigger ID={ctx.triggered_id}: rows={data.index.tolist()}")
+        if data.empty:
+            return []
+        row = data.iloc[0]
+        return dmc.Group(
+            gap="md",
+            children=[
+                dmc.Text([
+                    dmc.Text(f"{HOVER_LABELS.get(column, options.get(column, {}).get('label', column))}: ", fw=700, span=True, size="sm"),
+                    dmc.Text(str(row[column]), span=True, size="sm"),
+                ])
+                for column in ["file_id", *columns]
+                if column in row.index
+            ],
+        )
+
+    return component
@@ -1,26 +1,76 @@
-import bigtree as bt
 import dash
 import dash_bootstrap_components as dbc
 import dash_mantine_components as dmc
 
+from dash import dcc
+from dash_iconify import DashIconify
 from typing import Dict, List
 
+# chips rendered at once, further nodes are paged in from the server
+SITE_PAGE_LIMIT = 50
+
+def site_label(path: str) -> str:
+    """A node's path name without the root, as shown on its chip"""
+    return "/".join(path.strip("/").split("/")[1:])
+
 def TreeNodeChip(
-    node: bt.Node,
-) -> dmc.Chip:
-    node_path_name = f'{node.sep}'.join(node.path_name.strip(node.sep).split(node.sep)[1:])
-    return dmc.Chip(
-        node_path_name,
-        value=node.path_name,
-        variant="filled",
-        size="xs"
+    path: str,
+    leaf: bool,
+    selected: bool,
+    partial: bool,
+) -> dmc.Group:
+    """Render a chip for a node of the sites tree, with a button to expand it where it has children.
+    Nodes with a mix of selected and deselected nodes below them are shown lighter.
+    """
+    children = [
+        dmc.Chip(
+            site_label(path),
+            id={"type": "site-level-filter-chip", "index": path},
+            checked=selected or partial,
+            variant="light" if partial else "filled",
+            size="xs",
+        ),
+    ]
+    if not leaf:
+        children.append(
+            dmc.ActionIcon(
+                DashIconify(
+                    icon="radix-icons:chevron-right",
+                    width=16,
+                ),
+                id={"type": "site-level-filter-expand", "index": path},
+                variant="subtle",
+                size="sm",
+                n_clicks=0,
+            )
+        )
+    return dmc.Group(gap="xs", children=children)
+
+def SiteLevelBreadcrumbs(
+    root: str,
+    node: str,
+) -> dmc.Breadcrumbs:
+    """Render a button for each node from the root down to the expanded node"""
+    parts = node[len(root):].strip("/").split("/") if node != root else []
+    paths = [root] + [f"{root}/{'/'.join(parts[:depth])}" for depth in range(1, len(parts) + 1)]
+    return dmc.Breadcrumbs(
+        separator="/",
+        children=[
+            dmc.Button(
+                path.rsplit("/", 1)[-1],
+                id={"type": "site-level-filter-crumb", "index": path},
+                variant="subtle",
+                size="compact-xs",
+                n_clicks=0,
+            )
+            for path in paths
+        ],
     )
 
 def SiteLevelChipGroup(
     level_name: str,
-    level_depth: int,
-    nodes: List[bt.Node],
-) -> dmc.Box:
+    chips: List[dmc.Group],
+) -> dmc.Stack:
     return dmc.Stack(
         children=[
             dmc.Text(
@@ -31,46 +81,39 @@ def SiteLevelChipGroup(
             ),
             dmc.Group(
                 justify="flex-start",
-                children=dmc.ChipGroup(
-                    id={"type": "checklist-locations-hierarchy", "index": level_depth},
-                    multiple=True,
-                    persistence=True,
-                    value=[node.path_name for node in nodes],
-                    children=[TreeNodeChip(node) for node in nodes],
-                ),
-            )
+                children=chips,
+            ),
         ]
     )
 
-def SiteLevelHierarchyAccordion(
-    tree: bt.Node,
-    config: Dict[str, str],
-) -> dmc.Accordion:
-    return [
-        SiteLevelChipGroup(
-            level_name=config.get(
-                f"sitelevel_{depth}",
-                f"Level {depth}/{tree.max_depth - 1}"
-            ),
-            level_depth=depth,
-            nodes=list(sorted(
-                bt.levelorder_iter(
-                    tree,
-                    filter_condition=lambda node: node.depth == depth + 1
-                ),
-                key=lambda node: node.path_name
-            )),
-        )
-        for depth in range(1, tree.max_depth)
-    ]
-
 def SiteLevelFilter():
     return dmc.Box(
         children=[
+            dcc.Store(id="site-level-filter-node"),
+            dcc.Store(id="site-level-filter-sites"),
             dmc.Stack(
-                id="site-level-filter-group",
-                children=[],
-                style={"flexGrow": 1},
+                children=[
+                    dmc.TextInput(
+                        id="site-level-filter-search",
+                        placeholder="Search sites",
+                        leftSection=DashIconify(icon="radix-icons:magnifying-glass"),
+                        debounce=300,
+                        size="xs",
+                    ),
+                    dmc.Box(id="site-level-filter-breadcrumbs"),
+                    dmc.Stack(
+                        id="site-level-filter-group",
+                        children=[],
+                        style={"flexGrow": 1},
+                    ),
+                    dmc.Pagination(
+                        id="site-level-filter-pagination",
+                        total=1,
+                        value=1,
+                        size="sm",
+                        color="indigo",
+                    ),
+                ],
             ),
             dmc.Group(
                 justify="flex-end",
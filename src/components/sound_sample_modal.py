@@ -1,27 +1,20 @@
-import base64
-import os
-
 import dash_bootstrap_components as dbc
 from dash import callback, dcc, Input, Output, State, html, no_update, ctx
 from loguru import logger
+from typing import Any, Dict
 
+from api import dispatch, FETCH_FILES, FETCH_DATASET_CONFIG
+from components.point_details import lookup_point_details
+from utils.filter_sessions import FilterSessions
+from utils.hover import HOVER_COLUMNS
+from routes.audio_routes import audio_url
 from utils.webhost import AudioAPI
 from utils.data import get_path_from_config
 
-def audio_bytes_to_enc(audio_bytes, filetype):
-    if audio_bytes is None:
-        return ""
-    try:
-        enc = base64.b64encode(audio_bytes).decode('ascii')
-    except Exception as e:
-        enc = None
-        logger.warning(e)
-    else:
-        enc = f"data:audio/{filetype};base64," + enc
-    return enc
-
 def SoundSampleModal(
-    pagename: str
+    pagename: str,
+    action: str = FETCH_FILES,
+    fetch_kwargs: Dict[str, Any] | None = None,
 ) -> html.Div:
     @callback(
         Output(f'modal_sound_sample_{pagename}', 'is_open'),
@@ -33,10 +26,11 @@ def SoundSampleModal(
         Output(f'modal_sound_audio_{pagename}', 'controls', allow_duplicate=True),
         Input(f'{pagename}-graph', component_property='selectedData'),
         State('dataset-select', component_property='value'),
+        State('filter-store', component_property='data'),
         suppress_callback_exceptions=True,
         prevent_initial_call=True,
     )
-    def display_sound_modal(selectedData, dataset):
+    def display_sound_modal(selectedData, dataset, filter_session):
         logger.debug(f"Trigger ID={ctx.triggered_id}: {selectedData=} {dataset=}")
 
         if selectedData is None or len(selectedData['points']) == 0:
@@ -50,11 +44,15 @@ def SoundSampleModal(
         pt = points[0]
         logger.debug(f'Selected: {pt}')
 
-        filepath = pt['customdata'][-1]
+        # points carry their row's key, details come from the cached selection
+        details = lookup_point_details(points[:1], dataset, FilterSessions.load(filter_session), action, fetch_kwargs)
+        if details.empty:
+            return no_update, no_update, no_update, no_update, no_update, no_update, no_update
+        details = details.iloc[0]
+        filepath = details['file_path']
         filename = filepath.split('/')[-1]
-
-        # [f'Sample #{pt['pointIndex']}']
-        return True, pt['hovertext'], [' | '.join(pt['customdata'][:-1])], filepath, f"Looking for \'{filename}\'...", "", False
+        columns = [column for column in HOVER_COLUMNS if column in details.index and column != 'file_path']
+        return True, details['file_id'], [' | '.join(str(details[column]) for column in columns)], filepath, f"Looking for \'{filename}\'...", "", False
 
     @callback(
         Output(f'modal_sound_file_{pagename}', 'children', allow_duplicate=True),
@@ -68,15 +66,13 @@ def SoundSampleModal(
     def find_sound_file(filepath, dataset):
         filename = filepath.split('/')[-1]
         logger.debug(f"Looking for \'{filename}\'...")
-        audio_bytes, filetype, audiopath = AudioAPI.get_audio_bytes(filepath,dataset)
-        audiofile = audio_bytes_to_enc(audio_bytes, filetype)
+        config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset)
+        host_name, audiopath = AudioAPI.find_audio(filepath, dataset, config)
 
-        if audiofile!="":
-            output = audiopath.split('/')[-1]
-        else:
-            output = f"Could not find \'{filename}\'"
+        if host_name is not None:
+            return audiopath.split('/')[-1], audio_url(dataset, filepath), True
 
-        return output, audiofile, audiofile!="", 
+        return f"Could not find \'{filename}\'", "", False
 
 
     return html.Div([
@@ -17,3 +17,31 @@ else:
     root_dir = parent_dir / "data"
 
 logger.info(f"Data path set to {root_dir}")
+
+def env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# plot points carry only their row's key, hover details are looked up on demand
+lean_hover = env_flag("LEAN_HOVER", default=True)
+
+# remote audio is cached on local disk, shared by all workers
+audio_cache_dir = Path(os.environ.get("AUDIO_CACHE_DIR") or root_dir / "audio-cache")
+audio_cache_bytes = int(os.environ.get("AUDIO_CACHE_BYTES") or 2 * 1024 ** 3)
+
+# rendered spectrogram thumbnails
+spectrogram_dir = Path(os.environ.get("SPECTROGRAM_DIR") or root_dir / "spectrograms")
+spectrogram_bytes = int(os.environ.get("SPECTROGRAM_BYTES") or 1024 ** 3)
+
+# compact renditions of recordings, played unless the original is asked for
+preview_dir = Path(os.environ.get("PREVIEW_DIR") or root_dir / "audio-previews")
+preview_bytes = int(os.environ.get("PREVIEW_BYTES") or 2 * 1024 ** 3)
+preview_bitrate = os.environ.get("PREVIEW_BITRATE") or "48k"
+
+# filter state held server-side, the browser store carries only a session token
+filter_sessions_dir = Path(os.environ.get("FILTER_SESSIONS_DIR") or root_dir / "filter-sessions")
+
+# files picked from a graph for the selection sidebar, the browser store carries only a selection id
+selected_points_dir = Path(os.environ.get("SELECTED_POINTS_DIR") or root_dir / "selected-points")
@@ -52,6 +52,21 @@ class Dataset:
         species["species"] = species[["scientific_name", "common_name"]].agg("\n".join, axis=1)
         return species
 
+    @functools.cached_property
+    def species_index(self) -> Dict[str, pd.DataFrame]:
+        """
+        Scientific and common names of every species with lower-cased keys to search on,
+        ordered by each name in turn, so a page of species is found by masking rather than sorting.
+        """
+        species = self.species[["scientific_name", "common_name"]].assign(
+            scientific_name_key=lambda df: df["scientific_name"].str.lower(),
+            common_name_key=lambda df: df["common_name"].str.lower(),
+        )
+        return {
+            column: species.sort_values(by=f"{column}_key", kind="stable").reset_index(drop=True)
+            for column in ["scientific_name", "common_name"]
+        }
+
     @functools.cached_property
     def locations(self):
         locations = pd.read_parquet(self.path / "locations_table.parquet")
@@ -68,6 +83,33 @@ class Dataset:
         locations = self.locations
         return bt.dataframe_to_tree(locations, path_col="site")
 
+    @functools.cached_property
+    def site_index(self) -> Dict[str, np.ndarray]:
+        """
+        Row positions in locations of the sites under each node of the sites tree,
+        keyed by the node's path name, so a selection of nodes resolves without
+        walking the tree or matching site names.
+        """
+        positions = {}
+        for position, site in enumerate(self.locations["site"]):
+            parts = site.split("/")
+            for depth in range(1, len(parts) + 1):
+                positions.setdefault("/" + "/".join(parts[:depth]), []).append(position)
+        return {path: np.array(rows, dtype=np.intp) for path, rows in positions.items()}
+
+    @functools.cached_property
+    def site_children(self) -> Dict[str, List[str]]:
+        """
+        Path names of the children of each node of the sites tree, in order,
+        so a level of the tree can be listed without walking it.
+        """
+        children = {path: [] for path in self.site_index}
+        for path in sorted(self.site_index):
+            parent = path.rsplit("/", 1)[0]
+            if parent in children:
+                children[parent].append(path)
+        return children
+
     @functools.cached_property
     def solar(self):
         return pd.read_parquet(self.path / "solar_table.parquet")
@@ -24,6 +24,7 @@ from components.site_level_filter import SiteLevelFilter
 from components.environmental_filter import EnvironmentalFilter
 from components.figure_download_widget import FigureDownloadWidget
 from components.file_selection_sidebar import FileSelectionSidebar, FileSelectionSidebarIcon
+from components.point_details import PointDetails
 from utils import list2tuple
 from utils.content import get_content
 from utils.sketch import empty_figure
@@ -139,6 +140,7 @@ layout = dmc.Box([
             id="times-graph-container",
             span=12,
             children=[
+                dcc.Store(id="times-graph-traces"),
                 dcc.Loading([
                     dcc.Graph(
                         id="times-graph",
@@ -146,6 +148,12 @@ layout = dmc.Box([
                         # responsive=True,
                     ),
                 ]),
+                PointDetails(
+                    context="times",
+                    graph="times-graph",
+                    action=FETCH_FILES,
+                    fetch_kwargs=dict(valid_only=False),
+                ),
             ],
         ),
         FileSelectionSidebar(
@@ -153,6 +161,8 @@ layout = dmc.Box([
             graph="times-graph",
             sibling="times-graph-container",
             span=5,
+            action=FETCH_FILES,
+            fetch_kwargs=dict(valid_only=False),
         ),
     ]),
     dmc.Space(h="sm"),
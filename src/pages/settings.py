@@ -79,6 +79,7 @@ def layout():
                                         id="species-search",
                                         label="Search...",
                                         value="",
+                                        debounce=300,
                                         leftSection=DashIconify(icon="cil:search"),
                                         w=300,
                                     ),
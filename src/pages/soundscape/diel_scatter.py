@@ -5,7 +5,7 @@ import dash_mantine_components as dmc
 from dash import dcc
 from dash_iconify import DashIconify
 
-from api import FETCH_DATASET_DROPDOWN_OPTION_GROUPS
+from api import FETCH_ACOUSTIC_FEATURES, FETCH_DATASET_DROPDOWN_OPTION_GROUPS
 from components.dataset_options_select import DatasetOptionsSelect
 from components.data_download_widget import DataDownloadWidget
 from components.controls_panel import ControlsPanel
@@ -15,6 +15,7 @@ from components.site_level_filter import SiteLevelFilter
 from components.environmental_filter import EnvironmentalFilter
 from components.figure_download_widget import FigureDownloadWidget
 from components.file_selection_sidebar import FileSelectionSidebar, FileSelectionSidebarIcon
+from components.point_details import PointDetails
 from utils.content import get_content
 from utils.sketch import empty_figure
 
@@ -156,12 +157,18 @@ layout = dmc.Box([
             id="index-scatter-graph-container",
             span=12,
             children=[
+                dcc.Store(id="index-scatter-graph-traces"),
                 dcc.Loading([
                     dcc.Graph(
                         id="index-scatter-graph",
                         figure=empty_figure("Loading data...")
                     ),
                 ]),
+                PointDetails(
+                    context="index-scatter",
+                    graph="index-scatter-graph",
+                    action=FETCH_ACOUSTIC_FEATURES,
+                ),
             ],
         ),
         FileSelectionSidebar(
@@ -169,6 +176,7 @@ layout = dmc.Box([
             graph="index-scatter-graph",
             sibling="index-scatter-graph-container",
             span=5,
+            action=FETCH_ACOUSTIC_FEATURES,
         ),
     ]),
     dmc.Space(h="sm"),
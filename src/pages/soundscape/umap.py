@@ -5,7 +5,7 @@ import dash_bootstrap_components as dbc
 from dash import dcc
 from dash_iconify import DashIconify
 
-from api import FETCH_DATASET_DROPDOWN_OPTION_GROUPS
+from api import FETCH_ACOUSTIC_FEATURES_UMAP, FETCH_DATASET_DROPDOWN_OPTION_GROUPS
 from components.dataset_options_select import DatasetOptionsSelect
 from components.data_download_widget import DataDownloadWidget
 from components.controls_panel import ControlsPanel
@@ -14,6 +14,7 @@ from components.date_range_filter import DateRangeFilter
 from components.site_level_filter import SiteLevelFilter
 from components.environmental_filter import EnvironmentalFilter
 from components.file_selection_sidebar import FileSelectionSidebar, FileSelectionSidebarIcon
+from components.point_details import PointDetails
 from components.figure_download_widget import FigureDownloadWidget
 from utils.content import get_content
 from utils.sketch import empty_figure
@@ -145,12 +146,18 @@ layout = dmc.Box([
             id="umap-graph-container",
             span=12,
             children=[
+                dcc.Store(id="umap-graph-traces"),
                 dcc.Loading([
                     dcc.Graph(
                         id="umap-graph",
                         figure=empty_figure("Loading data..."),
                     ),
                 ]),
+                PointDetails(
+                    context="umap",
+                    graph="umap-graph",
+                    action=FETCH_ACOUSTIC_FEATURES_UMAP,
+                ),
             ],
         ),
         FileSelectionSidebar(
@@ -158,6 +165,7 @@ layout = dmc.Box([
             graph="umap-graph",
             sibling="umap-graph-container",
             span=5,
+            action=FETCH_ACOUSTIC_FEATURES_UMAP,
         ),
     ]),
     dmc.Space(h="sm"),
@@ -0,0 +1,160 @@
+import dash
+import os
+import queue
+import threading
+import time
+import zipfile
+
+from dash import exceptions
+from flask import Flask, Response, abort, request
+from loguru import logger
+from typing import Any, Dict, Iterator, List
+from werkzeug.utils import secure_filename
+
+from api import dispatch, FETCH_DATASETS, FETCH_DATASET_CONFIG
+from utils.selected_points import SelectedPoints
+from utils.webhost import AudioAPI
+
+ARCHIVE_ROUTE = "/audio-archive"
+
+ARCHIVE_MAX_FILES = 1000
+ARCHIVE_MAX_BYTES = 4 * 1024 ** 3
+
+# recordings opened ahead of the one being written
+ARCHIVE_READ_AHEAD = 2
+ARCHIVE_CHUNK_BYTES = 1024 * 1024
+
+def archive_url() -> str:
+    """
+    URL a selection's audio is downloaded from as a zip archive, for use as a form action.
+    """
+    return dash.get_relative_path(ARCHIVE_ROUTE)
+
+class _Chunks:
+    """
+    A write-only stream collecting what zipfile writes, to be drained as response chunks.
+    Without tell or seek, zipfile writes each entry's sizes after its data.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self.chunks = self.chunks, []
+        yield from chunks
+
+def _read_chunks(source: str | bytes) -> Iterator[bytes]:
+    if isinstance(source, bytes):
+        view = memoryview(source)
+        for start in range(0, len(view), ARCHIVE_CHUNK_BYTES):
+            yield view[start:start + ARCHIVE_CHUNK_BYTES]
+        return
+    with open(source, "rb") as f:
+        while chunk := f.read(ARCHIVE_CHUNK_BYTES):
+            yield chunk
+
+def stream_archive(
+    dataset_name: str,
+    config: Dict[str, Any],
+    file_paths: List[str],
+    max_bytes: int = ARCHIVE_MAX_BYTES,
+) -> Iterator[bytes]:
+    """
+    Stream a zip archive of the recordings at file_paths, chunk by chunk.
+    A background thread opens the next few recordings while the current one is written.
+    Recordings which can't be found, or would take the archive past max_bytes,
+    are listed in a MISSING.txt entry instead.
+    """
+    opened = queue.Queue(maxsize=ARCHIVE_READ_AHEAD)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # give up once the client has gone
+        while not stop.is_set():
+            try:
+                opened.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_ahead():
+        for file_path in file_paths:
+            try:
+                item = (file_path, AudioAPI.open_audio(file_path, dataset_name, config))
+            except Exception as e:
+                logger.warning(f"Unable to open {file_path} for archive: {e}")
+                item = (file_path, (None, None, file_path))
+            if not put(item):
+                return
+        put(None)
+
+    threading.Thread(target=read_ahead, daemon=True, name="audio-archive").start()
+
+    sink = _Chunks()
+    written = 0
+    missing = []
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            while (item := opened.get()) is not None:
+                file_path, (source, _, audio_path) = item
+                if source is None:
+                    missing.append(f"{file_path}: not found")
+                    continue
+                size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+                if written + size > max_bytes:
+                    missing.append(f"{file_path}: archive size limit reached")
+                    continue
+                info = zipfile.ZipInfo(
+                    audio_path.lstrip("/"),
+                    date_time=time.localtime(time.time() if isinstance(source, bytes) else os.path.getmtime(source))[:6],
+                )
+                info.file_size = size
+                with archive.open(info, mode="w") as entry:
+                    for chunk in _read_chunks(source):
+                        entry.write(chunk)
+                        yield from sink.drain()
+                written += size
+                yield from sink.drain()
+            if missing:
+                archive.writestr("MISSING.txt", "\n".join(missing) + "\n")
+        yield from sink.drain()
+        logger.debug(f"Archived {len(file_paths) - len(missing)} recordings ({written} bytes) from {dataset_name}")
+    finally:
+        stop.set()
+
+def register_routes(server: Flask) -> None:
+    @server.route(ARCHIVE_ROUTE, methods=["POST"])
+    def download_archive():
+        """
+        Stream the audio for a selection of files as a zip archive, the form fields
+        giving the dataset name and the id of the selection, held server-side.
+        """
+        dataset_name = request.form.get("dataset_name")
+        if dataset_name not in dispatch(FETCH_DATASETS):
+            abort(404)
+        try:
+            selection = SelectedPoints.load(dict(points_id=request.form.get("points_id")))
+        except exceptions.PreventUpdate:
+            abort(404)
+        file_paths = list(dict.fromkeys(selection["file_path"].tolist()))
+        if not file_paths or not all(isinstance(file_path, str) for file_path in file_paths):
+            abort(400)
+        if len(file_paths) > ARCHIVE_MAX_FILES:
+            abort(413, f"Archives are limited to {ARCHIVE_MAX_FILES} recordings")
+        config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+        return Response(
+            stream_archive(dataset_name, config, file_paths),
+            mimetype="application/zip",
+            headers={
+                "Content-Disposition": f'attachment; filename="{secure_filename(dataset_name) or "audio"}-audio.zip"',
+                # let proxies pass chunks straight through
+                "X-Accel-Buffering": "no",
+            },
+        )
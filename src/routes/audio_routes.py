@@ -0,0 +1,114 @@
+import dash
+import io
+import wave
+
+from flask import Flask, abort, request, send_file
+from loguru import logger
+from urllib.parse import quote, urlencode
+
+from api import dispatch, FETCH_DATASETS, FETCH_DATASET_CONFIG
+from utils import hashify
+from utils.webhost import AudioAPI
+from utils.webhost.clips import AudioClips
+from utils.webhost.previews import AudioPreviews
+
+AUDIO_ROUTE = "/audio"
+
+# audio files don't change once recorded
+AUDIO_MAX_AGE = 24 * 60 * 60
+
+MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+}
+
+def mime_type(filetype: str) -> str:
+    return MIME_TYPES.get(filetype.lower(), f"audio/{filetype.lower()}")
+
+def audio_url(
+    dataset_name: str,
+    file_path: str,
+    offset: float | None = None,
+    duration: float | None = None,
+    padding: float | None = None,
+    original: bool = False,
+) -> str:
+    """
+    URL the audio for a file is streamed from, for use as an html.Audio src.
+    Given an offset and duration, only that segment (plus any padding) is served.
+    A compact preview is served where available, unless the original is asked for.
+    """
+    url = f"{AUDIO_ROUTE}/{quote(dataset_name, safe='')}/{quote(file_path.lstrip('/'))}"
+    params = {}
+    if offset is not None and duration is not None:
+        params.update(offset=offset, duration=duration, **({"padding": padding} if padding else {}))
+    if original:
+        params.update(original=1)
+    if params:
+        url += "?" + urlencode(params)
+    return dash.get_relative_path(url)
+
+def register_routes(server: Flask) -> None:
+    @server.route(f"{AUDIO_ROUTE}/<dataset_name>/<path:file_path>")
+    def stream_audio(dataset_name: str, file_path: str):
+        """
+        Stream an audio file, honouring Range requests so browsers can seek
+        and start playing before the whole file has arrived.
+        With offset and duration query parameters, only that segment is cut and sent.
+        The recording's compact preview is sent where one is cached, unless the
+        original query parameter is given. Otherwise the original is sent straight
+        away while the preview is transcoded in the background.
+        """
+        if dataset_name not in dispatch(FETCH_DATASETS):
+            abort(404)
+        config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+        original = "original" in request.args
+        offset = request.args.get("offset", type=float)
+        duration = request.args.get("duration", type=float)
+        if offset is not None and duration is not None:
+            padding = request.args.get("padding", default=0.0, type=float)
+            try:
+                clip, filetype, audio_path = AudioClips.get_clip(file_path, dataset_name, config, offset, duration, padding, original)
+            except (wave.Error, ValueError, EOFError) as e:
+                # formats we can't cut are served whole
+                logger.warning(f"Unable to cut clip from {file_path}: {e}")
+            else:
+                if clip is None:
+                    abort(404)
+                return send_file(
+                    io.BytesIO(clip),
+                    mimetype=mime_type(filetype),
+                    conditional=True,
+                    etag=hashify(f"{dataset_name}/{audio_path}/{offset}/{duration}/{padding}/{filetype}"),
+                    max_age=AUDIO_MAX_AGE,
+                )
+        if not original:
+            preview_path, audio_path = AudioPreviews.cached_preview(file_path, dataset_name, config)
+            if preview_path is not None:
+                logger.debug(f"Streaming preview of {audio_path} from {dataset_name}")
+                return send_file(
+                    preview_path,
+                    mimetype=mime_type("mp3"),
+                    conditional=True,
+                    etag=True,
+                    max_age=AUDIO_MAX_AGE,
+                )
+        source, filetype, audio_path = AudioAPI.open_audio(file_path, dataset_name, config)
+        if source is None:
+            abort(404)
+        logger.debug(f"Streaming {audio_path} from {dataset_name}")
+        if isinstance(source, bytes):
+            return send_file(
+                io.BytesIO(source),
+                mimetype=mime_type(filetype),
+                conditional=True,
+                etag=hashify(f"{dataset_name}/{audio_path}/{len(source)}"),
+                max_age=AUDIO_MAX_AGE,
+            )
+        return send_file(
+            source,
+            mimetype=mime_type(filetype),
+            conditional=True,
+            etag=True,
+            max_age=AUDIO_MAX_AGE,
+        )
@@ -0,0 +1,56 @@
+import dash
+import subprocess
+import wave
+
+from flask import Flask, abort, request, send_file
+from loguru import logger
+from urllib.parse import quote, urlencode
+
+from api import dispatch, FETCH_DATASETS, FETCH_DATASET_CONFIG
+from utils.webhost.spectrograms import Spectrograms
+
+SPECTROGRAM_ROUTE = "/spectrogram"
+
+# the URL names every rendering parameter, so an image never changes
+SPECTROGRAM_MAX_AGE = 365 * 24 * 60 * 60
+
+def spectrogram_url(
+    dataset_name: str,
+    file_path: str,
+    offset: float | None = None,
+    duration: float | None = None,
+) -> str:
+    """
+    URL of the spectrogram image for a file, or for the segment
+    starting offset seconds in, for use as an html.Img src.
+    """
+    url = f"{SPECTROGRAM_ROUTE}/{quote(dataset_name, safe='')}/{quote(file_path.lstrip('/'))}"
+    if offset is not None and duration is not None:
+        url += "?" + urlencode(dict(offset=offset, duration=duration))
+    return dash.get_relative_path(url)
+
+def register_routes(server: Flask) -> None:
+    @server.route(f"{SPECTROGRAM_ROUTE}/<dataset_name>/<path:file_path>")
+    def serve_spectrogram(dataset_name: str, file_path: str):
+        """
+        Serve the spectrogram of a file, rendering it on first request.
+        """
+        if dataset_name not in dispatch(FETCH_DATASETS):
+            abort(404)
+        config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+        offset = request.args.get("offset", type=float)
+        duration = request.args.get("duration", type=float)
+        try:
+            path = Spectrograms.get_spectrogram(file_path, dataset_name, config, offset, duration)
+        except (wave.Error, ValueError, EOFError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Unable to render spectrogram of {file_path}: {e}")
+            abort(415)
+        if path is None:
+            abort(404)
+        return send_file(
+            path,
+            mimetype="image/png",
+            conditional=True,
+            etag=True,
+            max_age=SPECTROGRAM_MAX_AGE,
+        )
@@ -0,0 +1,74 @@
+import argparse
+import datetime as dt
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+from typing import Any
+
+from api import dispatch, FETCH_FILES, FETCH_DATASET_CONFIG
+from utils.webhost.previews import AudioPreviews, PREVIEW_WORKERS
+
+def render_previews(
+    dataset_name: str,
+    workers: int = PREVIEW_WORKERS,
+    **kwargs: Any,
+) -> None:
+    if not AudioPreviews.enabled():
+        logger.error("Previews need ffmpeg to be installed")
+        return
+    config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+    file_paths = dispatch(FETCH_FILES, dataset_name=dataset_name, valid_only=False)["file_path"].tolist()
+    logger.info(f"Transcoding {len(file_paths)} previews for {dataset_name}")
+    failed = 0
+    # each thread waits on its own ffmpeg process
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(AudioPreviews.get_preview, file_path, dataset_name, config): file_path
+            for file_path in file_paths
+        }
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                if future.result()[0] is None:
+                    failed += 1
+            except Exception as e:
+                logger.warning(f"Failed to transcode {futures[future]}: {e}")
+                failed += 1
+            if i % 100 == 0:
+                logger.info(f"Transcoded {i} / {len(file_paths)}")
+    logger.info(f"Transcoded {len(file_paths) - failed} previews, {failed} failed")
+
+def main(
+    dataset_name: str,
+    workers: int,
+) -> None:
+    start_time = time.time()
+
+    render_previews(dataset_name=dataset_name, workers=workers)
+
+    logger.info(f"Task complete")
+    logger.info(f"Time taken: {str(dt.timedelta(seconds=time.time() - start_time))}")
+
+def get_base_parser():
+    parser = argparse.ArgumentParser(
+        description="Transcode compact preview renditions of a dataset's recordings ahead of time",
+        add_help=False,
+    )
+    parser.add_argument(
+        "--dataset-name",
+        required=True,
+        type=str,
+        help="Name of the dataset, as listed in the dashboard."
+    )
+    parser.add_argument(
+        "--workers",
+        default=PREVIEW_WORKERS,
+        type=int,
+        help="Number of recordings transcoded at once."
+    )
+    return parser
+
+if __name__ == '__main__':
+    parser = get_base_parser()
+    args = parser.parse_args()
+    main(**vars(args))
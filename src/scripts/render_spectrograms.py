@@ -0,0 +1,96 @@
+import argparse
+import datetime as dt
+import multiprocessing
+import numpy as np
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from loguru import logger
+from typing import Any, List, Tuple
+
+from api import dispatch, FETCH_FILES, FETCH_DATASET_CONFIG
+from utils.webhost.spectrograms import Spectrograms, SPECTROGRAM_WORKERS
+
+def spectrogram_jobs(
+    dataset_name: str,
+    segments: bool = False,
+) -> List[Tuple[str, float | None, float | None]]:
+    files = dispatch(FETCH_FILES, dataset_name=dataset_name, valid_only=False)
+    if not segments:
+        return [(file_path, None, None) for file_path in files["file_path"]]
+    config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+    segment_duration = float(config.get("SoundADE", {}).get("segment_duration"))
+    return [
+        (file_path, float(offset), segment_duration)
+        for file_path, duration in zip(files["file_path"], files["duration"])
+        for offset in np.arange(0, duration, segment_duration)
+    ]
+
+def render_spectrograms(
+    dataset_name: str,
+    segments: bool = False,
+    workers: int = SPECTROGRAM_WORKERS,
+    **kwargs: Any,
+) -> None:
+    config = dispatch(FETCH_DATASET_CONFIG, dataset_name=dataset_name)
+    jobs = spectrogram_jobs(dataset_name, segments)
+    Spectrograms.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    logger.info(f"Rendering {len(jobs)} spectrograms for {dataset_name}")
+    failed = 0
+    # threads wait on audio and the cache while the process pool renders
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(Spectrograms.get_spectrogram, file_path, dataset_name, config, offset, duration): file_path
+            for file_path, offset, duration in jobs
+        }
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                if future.result() is None:
+                    failed += 1
+            except Exception as e:
+                logger.warning(f"Failed to render {futures[future]}: {e}")
+                failed += 1
+            if i % 100 == 0:
+                logger.info(f"Rendered {i} / {len(jobs)}")
+    logger.info(f"Rendered {len(jobs) - failed} spectrograms, {failed} failed")
+
+def main(
+    dataset_name: str,
+    segments: bool,
+    workers: int,
+) -> None:
+    start_time = time.time()
+
+    render_spectrograms(dataset_name=dataset_name, segments=segments, workers=workers)
+
+    logger.info(f"Task complete")
+    logger.info(f"Time taken: {str(dt.timedelta(seconds=time.time() - start_time))}")
+
+def get_base_parser():
+    parser = argparse.ArgumentParser(
+        description="Render spectrogram thumbnails for a dataset's recordings ahead of time",
+        add_help=False,
+    )
+    parser.add_argument(
+        "--dataset-name",
+        required=True,
+        type=str,
+        help="Name of the dataset, as listed in the dashboard."
+    )
+    parser.add_argument(
+        "--segments",
+        action="store_true",
+        help="Render each segment of each recording rather than whole recordings."
+    )
+    parser.add_argument(
+        "--workers",
+        default=SPECTROGRAM_WORKERS,
+        type=int,
+        help="Number of spectrograms rendered at once."
+    )
+    return parser
+
+if __name__ == '__main__':
+    parser = get_base_parser()
+    args = parser.parse_args()
+    main(**vars(args))
@@ -0,0 +1,9 @@
+import sys
+
+from pathlib import Path
+
+# modules import each other from src, as when the app is run from there
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# the load test is a locust file with no pytest tests, and importing it loads every dataset under root_dir
+collect_ignore = ["test_load.py"]
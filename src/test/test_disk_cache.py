@@ -0,0 +1,48 @@
+import os
+
+from flask import Flask, send_file
+
+from utils.webhost.disk_cache import DiskCache
+
+def test_hits_keep_http_validators(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_bytes=1 << 20)
+    server = Flask(__name__)
+
+    @server.route("/file")
+    def serve():
+        path = cache.fetch("file", ".bin", lambda: b"audio")
+        return send_file(path, mimetype="application/octet-stream", conditional=True, etag=True)
+
+    client = server.test_client()
+    first = client.get("/file")
+    assert first.status_code == 200
+    second = client.get("/file", headers={
+        "If-None-Match": first.headers["ETag"],
+        "If-Modified-Since": first.headers["Last-Modified"],
+    })
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+def test_evicts_least_recently_read_first(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_bytes=25)
+    old = cache.fetch("old", "", lambda: b"x" * 10)
+    new = cache.fetch("new", "", lambda: b"x" * 10)
+    os.utime(old, (1, 1))
+    os.utime(new, (2, 2))
+    assert cache.get("old") == old
+    cache.fetch("newest", "", lambda: b"x" * 10)
+    assert cache.get("old") == old
+    assert cache.get("new") is None
+
+def test_build_makes_files_outside_the_lock(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_bytes=1 << 20)
+    def make(output):
+        # no lock is held meanwhile, so even a key on the same stripe can be fetched
+        assert cache.fetch("other", "", lambda: b"other") is not None
+        with open(output, "wb") as f:
+            f.write(b"preview")
+        return True
+    path = cache.build("preview", ".mp3", make)
+    assert path.read_bytes() == b"preview"
+    assert cache.build("missing", ".mp3", lambda output: False) is None
+    assert not list((tmp_path / "cache").glob(".*.tmp"))
@@ -0,0 +1,78 @@
+import functools
+import json
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+import pytest
+
+from utils.figures.fast import fast_figure
+
+N_ROWS = 3000
+
+@pytest.fixture
+def data() -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "x": rng.normal(size=N_ROWS),
+        "y": rng.normal(size=N_ROWS),
+        "timestamp": pd.Timestamp("2024-05-01") + pd.to_timedelta(rng.integers(0, 86400, N_ROWS), unit="s"),
+        "site": rng.choice(["north", "south", "east"], N_ROWS),
+        "hour_continuous": rng.integers(0, 4, N_ROWS).astype(float),
+        "week_of_year_continuous": rng.integers(18, 20, N_ROWS) / 53,
+        "value": rng.uniform(size=N_ROWS),
+        "file_id": [f"file-{i}" for i in range(N_ROWS)],
+        "file_path": [f"/audio/{i}.wav" for i in range(N_ROWS)],
+    })
+
+def drop_empty(value):
+    # empty objects, such as an annotation's default font, render the same as absent ones
+    if isinstance(value, dict):
+        return {key: drop_empty(item) for key, item in value.items() if item != {}}
+    if isinstance(value, list):
+        return [drop_empty(item) for item in value]
+    return value
+
+def snapshot(fig) -> dict:
+    """The figure as the browser receives it"""
+    return drop_empty(json.loads(pio.to_json(fig, validate=False)))
+
+@pytest.mark.parametrize("kwargs", [
+    dict(x="x", y="y"),
+    dict(x="x", y="y", color="site"),
+    dict(x="x", y="y", color="value"),
+    dict(x="timestamp", y="value", color="site"),
+    dict(x="x", y="y", color="site", symbol="hour_continuous"),
+    dict(x="x", y="y", color="site", facet_col="hour_continuous"),
+    dict(x="x", y="y", color="value", facet_row="week_of_year_continuous", facet_col="site"),
+    dict(x="x", y="y", color="site", hover_name="file_id", hover_data=["file_path", "site"]),
+    dict(x="x", y="y", color="site", custom_data=["file_id"], hover_data=["file_path"]),
+], ids=lambda kwargs: "-".join(f"{arg}={value}" for arg, value in kwargs.items()))
+def test_fast_figure_matches_plotly_express(data, kwargs):
+    expected = snapshot(px.scatter(data_frame=data, **kwargs))
+    actual = snapshot(fast_figure(px.scatter, data, threshold=0, **kwargs))
+    assert actual == expected
+
+def test_fast_figure_numeric_facets_split_traces(data):
+    fig = snapshot(fast_figure(px.scatter, data, threshold=0, x="x", y="y", color="site", facet_col="hour_continuous"))
+    assert len(fig["data"]) == data["site"].nunique() * data["hour_continuous"].nunique()
+    assert sum(len(trace["x"]) for trace in fig["data"]) == len(data)
+
+def test_fast_figure_below_threshold_is_plotly_express(data):
+    kwargs = dict(x="x", y="y", color="site")
+    assert snapshot(fast_figure(px.scatter, data, **kwargs)) == snapshot(px.scatter(data_frame=data, **kwargs))
+
+@pytest.mark.parametrize("px_func", [
+    px.box,
+    functools.partial(px.violin, box=True),
+], ids=["box", "violin"])
+@pytest.mark.parametrize("kwargs", [
+    dict(x="hour_continuous", y="value", points=False),
+    dict(x="hour_continuous", y="value", color="site", points="outliers"),
+    dict(x="hour_continuous", y="value", color="site", facet_col="week_of_year_continuous", points="outliers"),
+    dict(x="hour_continuous", y="value", color="site", points="outliers", hover_name="file_id", hover_data=["file_path", "site"]),
+], ids=lambda kwargs: "-".join(f"{arg}={value}" for arg, value in kwargs.items()))
+def test_fast_distributions_match_plotly_express(data, px_func, kwargs):
+    expected = snapshot(px_func(data_frame=data, **kwargs))
+    actual = snapshot(fast_figure(px_func, data, threshold=0, **kwargs))
+    assert actual == expected
@@ -0,0 +1,33 @@
+import os
+import time
+
+from utils.file_store import FileStore, write_atomic
+
+def test_prune_removes_only_unused_files_and_directories(tmp_path):
+    store = FileStore(max_age=60, touch_interval=0)
+    old, recent, touched = tmp_path / "old.bin", tmp_path / "recent.bin", tmp_path / "touched.bin"
+    old_session = tmp_path / "session"
+    old_session.mkdir()
+    for path in (old, recent, touched):
+        write_atomic(path, lambda f: f.write(b"bits"))
+    an_hour_ago = time.time() - 60 * 60
+    for path in (old, touched, old_session):
+        os.utime(path, (an_hour_ago, an_hour_ago))
+    store.touch(touched)
+    store.prune(tmp_path, "*")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["recent.bin", "touched.bin"]
+
+def test_touch_and_prune_are_throttled(tmp_path):
+    store = FileStore(max_age=60, touch_interval=60 * 60)
+    path = tmp_path / "selection.bin"
+    write_atomic(path, lambda f: f.write(b"bits"))
+    store.touch(path)
+    os.utime(path, (0, 0))
+    store.touch(path)
+    assert path.stat().st_mtime == 0
+    store.prune(tmp_path, "*")
+    assert not path.exists()
+    write_atomic(path, lambda f: f.write(b"bits"))
+    os.utime(path, (0, 0))
+    store.prune(tmp_path, "*")
+    assert path.exists()
@@ -0,0 +1,23 @@
+from utils.filter import canonical_range, compact_site_selection, set_site_selection, site_selection_empty, RANGE_STEPS
+
+def test_canonical_range_spanning_bounds_is_empty():
+    assert canonical_range([0.0, 1.0], [0.0, 1.0]) == tuple()
+    assert canonical_range([2.0, 2.0], [2.0, 2.0]) == tuple()
+
+def test_canonical_range_ignores_slider_float_noise():
+    assert canonical_range([0.1 + 0.2, 0.5], [0.0, 1.0]) == canonical_range([0.3, 0.5], [0.0, 1.0])
+
+def test_canonical_range_keeps_steps_of_tiny_ranges_apart():
+    bounds = [0.0, 1e-9]
+    step = bounds[1] / (RANGE_STEPS - 1)
+    keys = {canonical_range([i * step, 500 * step], bounds) for i in range(1, 10)}
+    assert len(keys) == 9
+
+def test_site_selection_empty_only_without_selected_sites():
+    tree = ["/d", "/d/a", "/d/a/1", "/d/a/2", "/d/b", "/d/b/1"]
+    everything = compact_site_selection(tree, tree)
+    assert not site_selection_empty(tree, everything)
+    assert site_selection_empty(tree, set_site_selection(everything, "/d", False))
+    no_a = set_site_selection(everything, "/d/a", False)
+    assert not site_selection_empty(tree, no_a)
+    assert site_selection_empty(tree, set_site_selection(no_a, "/d/b/1", False))
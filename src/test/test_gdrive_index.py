@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from utils.webhost.gdrive_index import FOLDER_MIME_TYPE, GDriveIndex
+
+DRIVE = {
+    "root": {"data": "data-id"},
+    "data-id": {"site-a": "site-a-id", "site-b": "site-b-id"},
+    "site-a-id": {"a.wav": "a-wav-id", "b.wav": "b-wav-id"},
+    "site-b-id": {"c.wav": "c-wav-id"},
+}
+
+class FakeListFile:
+    def __init__(self, drive, params):
+        self.drive = drive
+        self.params = params
+
+    def GetList(self):
+        self.drive.listed.append(self.params["q"])
+        folder_id = self.params["q"].split("'")[1]
+        if folder_id in self.drive.gates:
+            self.drive.gates[folder_id].wait(timeout=5)
+        return [
+            dict(id=_id, title=title, mimeType=FOLDER_MIME_TYPE if _id in self.drive.folders else "audio/wav")
+            for title, _id in self.drive.folders.get(folder_id, {}).items()
+        ]
+
+class FakeDrive:
+    """Serves pydrive2's ListFile(params).GetList() from a dict of folder listings"""
+    def __init__(self, folders):
+        self.folders = {folder_id: dict(children) for folder_id, children in folders.items()}
+        self.listed = []
+        # folders whose listing waits until their event is set
+        self.gates = {}
+
+    def ListFile(self, params):
+        return FakeListFile(self, params)
+
+@pytest.fixture
+def drive() -> FakeDrive:
+    return FakeDrive(DRIVE)
+
+def test_resolve_lists_each_folder_once(drive, tmp_path):
+    index = GDriveIndex(drive, tmp_path / "index")
+    assert index.resolve("data/site-a/a.wav") == "a-wav-id"
+    assert index.resolve("data/site-a/b.wav") == "b-wav-id"
+    assert index.resolve("gdrive:/data/site-b/") == "site-b-id"
+    assert len(drive.listed) == 3
+
+def test_missing_items_are_cached_misses(drive, tmp_path):
+    index = GDriveIndex(drive, tmp_path / "index")
+    assert index.resolve("data/site-a/missing.wav") is None
+    assert index.resolve("data/site-a/missing.wav") is None
+    assert index.resolve("data/missing/a.wav") is None
+    assert len(drive.listed) == 3
+
+def test_listings_are_shared_through_the_index_directory(drive, tmp_path):
+    GDriveIndex(drive, tmp_path / "index").resolve("data/site-a/a.wav")
+    listed = len(drive.listed)
+    assert GDriveIndex(drive, tmp_path / "index").resolve("data/site-a/b.wav") == "b-wav-id"
+    assert len(drive.listed) == listed
+    assert sorted(path.name for path in (tmp_path / "index").iterdir()) == ["data-id.json", "root.json", "site-a-id.json"]
+
+def test_stale_listings_are_refreshed(drive, tmp_path):
+    index = GDriveIndex(drive, tmp_path / "index", refresh_interval=-1)
+    assert index.resolve("data/site-a/new.wav") is None
+    drive.folders["site-a-id"]["new.wav"] = "new-wav-id"
+    assert index.resolve("data/site-a/new.wav") == "new-wav-id"
+
+def test_invalidate_relists_the_parent_folder(drive, tmp_path):
+    index = GDriveIndex(drive, tmp_path / "index")
+    assert index.resolve("data/site-a/new.wav") is None
+    drive.folders["site-a-id"]["new.wav"] = "new-wav-id"
+    index.invalidate("data/site-a/new.wav")
+    assert index.resolve("data/site-a/new.wav") == "new-wav-id"
+    assert drive.listed.count("'site-a-id' in parents and trashed=false") == 2
+    assert drive.listed.count("'root' in parents and trashed=false") == 1
+
+def test_concurrent_workers_save_without_clashing(drive, tmp_path):
+    errors = []
+    def resolve():
+        try:
+            index = GDriveIndex(drive, tmp_path / "index", refresh_interval=-1)
+            for _ in range(20):
+                assert index.resolve("data/site-a/a.wav") == "a-wav-id"
+        except Exception as e:
+            errors.append(e)
+    workers = [threading.Thread(target=resolve) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert errors == []
+    assert not list((tmp_path / "index").glob(".*.tmp"))
+
+def test_slow_listing_only_holds_up_its_folder(drive, tmp_path):
+    index = GDriveIndex(drive, tmp_path / "index")
+    assert index.resolve("data/site-b/c.wav") == "c-wav-id"
+    drive.gates["site-a-id"] = threading.Event()
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(index.resolve("data/site-a/a.wav"))) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    assert index.resolve("data/site-b/c.wav") == "c-wav-id"
+    assert results == []
+    drive.gates["site-a-id"].set()
+    for worker in workers:
+        worker.join()
+    assert results == ["a-wav-id", "a-wav-id"]
+    assert drive.listed.count("'site-a-id' in parents and trashed=false") == 1
+
+def test_unwritable_index_still_resolves(drive, tmp_path):
+    (tmp_path / "index").write_text("not a directory")
+    index = GDriveIndex(drive, tmp_path / "index")
+    assert index.resolve("data/site-b/c.wav") == "c-wav-id"
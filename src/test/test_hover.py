@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from utils.figures.encoding import encode_figure, from_typed_array
+from utils.hover import hover_params, point_rows
+
+def test_lean_points_carry_their_row_as_a_typed_array():
+    data = pd.DataFrame({
+        "x": np.arange(6.0),
+        "y": np.arange(6.0),
+        "site": ["a", "b"] * 3,
+        "file_id": [f"file-{i}" for i in range(6)],
+    }, index=np.arange(6) * 10)
+    fig = encode_figure(px.scatter(data, x="x", y="y", color="site", **hover_params(data, lean=True)))
+    rows = []
+    for trace in fig["data"]:
+        assert "bdata" in trace["customdata"]
+        customdata = from_typed_array(trace["customdata"]).reshape(-1, 1)
+        rows += point_rows([dict(customdata=dict(enumerate(row.tolist()))) for row in customdata])
+    assert sorted(rows) == list(range(6))
+    assert data.take(rows[:2])["site"].tolist() == ["a", "a"]
@@ -0,0 +1,37 @@
+import os
+import pandas as pd
+import time
+
+from utils.webhost.localhost import Localhost
+
+def wait_until_ready(catalog):
+    for _ in range(100):
+        if catalog.ready and not catalog.refreshing:
+            return
+        time.sleep(0.01)
+    raise AssertionError("catalog never scanned")
+
+def test_catalog_is_built_in_the_background_and_persisted(tmp_path):
+    audio = tmp_path / "audio"
+    (audio / "site-a").mkdir(parents=True)
+    (audio / "site-a" / "a.wav").write_bytes(b"RIFF")
+    catalog_path = str(tmp_path / "audio-catalog.json")
+    host = Localhost(str(audio), ("mp3", "wav"), catalog_path)
+    # answered from disk while the first scan runs
+    assert host.find_audio("site-a/a.mp3") == "site-a/a.wav"
+    wait_until_ready(host.catalog)
+    assert host.find_audio("site-a/a.mp3") == "site-a/a.wav"
+    assert host.available(pd.Series(["site-a/a.wav", "site-a/b.wav"])).tolist() == [True, False]
+    assert os.path.isfile(catalog_path)
+    # another worker serves the persisted catalog straight away
+    assert Localhost(str(audio), ("mp3", "wav"), catalog_path).catalog.ready
+
+def test_edited_files_stay_catalogued(tmp_path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    (audio / "a.wav").write_bytes(b"RIFF")
+    host = Localhost(str(audio), ("wav",), str(tmp_path / "audio-catalog.json"))
+    wait_until_ready(host.catalog)
+    (audio / "a.wav").write_bytes(b"RIFF" * 100)
+    host.catalog.refresh()
+    assert host.get_audio_file("a.wav") == str(audio / "a.wav")
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from types import SimpleNamespace
+
+from utils.selections import missing_selections, register_selection, selected_files
+
+def test_pruned_selections_are_reported_not_taken_as_file_ids(tmp_path):
+    pd.DataFrame({"file_id": ["a", "b", "c"]}).to_parquet(tmp_path / "files_table.parquet")
+    dataset = SimpleNamespace(path=tmp_path)
+    kept = register_selection(dataset, ["a"])
+    pruned = register_selection(dataset, ["b"])
+    for path in (tmp_path / "selections").glob(f"*/{pruned}.bin"):
+        path.unlink()
+    assert missing_selections(dataset, (kept, pruned, "c")) == (pruned,)
+    assert selected_files(dataset, (kept, pruned, "c")).tolist() == [True, False, True]
+
+def test_inverted_selections_select_every_other_file(tmp_path):
+    pd.DataFrame({"file_id": ["a", "b", "c"]}).to_parquet(tmp_path / "files_table.parquet")
+    dataset = SimpleNamespace(path=tmp_path)
+    others = register_selection(dataset, ["b"], invert=True)
+    assert selected_files(dataset, (others,)).tolist() == [True, False, True]
@@ -0,0 +1,226 @@
+import contextlib
+import io
+import mmap
+import numpy as np
+import os
+import shutil
+import subprocess
+import threading
+import wave
+
+from typing import BinaryIO, Iterator, Tuple
+
+# used to decode anything other than WAV, where installed
+FFMPEG = shutil.which("ffmpeg")
+
+# frames of WAV converted to float samples at a time while decoding
+WAV_CHUNK_FRAMES = 1 << 18
+
+# MPEG audio header lookup tables, indexed by version bits then layer bits
+MPEG_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+MPEG_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+MPEG_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+def cut_wav(
+    source: str | BinaryIO,
+    start: float,
+    end: float,
+) -> bytes:
+    """
+    Cut the frames between start and end seconds from a PCM WAV file,
+    reading only that span of the source.
+    """
+    with wave.open(source, "rb") as reader:
+        params = reader.getparams()
+        first = min(params.nframes, max(0, round(start * params.framerate)))
+        last = min(params.nframes, max(first, round(end * params.framerate)))
+        reader.setpos(first)
+        frames = reader.readframes(last - first)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setparams(params)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+def _id3_size(data: bytes | mmap.mmap) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def mpeg_frames(data: bytes | mmap.mmap) -> Iterator[Tuple[int, int, float]]:
+    """
+    Walk the MPEG audio frames in data, yielding the position, length
+    and duration in seconds of each.
+    """
+    position = _id3_size(data)
+    while position + 4 <= len(data):
+        header = int.from_bytes(data[position:position + 4], "big")
+        version = MPEG_VERSIONS.get((header >> 19) & 0b11)
+        layer = MPEG_LAYERS.get((header >> 17) & 0b11)
+        bitrate_index = (header >> 12) & 0xF
+        sample_rate_index = (header >> 10) & 0b11
+        if (
+            header >> 21 != 0x7FF or version is None or layer is None
+            or bitrate_index in (0, 0xF) or sample_rate_index == 0b11
+        ):
+            # lost sync, e.g. a trailing tag
+            return
+        bitrate = MPEG_BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+        sample_rate = MPEG_SAMPLE_RATES[version][sample_rate_index]
+        padding = (header >> 9) & 1
+        if layer == 1:
+            samples = 384
+            length = (12 * bitrate // sample_rate + padding) * 4
+        else:
+            samples = 1152 if layer == 2 or version == 1 else 576
+            length = samples // 8 * bitrate // sample_rate + padding
+        yield position, length, samples / sample_rate
+        position += length
+
+def _is_info_frame(frame: bytes) -> bool:
+    # VBR headers describe the whole file, so would mislabel a clip's duration
+    return b"Xing" in frame[:64] or b"Info" in frame[:64] or b"VBRI" in frame[:64]
+
+def cut_mp3(
+    source: str | bytes,
+    start: float,
+    end: float,
+) -> bytes:
+    """
+    Cut the whole MPEG frames spanning start to end seconds from an MP3,
+    without decoding. Frames stand alone, so the result plays as is.
+    """
+    def cut(data: bytes | mmap.mmap) -> bytes:
+        clip = bytearray()
+        elapsed = 0.0
+        for i, (position, length, duration) in enumerate(mpeg_frames(data)):
+            if elapsed >= end:
+                break
+            frame = data[position:position + length]
+            if elapsed + duration > start and not (i == 0 and _is_info_frame(frame)):
+                clip += frame
+            elapsed += duration
+        return bytes(clip)
+
+    if isinstance(source, bytes):
+        return cut(source)
+    if os.path.getsize(source) == 0:
+        return b""
+    with open(source, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return cut(data)
+
+def _mono_samples(frames: bytes, sampwidth: int, nchannels: int) -> np.ndarray:
+    if sampwidth == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sampwidth == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        # sign extend the little endian 24 bit samples
+        samples = (((raw[:, 0] | raw[:, 1] << 8 | raw[:, 2] << 16) << 8) >> 8).astype(np.float32) / 2 ** 23
+    else:
+        dtype = {2: np.int16, 4: np.int32}[sampwidth]
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+    return samples.reshape(-1, nchannels).mean(axis=1, dtype=np.float32)
+
+def read_wav(
+    source: str | BinaryIO,
+    chunk_frames: int = WAV_CHUNK_FRAMES,
+) -> Tuple[np.ndarray, int]:
+    """
+    Read a PCM WAV file as mono float samples in [-1, 1], along with its sample rate.
+    Frames are converted a chunk at a time, so only the mono samples are held in full.
+    """
+    with wave.open(source, "rb") as reader:
+        params = reader.getparams()
+        # a WAV streamed through a pipe can't declare its length up front
+        if isinstance(source, str) or source.seekable():
+            samples = np.empty(params.nframes, dtype=np.float32)
+            filled = 0
+            while filled < params.nframes and (frames := reader.readframes(min(chunk_frames, params.nframes - filled))):
+                chunk = _mono_samples(frames, params.sampwidth, params.nchannels)
+                samples[filled:filled + len(chunk)] = chunk
+                filled += len(chunk)
+            samples = samples[:filled]
+        else:
+            chunks = []
+            while frames := reader.readframes(chunk_frames):
+                chunks.append(_mono_samples(frames, params.sampwidth, params.nchannels))
+            samples = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32)
+    return samples, params.framerate
+
+def _feed(pipe: BinaryIO, data: bytes) -> None:
+    try:
+        pipe.write(data)
+    except BrokenPipeError:
+        # ffmpeg stopped reading, its exit status tells why
+        pass
+    finally:
+        with contextlib.suppress(BrokenPipeError):
+            pipe.close()
+
+def decode_audio(
+    source: str | bytes,
+    filetype: str,
+) -> Tuple[np.ndarray, int]:
+    """
+    Decode an audio file to mono float samples and its sample rate.
+    WAV is read directly, other formats need ffmpeg, whose output is
+    read as it is decoded rather than buffered whole.
+    """
+    if filetype.lower() == "wav":
+        return read_wav(io.BytesIO(source) if isinstance(source, bytes) else source)
+    if FFMPEG is None:
+        raise ValueError(f"Cannot decode '{filetype}' files without ffmpeg")
+    args = [FFMPEG, "-v", "error", "-i", "pipe:0" if isinstance(source, bytes) else source, "-ac", "1", "-f", "wav", "pipe:1"]
+    with subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE if isinstance(source, bytes) else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as process:
+        if isinstance(source, bytes):
+            threading.Thread(target=_feed, args=(process.stdin, source), daemon=True).start()
+        try:
+            samples, sample_rate = read_wav(process.stdout)
+        except (EOFError, wave.Error):
+            samples, sample_rate = None, None
+        process.stdout.close()
+        stderr = process.stderr.read()
+        if process.wait() != 0 or samples is None:
+            raise subprocess.CalledProcessError(process.returncode, args, stderr=stderr)
+    return samples, sample_rate
+
+def transcode_preview(
+    source: str | bytes,
+    bitrate: str = "48k",
+    output: str | None = None,
+) -> bytes:
+    """
+    Transcode an audio file to a compact mono MP3 for audition, with ffmpeg.
+    MP3 keeps previews playable everywhere and cuttable into clips without decoding.
+    The MP3 is written to output where given, otherwise returned.
+    """
+    if FFMPEG is None:
+        raise ValueError("Cannot transcode audio without ffmpeg")
+    result = subprocess.run(
+        [FFMPEG, "-v", "error", "-i", "pipe:0" if isinstance(source, bytes) else source, "-vn", "-ac", "1", "-c:a", "libmp3lame", "-b:a", bitrate, "-f", "mp3", "-y", output or "pipe:1"],
+        input=source if isinstance(source, bytes) else None,
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
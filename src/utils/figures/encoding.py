@@ -0,0 +1,141 @@
+import base64
+import json
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from loguru import logger
+from plotly.utils import PlotlyJSONEncoder
+from typing import Any, Dict, List
+
+Figure = Dict[str, Any]
+
+# trace attributes holding per-point numeric arrays
+NUMERIC_ARRAY_KEYS = ("x", "y", "z", "r", "theta", "customdata")
+MARKER_ARRAY_KEYS = ("size", "color", "opacity")
+ERROR_BAR_KEYS = ("error_x", "error_y")
+
+# plotly.js typed array dtype codes
+DTYPE_CODES = {
+    "float64": "f8",
+    "float32": "f4",
+    "int32": "i4",
+    "uint32": "u4",
+    "int16": "i2",
+    "uint16": "u2",
+    "int8": "i1",
+    "uint8": "u1",
+}
+
+NUMERIC_INFERRED_TYPES = ("integer", "floating", "mixed-integer-float")
+
+def _smallest_int_dtype(array: np.ndarray) -> np.dtype:
+    lo, hi = (array.min(), array.max()) if array.size else (0, 0)
+    for dtype in ("uint8", "int8", "uint16", "int16", "uint32", "int32"):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype("float64")
+
+def to_typed_array(values: Any) -> Any:
+    """
+    Encode a numeric array as a plotly.js base64 typed array spec,
+    returning the input untouched where it cannot be represented.
+    """
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "iuf" or values.size == 0:
+        return values
+    # integral floats pack as tightly as integers
+    if values.dtype.kind == "f" and np.isfinite(values).all() and (values == np.trunc(values)).all():
+        values = values.astype(np.int64)
+    if values.dtype.kind in "iu":
+        values = values.astype(_smallest_int_dtype(values), copy=False)
+    elif values.dtype.name not in DTYPE_CODES:
+        values = values.astype(np.float64)
+    spec = {
+        "dtype": DTYPE_CODES[values.dtype.name],
+        "bdata": base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii"),
+    }
+    if values.ndim > 1:
+        spec["shape"] = ",".join(map(str, values.shape))
+    return spec
+
+def from_typed_array(values: Any) -> Any:
+    """
+    Decode a plotly.js typed array spec back to a numpy array,
+    returning the input untouched where it is not one.
+    """
+    if not isinstance(values, dict) or "bdata" not in values or "dtype" not in values:
+        return values
+    array = np.frombuffer(base64.b64decode(values["bdata"]), dtype=np.dtype(values["dtype"]))
+    if "shape" in values:
+        array = array.reshape([int(n) for n in str(values["shape"]).split(",")])
+    return array
+
+def _numeric_customdata(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Cast customdata holding only numbers, e.g. row positions alongside numeric hover
+    fields, from plotly express' object arrays to floats, so it can be typed.
+    Text customdata is sent as is: plotly.js hover templates can't index a lookup
+    table, so repeated strings can't be dictionary-encoded.
+    """
+    customdata = trace.get("customdata")
+    if not isinstance(customdata, np.ndarray) or customdata.dtype.kind != "O" or customdata.ndim != 2:
+        return trace
+    if all(pd.api.types.infer_dtype(customdata[:, i], skipna=True) in NUMERIC_INFERRED_TYPES for i in range(customdata.shape[1])):
+        trace["customdata"] = customdata.astype(np.float64)
+    return trace
+
+def _encode_trace(trace: Dict[str, Any]) -> Dict[str, Any]:
+    trace = _numeric_customdata(dict(trace))
+    for key in NUMERIC_ARRAY_KEYS:
+        if key in trace:
+            trace[key] = to_typed_array(trace[key])
+    if isinstance(trace.get("marker"), dict):
+        trace["marker"] = marker = dict(trace["marker"])
+        for key in MARKER_ARRAY_KEYS:
+            if key in marker:
+                marker[key] = to_typed_array(marker[key])
+    for key in ERROR_BAR_KEYS:
+        if isinstance(trace.get(key), dict) and "array" in trace[key]:
+            trace[key] = dict(trace[key], array=to_typed_array(trace[key]["array"]))
+    return trace
+
+def _decode_trace(trace: Dict[str, Any]) -> Dict[str, Any]:
+    trace = dict(trace)
+    for key in NUMERIC_ARRAY_KEYS:
+        if key in trace:
+            trace[key] = from_typed_array(trace[key])
+    if isinstance(trace.get("marker"), dict):
+        trace["marker"] = marker = dict(trace["marker"])
+        for key in MARKER_ARRAY_KEYS:
+            if key in marker:
+                marker[key] = from_typed_array(marker[key])
+    for key in ERROR_BAR_KEYS:
+        if isinstance(trace.get(key), dict) and "array" in trace[key]:
+            trace[key] = dict(trace[key], array=from_typed_array(trace[key]["array"]))
+    return trace
+
+def payload_size(fig: go.Figure | Figure) -> int:
+    return len(json.dumps(fig, cls=PlotlyJSONEncoder))
+
+def encode_figure(fig: go.Figure | Figure) -> Figure:
+    """
+    Convert a figure to a plain dict with numeric trace arrays encoded as
+    base64 typed arrays, which plotly.js decodes natively.
+    The original figure is left untouched.
+    """
+    original = fig.to_plotly_json() if isinstance(fig, go.Figure) else fig
+    encoded = dict(original, data=[_encode_trace(trace) for trace in original.get("data", [])])
+    logger.opt(lazy=True).debug(
+        "Figure payload {before} -> {after} bytes",
+        before=lambda: payload_size(original),
+        after=lambda: payload_size(encoded),
+    )
+    return encoded
+
+def decode_figure(fig: Figure) -> Figure:
+    """
+    Inverse of encode_figure, restoring typed arrays to numpy arrays so
+    the figure can be validated by plotly.py, e.g. for static image export.
+    """
+    return dict(fig, data=[_decode_trace(trace) for trace in fig.get("data", [])])
@@ -0,0 +1,165 @@
+import inspect
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from loguru import logger
+from typing import Any, Callable, Dict, List
+
+# below this many rows plotly express is fast enough as is
+FAST_FIGURE_THRESHOLD = 20_000
+
+# plotly express arguments always splitting the data into separate traces,
+# color only does where it isn't numeric and so isn't drawn as a continuous scale
+GROUP_ARGS = ("symbol", "facet_row", "facet_col", "line_dash", "pattern_shape")
+
+# plotly express arguments the fast path doesn't reproduce
+UNSUPPORTED_ARGS = ("animation_frame", "animation_group", "line_group", "size", "text", "trendline")
+
+# plotly express switches scatter traces to WebGL above this many rows
+WEBGL_THRESHOLD = 1000
+
+ROW_ID = "_fast_figure_row"
+
+class FastFigure(go.Figure):
+    """
+    A plotly express figure drawn from one row per trace, with the per-point arrays
+    for the full data held aside and only merged back in when serialised, so they
+    never pass through plotly's property validators.
+    """
+    def __init__(self, skeleton: go.Figure, point_arrays: List[Dict[str, Any]]):
+        super().__init__(skeleton)
+        self._grid_ref = skeleton._grid_ref
+        self._point_arrays = point_arrays
+
+    def to_dict(self) -> Dict[str, Any]:
+        fig = super().to_dict()
+        for trace, arrays in zip(fig["data"], self._point_arrays):
+            for path, values in arrays.items():
+                *parents, key = path.split(".")
+                node = trace
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                node[key] = values
+        return fig
+
+    def to_plotly_json(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+def _point_values(values: pd.Series | pd.DataFrame) -> np.ndarray:
+    values = values.to_numpy()
+    # plotly serialises naive datetimes as ISO strings without trailing zero precision
+    if values.dtype.kind == "M":
+        whole_seconds = (values.astype("datetime64[us]").astype(np.int64) % 1_000_000 == 0).all()
+        return np.datetime_as_string(values, unit="s" if whole_seconds else "us")
+    return values
+
+def _is_discrete(series: pd.Series) -> bool:
+    return not pd.api.types.is_numeric_dtype(series)
+
+def _customdata_columns(kwargs: Dict[str, Any]) -> List[str]:
+    # plotly express packs custom_data first, then any hover_data not plotted on an axis
+    columns = list(kwargs.get("custom_data") or [])
+    hover_data = kwargs.get("hover_data") or []
+    if isinstance(hover_data, dict):
+        hover_data = [column for column, show in hover_data.items() if show is not False]
+    for column in hover_data:
+        if column not in (kwargs.get("x"), kwargs.get("y")) and column not in columns:
+            columns.append(column)
+    return columns
+
+def _as_frame(values: Any) -> pd.DataFrame:
+    values = np.asarray(values)
+    return pd.DataFrame(values.reshape(len(values), -1) if values.ndim < 2 else values)
+
+def _same(expected: Any, actual: Any) -> bool:
+    try:
+        pd.testing.assert_frame_equal(_as_frame(expected), _as_frame(actual), check_dtype=False)
+    except (AssertionError, ValueError, TypeError):
+        return False
+    return True
+
+def _point_columns(trace: Dict[str, Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    columns = {
+        "x": kwargs.get("x"),
+        "y": kwargs.get("y"),
+        "hovertext": kwargs.get("hover_name"),
+        "customdata": _customdata_columns(kwargs) or None,
+    }
+    if isinstance(trace.get("marker", {}).get("color"), (np.ndarray, list, tuple)):
+        columns["marker.color"] = kwargs.get("color")
+    return {path: column for path, column in columns.items() if column is not None}
+
+def _get(trace: Dict[str, Any], path: str) -> Any:
+    node = trace
+    for key in path.split("."):
+        node = node.get(key) if isinstance(node, dict) else None
+    return node
+
+def fast_figure(
+    px_func: Callable[..., go.Figure],
+    data_frame: pd.DataFrame,
+    threshold: int = FAST_FIGURE_THRESHOLD,
+    **kwargs: Any,
+) -> go.Figure:
+    """
+    Draw a plotly express figure, skipping plotly's per-point validation for large data.
+
+    Plotly express is run over a single row from each trace's group, giving the same
+    layout, styling and hover templates it produces for the full data. Each trace's
+    point arrays are then filled from the full data directly. Where the arrays
+    rebuilt for those sample rows don't match plotly express' own, the figure is
+    drawn with plotly express as usual.
+    """
+    if len(data_frame) < threshold or any(kwargs.get(arg) is not None for arg in UNSUPPORTED_ARGS):
+        return px_func(data_frame=data_frame, **kwargs)
+
+    # array-like arguments, e.g. a lean hover row index, become columns
+    columns = {}
+    for arg in ("custom_data", "hover_data"):
+        if isinstance(kwargs.get(arg), (list, tuple)):
+            kwargs[arg] = [
+                columns.setdefault(value.name, value).name if isinstance(value, pd.Series) else value
+                for value in kwargs[arg]
+            ]
+    if any(name in data_frame.columns for name in columns):
+        return px_func(data_frame=data_frame, **kwargs)
+    data_frame = data_frame.assign(**columns) if columns else data_frame
+
+    group_by = [kwargs["color"]] if kwargs.get("color") is not None and _is_discrete(data_frame[kwargs["color"]]) else []
+    group_by = list(dict.fromkeys(group_by + [kwargs[arg] for arg in GROUP_ARGS if kwargs.get(arg) is not None]))
+    if group_by:
+        codes = data_frame.groupby(group_by, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(data_frame), dtype=np.intp)
+    _, first_rows = np.unique(codes, return_index=True)
+    first_rows = np.sort(first_rows)
+
+    # the sample rows must render as the full data would
+    skeleton_kwargs = dict(kwargs)
+    if "render_mode" in inspect.signature(px_func).parameters and kwargs.get("render_mode", "auto") == "auto":
+        skeleton_kwargs["render_mode"] = "webgl" if len(data_frame) > WEBGL_THRESHOLD else "svg"
+
+    skeleton = px_func(
+        data_frame=data_frame.iloc[first_rows].assign(**{ROW_ID: first_rows}),
+        animation_group=ROW_ID,
+        **skeleton_kwargs,
+    )
+
+    point_arrays = []
+    for trace in skeleton.data:
+        sample_rows = np.asarray(trace.ids, dtype=np.intp)
+        rows = np.flatnonzero(np.isin(codes, codes[sample_rows]))
+        trace_json = trace.to_plotly_json()
+        arrays = {}
+        for path, column in _point_columns(trace_json, kwargs).items():
+            # every point array must match plotly express' own for the sample rows
+            if not _same(data_frame[column].iloc[sample_rows], _get(trace_json, path)):
+                logger.debug(f"Fast figure fallback: {path} doesn't match '{column}'")
+                return px_func(data_frame=data_frame, **kwargs)
+            arrays[path] = _point_values(data_frame[column].iloc[rows])
+        point_arrays.append(arrays)
+        trace.ids = None
+
+    logger.debug(f"Fast figure: {len(data_frame)} rows over {len(skeleton.data)} traces")
+    return FastFigure(skeleton, point_arrays)
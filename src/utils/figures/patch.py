@@ -0,0 +1,24 @@
+import plotly.io as pio
+
+from dash import Patch
+
+def cosmetic_patch(
+    num_traces: int,
+    dot_size: int | None = None,
+    opacity: float | None = None,
+    template: str | None = None,
+) -> Patch:
+    """
+    Partial figure update for settings that leave the data untouched,
+    only the properties given are sent to the browser.
+    """
+    patch = Patch()
+    for i in range(num_traces or 0):
+        if dot_size is not None:
+            patch["data"][i]["marker"]["size"] = dot_size
+        if opacity is not None:
+            patch["data"][i]["marker"]["opacity"] = opacity
+    if template is not None:
+        # plotly.js doesn't know templates by name, so send the template itself
+        patch["layout"]["template"] = pio.templates[template].to_plotly_json()
+    return patch
@@ -9,6 +9,54 @@ from utils.sketch import default_layout
 
 CELL_HEIGHT = 40
 
+def _facet_codes(
+    values: pd.Series | None,
+    order: List[Any] | None = None,
+) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Integer-encode a facet column, respecting a category order where one is given.
+    Missing facets collapse to a single "All" level, values outside the order are coded -1.
+    """
+    if values is None:
+        return np.zeros(0, dtype=np.intp), ["All"]
+    if order is None:
+        codes, levels = pd.factorize(values, sort=True)
+        return codes, levels.tolist()
+    levels = list(order)
+    codes = pd.Categorical(values, categories=levels).codes.astype(np.intp)
+    return codes, levels
+
+def detection_cube(
+    df: pd.DataFrame,
+    axis_group: str | None,
+    facet_col: str | None = None,
+    facet_row: str | None = None,
+    category_orders: Dict[str, Any] | None = None,
+) -> Tuple[np.ndarray, Dict[str, List[Any]]]:
+    """
+    Sum detections into a dense (facet_row x facet_col x species x axis_group) cube.
+    Returns the cube alongside the levels labelling each dimension.
+    """
+    category_orders = category_orders or {}
+    n = len(df)
+    axis_codes, axis_levels = _facet_codes(df[axis_group] if axis_group else None)
+    col_codes, col_levels = _facet_codes(df[facet_col] if facet_col else None, category_orders.get(facet_col))
+    row_codes, row_levels = _facet_codes(df[facet_row] if facet_row else None, category_orders.get(facet_row))
+    species_codes, species_levels = pd.factorize(df["species"], sort=True)
+    # un-faceted dimensions have a single level
+    codes = [
+        codes if len(codes) else np.zeros(n, dtype=np.intp)
+        for codes in (row_codes, col_codes, species_codes, axis_codes)
+    ]
+    shape = (len(row_levels), len(col_levels), len(species_levels), len(axis_levels))
+    # drop detections with a missing or out-of-order facet value
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+    weights = df["detected"].to_numpy(dtype=np.float64)[valid]
+    cube = np.bincount(flat, weights=weights, minlength=int(np.prod(shape))).reshape(shape).astype(np.int64)
+    levels = dict(row=row_levels, col=col_levels, species=species_levels.tolist(), axis=axis_levels)
+    return cube, levels
+
 def species_matrix(
     df: pd.DataFrame,
     axis_group: str,
@@ -17,89 +65,32 @@ def species_matrix(
     category_orders: Dict[str, Any] | None = None,
     color: str = "#1f77b4",
 ) -> go.Figure:
-    #FIXME : this code is now more complicated than it needs to be, species matrix used to support multiple row
-    # subplots for each row_facet category, but I couldn't get the height set correctly across subplots
-    # rather than re-write, it works as is, but could do with a refactor
     if df.empty:
         return go.Figure()
 
-    # ensure faceting works regardless of whether specified
-    if axis_group is None:
-        df["_axis_group"] = "All"
-        axis_group = "_axis_group"
-    if facet_row is None:
-        df["_row_facet"] = "All"
-        facet_row = "_row_facet"
-    if facet_col is None:
-        df["_col_facet"] = "All"
-        facet_col = "_col_facet"
-
-    counts = (
-        df.groupby([*list(filter(None, [axis_group, facet_col, facet_row])), "species"])["detected"]
-        .sum()
-        .reset_index()
-        .sort_values(by="detected", ascending=True)
-    )
-    species_subset = (
-        counts.groupby([facet_col, facet_row])['species']
-        .unique()
-        .reset_index()
-        .rename(columns={'species': 'species_subset'})
-    )
-    axis_levels = df[axis_group].unique()
-    facet_levels = species_subset[[facet_col, facet_row]].drop_duplicates()
-    all_combos = pd.MultiIndex.from_product(
-        [axis_levels, facet_levels[facet_col].unique(), facet_levels[facet_row].unique()],
-        names=[axis_group, facet_col, facet_row]
-    ).to_frame(index=False).merge(
-        species_subset,
-        on=[facet_col, facet_row],
-        how="left"
-    )
-    rows = []
-    for _, combo in all_combos.iterrows():
-        axis, col, row, universe = combo
-        if isinstance(universe, float) and pd.isna(universe):
-            continue
-        for sp in universe:
-            rows.append({
-                axis_group: axis,
-                facet_col: col,
-                facet_row: row,
-                'species': sp
-            })
-    expanded = pd.DataFrame(rows)
-    result = expanded.merge(
-        counts[[axis_group, facet_col, facet_row, 'species', 'detected']],
-        on=[axis_group, facet_col, facet_row, 'species'],
-        how="left"
-    ).fillna({'detected': 0})
-    result['detected'] = result['detected'].astype(int)
-    counts = result.sort_values([axis_group, facet_col, facet_row, 'species']).reset_index(drop=True)
-
+    cube, levels = detection_cube(df, axis_group, facet_col, facet_row, category_orders)
+    species_levels = np.asarray(levels["species"], dtype=object)
     z_min = 0
-    z_max = max(counts["detected"].max(), 1)
-    all_x = counts[axis_group].unique().tolist()
+    z_max = max(int(cube.max()), 1)
 
-    # calculate plot heights proportional to the number of species detected
-    row_categories = []
-    species_per_row = []
-    for row_cat in category_orders.get(facet_row, counts[facet_row].unique()):
-        species_sum = counts[counts[facet_row] == row_cat].groupby(["species"])[["detected"]].sum()
-        species_count_by_row = len(species_sum[species_sum != 0].dropna().index.tolist())
-        if species_count_by_row > 0:
-            row_categories.append(row_cat)
-            species_per_row.append(species_count_by_row)
-    species_per_row = np.array(species_per_row)
-    col_categories = category_orders.get(facet_col, counts[facet_col].unique())
+    # species are shared across a row, ordered by the sum of detections across all its columns
+    row_totals = cube.sum(axis=(1, 3))
+    row_indices = np.flatnonzero(row_totals.any(axis=1))
+    species_orders = []
+    for i in row_indices:
+        detected = np.flatnonzero(row_totals[i])
+        species_orders.append(detected[np.argsort(row_totals[i, detected], kind="stable")])
+    species_per_row = np.array([len(order) for order in species_orders])
+    row_categories = [levels["row"][i] for i in row_indices]
+    col_categories = levels["col"]
 
     fig = make_subplots(
         rows=len(row_categories),
         cols=len(col_categories),
         subplot_titles=[
             "<br>".join(list(filter(None, [
-                str(r) if r != 'All' else None,
-                str(c) if c != 'All' else None
+                str(r) if facet_row else None,
+                str(c) if facet_col else None,
             ])))
             for r in row_categories
             for c in col_categories
@@ -107,50 +98,24 @@ def species_matrix(
         horizontal_spacing=0.01,
     )
 
-    for i, row_cat in enumerate(row_categories):
-        row = i + 1
-        # species order by sum of detections across all columns
-        species_sum = (
-            counts[counts[facet_row] == row_cat]
-            .groupby(["species"])[["detected"]]
-            .sum()
-            .sort_values(by="detected", ascending=True)
-        )
-        species_subset = species_sum[species_sum != 0].dropna().index.tolist()
-        for j, col_cat in enumerate(col_categories):
-            col = j + 1
-            subset = counts[
-                (counts[facet_row] == row_cat) &
-                (counts[facet_col] == col_cat) &
-                (counts["species"].isin(species_subset))
-            ]
-            # ensure all species are replicated across the row
-            data = (
-                subset[[axis_group, facet_row, facet_col]].drop_duplicates()
-                .merge(pd.DataFrame({'species': species_subset}), how='cross')
-                .merge(subset, on=[axis_group, facet_row, facet_col, 'species'], how='left')
-            )
-            data = (
-                pd.DataFrame(0, index=species_subset, columns=all_x)
-                if data.empty
-                else data.pivot(index="species", columns=axis_group, values="detected").fillna(0).astype(int)
-            )
-            # re-order according to maximum sum of occurrences
-            data = data.loc[species_subset]
+    for i, (row_index, species_order) in enumerate(zip(row_indices, species_orders)):
+        y = species_levels[species_order].tolist()
+        for j in range(len(col_categories)):
+            z = cube[row_index, j][species_order]
             fig.add_trace(
                 go.Heatmap(
-                    z=data.values,
-                    x=data.columns,
-                    y=species_subset,
+                    z=z,
+                    x=levels["axis"],
+                    y=y,
                     colorscale=[[0.0, "white"], [1.0, color]],
-                    text=data.values,
+                    text=z,
                     texttemplate="%{text}",
                     textfont={"size": 10, "color": "black"},
                     showscale=False,
                     zmin=z_min,
                     zmax=z_max,
                 ),
-                row=row, col=col,
+                row=i + 1, col=j + 1,
             )
 
     # y-tick labels are shared across row subplots
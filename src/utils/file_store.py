@@ -0,0 +1,85 @@
+import contextlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Callable, IO
+
+# stored files are named by this many hex digits of a digest of their content
+CONTENT_ID_LENGTH = 16
+CONTENT_ID_PATTERN = re.compile(f"[0-9a-f]{{{CONTENT_ID_LENGTH}}}")
+
+def content_id(digest: Any) -> str:
+    """
+    The id of a stored file, from a hashlib digest of its content
+    """
+    return digest.hexdigest()[:CONTENT_ID_LENGTH]
+
+def write_atomic(path: Path, write: Callable[[IO], None], mode: str = "wb") -> None:
+    """
+    Write a file through a temporary file renamed into place, so readers never see it partial.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+class FileStore:
+    """
+    Files on local disk shared by every worker, removed once unused for max_age seconds.
+
+    Use is recorded as each file's modified time. A worker touches a file at most once
+    every touch_interval, and prunes a directory at most once every prune_interval,
+    so neither costs a filesystem call on every request.
+    """
+    def __init__(self, max_age: float, touch_interval: float, prune_interval: float = 60 * 60):
+        self.max_age = max_age
+        self.touch_interval = touch_interval
+        self.prune_interval = prune_interval
+        self.lock = threading.Lock()
+        self.pruned_at = {}
+        self.touched_at = {}
+
+    def touch(self, path: Path) -> None:
+        """
+        Mark a file as in use, so it isn't pruned.
+        """
+        with self.lock:
+            if time.time() - self.touched_at.get(path, 0.0) < self.touch_interval:
+                return
+            self.touched_at[path] = time.time()
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+
+    def prune(self, directory: Path, pattern: str) -> None:
+        """
+        Remove the files, or directories, matching pattern under directory that
+        have gone unused for longer than max_age.
+        """
+        now = time.time()
+        with self.lock:
+            if now - self.pruned_at.get(directory, 0.0) < self.prune_interval:
+                return
+            self.pruned_at[directory] = now
+            self.touched_at = {path: at for path, at in self.touched_at.items() if now - at < self.touch_interval}
+        if not directory.is_dir():
+            return
+        for path in directory.glob(pattern):
+            try:
+                if now - path.stat().st_mtime <= self.max_age:
+                    continue
+            except FileNotFoundError:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
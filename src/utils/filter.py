@@ -1,5 +1,16 @@
 import itertools
-from utils import list2tuple
+import math
+import numpy as np
+
+from typing import Any, Dict, List, Tuple
+
+from utils import list2tuple, float_to_index, index_to_float
+from utils.selections import is_selected
+
+# range sliders move in this many steps between their bounds
+RANGE_STEPS = 1000
+# significant digits of a slider step kept in a range's cache key
+RANGE_KEY_DIGITS = 6
 
 def setup_filter_store(filters):
     filters["date_range"] = filters["date_range_bounds"]
@@ -9,24 +20,126 @@ def setup_filter_store(filters):
     filters["current_feature_range"] = list(filters["acoustic_features"][current_feature])
     for variable in filters["weather_variables"].keys():
         filters["weather_variables"][variable]["variable_range"] = filters["weather_variables"][variable]["variable_range_bounds"]
-    filters["current_sites"] = filters["tree"]
+    filters["current_sites"] = compact_site_selection(filters["tree"], filters["tree"])
     filters["files"] = {}
     species = filters["species"]
     return filters
 
-def filter_sites_query(sites, selected_sites):
-    sites = sites[sites['site'].isin([l.strip('/') for l in selected_sites])].reset_index()
-    site_ids = ", ".join([f"'{site_id}'" for site_id in sites.site_id])
-    return f"site_id in ({site_ids})"
+def _path_depth(path: str) -> int:
+    return path.count("/")
+
+def compact_site_selection(tree: List[str], selected: List[str]) -> Dict[str, List[str]]:
+    """
+    The minimal set of marked nodes describing which nodes of the sites tree are selected.
+    A node takes the state of its nearest marked ancestor, or itself where marked, so only
+    nodes selected unlike their parent are kept, as includes or exclusions.
+    """
+    nodes, selected = set(tree), set(selected)
+    include, exclude = [], []
+    for path in tree:
+        parent = path.rsplit("/", 1)[0]
+        parent_selected = parent in nodes and parent in selected
+        if path in selected and not parent_selected:
+            include.append(path)
+        elif path not in selected and parent_selected:
+            exclude.append(path)
+    return dict(include=sorted(include), exclude=sorted(exclude))
+
+def expand_site_selection(tree: List[str], sites: Dict[str, List[str]]) -> List[str]:
+    """
+    Every selected node of the sites tree, from its compact form
+    """
+    include, exclude = set(sites["include"]), set(sites["exclude"])
+    selected = set()
+    for path in sorted(tree, key=_path_depth):
+        parent = path.rsplit("/", 1)[0]
+        if path in include or (parent in selected and path not in exclude):
+            selected.add(path)
+    return [path for path in tree if path in selected]
+
+def site_marks(filters: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    The compact site selection held by the filters
+    """
+    current_sites = filters["current_sites"]
+    if isinstance(current_sites, list):
+        # stored before site selections were compacted, as every selected node
+        return compact_site_selection(filters["tree"], current_sites)
+    return current_sites
+
+def site_selected(sites: Dict[str, List[str]], path: str) -> bool:
+    """
+    Whether a node is selected, taking the state of its nearest marked ancestor
+    """
+    include, exclude = set(sites["include"]), set(sites["exclude"])
+    while path:
+        if path in include:
+            return True
+        if path in exclude:
+            return False
+        path = path.rsplit("/", 1)[0]
+    return False
 
-def filter_files_query(file_ids):
-    file_ids = ", ".join([f"'{file_id}'" for file_id in file_ids])
-    return f"file_id not in ({file_ids}) and duration >= 60.0"
+def site_partially_selected(sites: Dict[str, List[str]], path: str) -> bool:
+    """
+    Whether any node below a node is selected unlike it
+    """
+    prefix = path + "/"
+    return any(mark.startswith(prefix) for mark in itertools.chain(sites["include"], sites["exclude"]))
+
+def set_site_selection(sites: Dict[str, List[str]], path: str, selected: bool) -> Dict[str, List[str]]:
+    """
+    Select or deselect a node and every node below it, keeping the selection compact
+    """
+    prefix = path + "/"
+    keep = lambda mark: mark != path and not mark.startswith(prefix)
+    include = list(filter(keep, sites["include"]))
+    exclude = list(filter(keep, sites["exclude"]))
+    if selected != site_selected(dict(include=include, exclude=exclude), path.rsplit("/", 1)[0]):
+        (include if selected else exclude).append(path)
+    return dict(include=sorted(include), exclude=sorted(exclude))
+
+def site_selection_empty(tree: List[str], sites: Dict[str, List[str]]) -> bool:
+    """
+    Whether no site, a leaf of the sites tree, is selected
+    """
+    if not sites["include"]:
+        return True
+    if not sites["exclude"]:
+        return False
+    parents = {path.rsplit("/", 1)[0] for path in tree}
+    return not any(path not in parents for path in expand_site_selection(tree, sites))
+
+def filter_sites_mask(dataset, current_sites):
+    """
+    Row filter for use with .loc, keeping the sites of the selected nodes.
+    Marked nodes are applied shallowest first through the dataset's site index,
+    so resolving a selection only touches the sites under its marked nodes.
+    """
+    include, exclude = current_sites or ((), ())
+    selected = np.zeros(len(dataset.locations), dtype=bool)
+    marks = sorted([(path, True) for path in include] + [(path, False) for path in exclude], key=lambda mark: _path_depth(mark[0]))
+    for path, state in marks:
+        if (positions := dataset.site_index.get(path)) is not None:
+            selected[positions] = state
+    site_ids = dataset.locations["site_id"].to_numpy()[selected]
+    return lambda df: df["site_id"].isin(site_ids)
+
+def filter_files_query():
+    return "duration >= 60.0"
+
+def filter_files_mask(dataset, file_selection_ids):
+    """
+    Row filter for use with .loc, dropping files in any of the filtered selections
+    """
+    return lambda df: ~is_selected(dataset, file_selection_ids, df["file_id"])
 
 def filter_dates_query(date_range):
     return f"timestamp >= '{date_range[0]}' and timestamp <= '{date_range[1]}'"
 
 def filter_weather_query(weather_variables):
+    if not len(weather_variables):
+        return "index == index"
     return " and ".join([
         f"(({variable_name} >= {variable_range[0]} and {variable_name} <= {variable_range[1]}) or {variable_name}.isnull())"
         for variable_name, variable_range in weather_variables
@@ -34,15 +147,50 @@ def filter_weather_query(weather_variables):
 
 def filter_feature_query(feature_name_and_range):
     current_feature, current_feature_range = feature_name_and_range
+    if not len(current_feature_range):
+        return f"`{current_feature}`.notnull()"
     return f"`{current_feature}` >= {current_feature_range[0]} and `{current_feature}` <= {current_feature_range[1]}"
 
-def filter_dict_to_tuples(filters):
+def canonical_range(
+    value_range: List[float],
+    bounds: List[float],
+    n_steps: int = RANGE_STEPS,
+) -> Tuple[float, ...]:
+    """
+    A range snapped to the slider steps between its bounds,
+    empty where it spans the bounds and so filters nothing out.
+    """
+    min_val, max_val = bounds
+    if min_val == max_val:
+        return tuple()
+    lower, upper = sorted(min(max(float_to_index(x, min_val, max_val, n_steps), 0), n_steps - 1) for x in value_range)
+    if lower == 0 and upper == n_steps - 1:
+        return tuple()
+    # rounded well below the step size, so float noise from the slider doesn't vary the key
+    # while neighbouring steps of even the narrowest range stay apart
+    step = (max_val - min_val) / (n_steps - 1)
+    decimals = RANGE_KEY_DIGITS - math.floor(math.log10(step))
+    return tuple(round(index_to_float(i, min_val, max_val, n_steps), decimals) for i in (lower, upper))
+
+def filter_dict_to_tuples(filters: Dict[str, Any]) -> Dict[str, Tuple[Any, ...]]:
+    """
+    The canonical form of a filter state, passed to the API and used as its cache keys.
+    Sets are sorted and deduplicated, ranges are snapped to slider steps, and those
+    spanning their bounds dropped, so equivalent filter states give equal keys.
+    """
+    current_feature = filters["current_feature"]
+    current_sites = site_marks(filters)
     filters_args = {
-        "current_sites": list2tuple(filters["current_sites"]),
+        "current_sites": (tuple(current_sites["include"]), tuple(current_sites["exclude"])),
         "current_date_range": list2tuple(filters["date_range"]),
-        "current_feature": (filters["current_feature"], list2tuple(filters["current_feature_range"])),
-        "current_file_ids": list2tuple(list(itertools.chain(*filters["files"].values()))),
-        "current_weather": list2tuple([(variable_name, list2tuple(params["variable_range"])) for variable_name, params in filters["weather_variables"].items()]),
-        "current_species": list2tuple(filters["species"]),
+        "current_feature": (current_feature, canonical_range(filters["current_feature_range"], filters["acoustic_features"][current_feature])),
+        # selection ids, or lists of file ids in filters stored before selections were kept server-side
+        "current_file_ids": tuple(sorted(set(itertools.chain(*[[ids] if isinstance(ids, str) else ids for ids in filters["files"].values()])))),
+        "current_weather": tuple(
+            (variable_name, variable_range)
+            for variable_name, params in sorted(filters["weather_variables"].items())
+            if len(variable_range := canonical_range(params["variable_range"], params["variable_range_bounds"]))
+        ),
+        "current_species": tuple(sorted(set(filters["species"]))),
     }
     return filters_args
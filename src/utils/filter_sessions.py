@@ -0,0 +1,157 @@
+import functools
+import json
+import os
+import re
+import secrets
+import tempfile
+
+from dash import ctx, exceptions
+from loguru import logger
+from pathlib import Path
+from typing import Any, Dict
+
+from config import filter_sessions_dir
+from utils.file_store import FileStore
+
+# older versions of a session are dropped, callbacks only ever read recent ones
+KEEP_VERSIONS = 8
+
+# sessions not updated for this long are removed
+SESSION_MAX_AGE = 30 * 24 * 60 * 60
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{22}")
+
+Filters = Dict[str, Any]
+FilterSession = Dict[str, Any]
+
+@functools.lru_cache(maxsize=256)
+def _read(path: Path) -> str:
+    with open(path, "r") as f:
+        data = f.read()
+    # raised rather than returned, so a bad read isn't cached
+    json.loads(data)
+    return data
+
+class FilterSessions:
+    """
+    Filter state held server-side, so the browser's filter store carries only
+    a session token and version number rather than the filters themselves.
+
+    Each update writes a new immutable version file under the session's directory
+    on local disk, shared by every worker, linked into place only once written whole.
+    A version never changes once written, so reads are cached in memory without invalidation.
+    """
+    directory = Path(filter_sessions_dir)
+    # each update writes a version, which is all the touching a session needs
+    store = FileStore(SESSION_MAX_AGE, touch_interval=0)
+
+    @classmethod
+    def _path(cls, token: str, version: int) -> Path:
+        return cls.directory / token / f"{version}.json"
+
+    @classmethod
+    def _next_path(cls, token: str, version: int) -> Path:
+        # marks a version as having had another derived from it
+        return cls.directory / token / f"{version}.next"
+
+    @classmethod
+    def _write(cls, token: str, version: int, filters: Filters, parent: int | None = None) -> int:
+        session_dir = cls.directory / token
+        session_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=session_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(filters, f)
+            while True:
+                try:
+                    # linked into place whole, failing where a concurrent update from the
+                    # same version got there first, in which case this takes the next one
+                    os.link(tmp_path, cls._path(token, version))
+                except FileExistsError:
+                    version += 1
+                    continue
+                break
+        finally:
+            os.unlink(tmp_path)
+        if parent is not None:
+            cls._next_path(token, parent).touch()
+        for pattern in ("*.json", "*.next"):
+            for stale in sorted(session_dir.glob(pattern), key=lambda path: int(path.stem))[:-KEEP_VERSIONS]:
+                stale.unlink(missing_ok=True)
+        return version
+
+    @classmethod
+    def create(cls, filters: Filters) -> FilterSession:
+        """
+        Hold filters in a new session, returning its handle for the filter store.
+        """
+        cls.store.prune(cls.directory, "*")
+        token = secrets.token_urlsafe(16)
+        version = cls._write(token, 1, filters)
+        logger.debug(f"Created filter session {token}")
+        return dict(token=token, version=version)
+
+    @classmethod
+    def save(cls, session: FilterSession | None, filters: Filters) -> FilterSession:
+        """
+        Store updated filters as the session's next version, returning the new handle.
+        Filter stores without a session, from before sessions were kept server-side, get a new one.
+        """
+        if not cls.is_session(session):
+            return cls.create(filters)
+        version = cls._write(session["token"], session["version"] + 1, filters, parent=session["version"])
+        return dict(token=session["token"], version=version)
+
+    @classmethod
+    def load(cls, session: FilterSession | Filters | None) -> Filters:
+        """
+        The filters held by a session handle from the filter store.
+        Filters stored in the browser before sessions were kept server-side are used as they are.
+        Prevents the calling callback from updating where the session is unknown or has expired.
+        """
+        if cls.is_session(session):
+            try:
+                return json.loads(_read(cls._path(session["token"], session["version"])))
+            except FileNotFoundError:
+                logger.warning(f"Filter session {session['token']} version {session['version']} not found")
+            except ValueError as e:
+                logger.warning(f"Filter session {session['token']} version {session['version']} unreadable: {e}")
+        elif isinstance(session, dict) and "date_range" in session:
+            return session
+        raise exceptions.PreventUpdate
+
+    @classmethod
+    def superseded(cls, session: FilterSession | None) -> bool:
+        """
+        Whether another version has been saved from this one since, so the browser
+        moves on from it. Versions saved concurrently from the same parent aren't
+        superseded by each other, as either may be the one the browser keeps.
+        """
+        if not cls.is_session(session):
+            return False
+        return cls._next_path(session["token"], session["version"]).exists()
+
+    @classmethod
+    def abort_if_superseded(cls) -> None:
+        """
+        Stop the running callback where the filter store version it was triggered with
+        has been superseded, as the callback will be run again with the newer one.
+        Called between the stages of long-running queries, so dragging a slider only
+        completes the query for the version the browser ends up showing.
+        Callbacks reading the filter store as State, such as downloads, always run to completion.
+        """
+        try:
+            session = ctx.inputs.get("filter-store.data")
+        except exceptions.MissingCallbackContextException:
+            return
+        if cls.superseded(session):
+            logger.debug(f"Abandoning query for filter session {session['token']} version {session['version']}")
+            raise exceptions.PreventUpdate
+
+    @staticmethod
+    def is_session(session: Any) -> bool:
+        return (
+            isinstance(session, dict)
+            and isinstance(session.get("version"), int)
+            and TOKEN_PATTERN.fullmatch(str(session.get("token"))) is not None
+        )
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from typing import Any, Dict, List
+
+from config import lean_hover
+
+# each point's row position in the data it was drawn from, carried first in its customdata
+ROW_INDEX = "row_index"
+
+HOVER_LABELS = {
+    "file_id": "File ID",
+    "file_name": "File Name",
+    "file_path": "File Path",
+    "timestamp": "Timestamp",
+    "site_name": "Site",
+    "dddn": "Dawn/Day/Dusk/Night",
+    "duration": "Duration (seconds)",
+    "offset": "Start Time (seconds)",
+}
+
+HOVER_COLUMNS = [
+    "file_name",
+    "file_path",
+    "timestamp",
+    "site_name",
+    "dddn",
+    "hour_categorical",
+    "week_of_year_categorical",
+    "duration",
+    "offset",
+]
+
+def hover_params(
+    data_frame: pd.DataFrame,
+    hover_name: str | None = None,
+    hover_data: List[str] | None = None,
+    lean: bool = lean_hover,
+) -> Dict[str, Any]:
+    """
+    Plotly express hover arguments for a figure drawn from data_frame.
+    Each point carries its row position in data_frame first in its customdata, an integer
+    sent as a typed array, so details are looked up against the cached selection by position.
+    In lean mode points carry nothing else.
+    """
+    custom_data = [pd.Series(np.arange(len(data_frame)), index=data_frame.index, name=ROW_INDEX)]
+    if not lean:
+        return dict(custom_data=custom_data, hover_name=hover_name, hover_data=hover_data)
+    return dict(custom_data=custom_data)
+
+def is_lean(points: List[Dict[str, Any]]) -> bool:
+    return len(points) > 0 and "hovertext" not in points[0]
+
+def point_rows(
+    points: List[Dict[str, Any]],
+) -> List[int]:
+    rows = []
+    for point in points:
+        customdata = point["customdata"]
+        # rows of a binary encoded customdata array serialise as {"0": value}
+        if isinstance(customdata, dict):
+            customdata = list(customdata.values())
+        rows.append(int(customdata[0]))
+    return rows
@@ -0,0 +1,90 @@
+import functools
+import hashlib
+import pandas as pd
+
+from dash import exceptions
+from loguru import logger
+from pathlib import Path
+from typing import Any, Dict
+
+from config import selected_points_dir
+from utils.file_store import FileStore, CONTENT_ID_PATTERN, content_id, write_atomic
+
+# point selections not opened for this long are removed
+SELECTION_MAX_AGE = 24 * 60 * 60
+# a point selection being opened is marked as such at most this often
+TOUCH_INTERVAL = 10 * 60
+
+PointSelection = Dict[str, Any]
+
+@functools.lru_cache(maxsize=16)
+def _read(path: Path) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+class SelectedPoints:
+    """
+    Files picked from a graph, held server-side for the file selection sidebar,
+    so the sidebar's store carries only a points id and row count.
+
+    Each selection is written once to local disk, shared by every worker, named by
+    a digest of its rows. A selection never changes once written, so it is read into
+    memory on first use and each page is sliced from it by position.
+    """
+    directory = Path(selected_points_dir)
+    store = FileStore(SELECTION_MAX_AGE, TOUCH_INTERVAL)
+
+    @classmethod
+    def _path(cls, points_id: str) -> Path:
+        return cls.directory / f"{points_id}.parquet"
+
+    @classmethod
+    def create(cls, data: pd.DataFrame) -> PointSelection:
+        """
+        Hold the rows of a selection, returning its handle for the sidebar's store.
+        Identical selections share a handle.
+        """
+        cls.store.prune(cls.directory, "*.parquet")
+        data = data.reset_index(drop=True)
+        digest = hashlib.sha256("\n".join(data.columns).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        points_id = content_id(digest)
+        path = cls._path(points_id)
+        if path.exists():
+            # opened again, so kept from pruning
+            cls.store.touch(path)
+        else:
+            cls.directory.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, lambda f: data.to_parquet(f, index=False))
+            logger.debug(f"Held selection {points_id} of {len(data)} points")
+        return dict(points_id=points_id, total=len(data))
+
+    @classmethod
+    def load(cls, selection: PointSelection | None) -> pd.DataFrame:
+        """
+        The rows held by a selection handle from the sidebar's store.
+        Prevents the calling callback from updating where there is no selection or it has expired.
+        """
+        if cls.is_selection(selection):
+            path = cls._path(selection["points_id"])
+            try:
+                data = _read(path)
+            except FileNotFoundError:
+                logger.warning(f"Selection {selection['points_id']} not found")
+            else:
+                cls.store.touch(path)
+                return data
+        raise exceptions.PreventUpdate
+
+    @classmethod
+    def page(cls, selection: PointSelection | None, offset: int, limit: int) -> pd.DataFrame:
+        """
+        The rows of a selection from offset, at most limit of them
+        """
+        return cls.load(selection).iloc[offset:offset + limit]
+
+    @staticmethod
+    def is_selection(selection: Any) -> bool:
+        return (
+            isinstance(selection, dict)
+            and CONTENT_ID_PATTERN.fullmatch(str(selection.get("points_id"))) is not None
+        )
@@ -0,0 +1,111 @@
+import functools
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+
+from loguru import logger
+from pathlib import Path
+from typing import Iterable, Tuple
+
+from utils.file_store import FileStore, CONTENT_ID_PATTERN, content_id, write_atomic
+
+# file selections not used for this long are removed, as long as the filter sessions referring to them
+SELECTION_MAX_AGE = 30 * 24 * 60 * 60
+# a file selection in use is marked as such at most this often
+TOUCH_INTERVAL = 60 * 60
+
+_store = FileStore(SELECTION_MAX_AGE, TOUCH_INTERVAL)
+
+@functools.lru_cache(maxsize=8)
+def _file_index(files_table: Path, mtime: float) -> Tuple[pd.Index, str]:
+    file_ids = pd.read_parquet(files_table, columns=["file_id"])["file_id"]
+    index = pd.Index(pd.unique(file_ids))
+    return index, content_id(hashlib.sha256("\n".join(index.astype(str)).encode()))
+
+def file_index(dataset) -> Tuple[pd.Index, str]:
+    """
+    The dataset's distinct file ids, in the order selection bitmaps are laid out,
+    along with a digest identifying that order.
+    """
+    files_table = Path(dataset.path) / "files_table.parquet"
+    return _file_index(files_table, os.path.getmtime(files_table))
+
+def _selections_dir(dataset) -> Path:
+    return Path(dataset.path) / "selections"
+
+def _selection_path(dataset, digest: str, file_selection_id: str) -> Path:
+    # bitmaps are laid out over a particular files table, so are kept apart by its digest
+    return _selections_dir(dataset) / digest / f"{file_selection_id}.bin"
+
+def register_selection(dataset, file_ids: Iterable[str], invert: bool = False) -> str:
+    """
+    Store a selection of files as a bitmap over the dataset's files, returning
+    a short file selection id. Identical selections share an id.
+    Inverted, the selection is every file but those given.
+    """
+    _store.prune(_selections_dir(dataset), "*/*.bin")
+    index, digest = file_index(dataset)
+    selected = index.isin(list(file_ids))
+    data = np.packbits(~selected if invert else selected).tobytes()
+    file_selection_id = content_id(hashlib.sha256(data))
+    path = _selection_path(dataset, digest, file_selection_id)
+    if path.exists():
+        _store.touch(path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, lambda f: f.write(data))
+        logger.debug(f"Registered file selection {file_selection_id} ({len(data)} bytes)")
+    return file_selection_id
+
+@functools.lru_cache(maxsize=64)
+def _load_selection(path: Path, num_files: int) -> np.ndarray:
+    data = np.fromfile(path, dtype=np.uint8)
+    return np.unpackbits(data, count=num_files).astype(bool)
+
+def selected_files(dataset, file_selection_ids: Tuple[str, ...]) -> np.ndarray:
+    """
+    The union of selections as a bitmap over the dataset's files.
+    Ids which aren't file selection ids are taken as file ids, as filter stores
+    from before the registry hold them. Selections since pruned are skipped, see
+    missing_selections.
+    """
+    index, digest = file_index(dataset)
+    selected = np.zeros(len(index), dtype=bool)
+    file_ids = []
+    for file_selection_id in file_selection_ids:
+        if CONTENT_ID_PATTERN.fullmatch(str(file_selection_id)):
+            path = _selection_path(dataset, digest, file_selection_id)
+            try:
+                selected |= _load_selection(path, len(index))
+            except FileNotFoundError:
+                logger.warning(f"File selection {file_selection_id} not found, so not filtered")
+            else:
+                _store.touch(path)
+        else:
+            file_ids.append(file_selection_id)
+    if file_ids:
+        selected |= index.isin(file_ids)
+    return selected
+
+def missing_selections(dataset, file_selection_ids: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    The file selection ids no longer registered, having been pruned since.
+    """
+    _, digest = file_index(dataset)
+    return tuple(
+        file_selection_id
+        for file_selection_id in file_selection_ids
+        if CONTENT_ID_PATTERN.fullmatch(str(file_selection_id))
+        and not _selection_path(dataset, digest, file_selection_id).exists()
+    )
+
+def is_selected(dataset, file_selection_ids: Tuple[str, ...], file_ids: pd.Series) -> np.ndarray:
+    """
+    Whether each of file_ids is in any of the selections.
+    """
+    if not len(file_selection_ids):
+        return np.zeros(len(file_ids), dtype=bool)
+    index, _ = file_index(dataset)
+    positions = index.get_indexer(file_ids)
+    return selected_files(dataset, file_selection_ids)[positions] & (positions >= 0)
@@ -0,0 +1,121 @@
+import io
+import numpy as np
+import struct
+import zlib
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.audio import cut_mp3, cut_wav, decode_audio
+
+SPECTROGRAM_WIDTH = 400
+SPECTROGRAM_HEIGHT = 128
+SPECTROGRAM_N_FFT = 512
+
+# decibels below the loudest bin shown before clipping to the background colour
+SPECTROGRAM_DB_RANGE = 80
+
+# bounds the memory used per batch of FFT frames
+MAX_BATCH_FRAMES = 8192
+
+# viridis, sampled at even steps
+PALETTE_ANCHORS = np.array([
+    (0x44, 0x01, 0x54),
+    (0x3b, 0x52, 0x8b),
+    (0x21, 0x91, 0x8c),
+    (0x5e, 0xc9, 0x62),
+    (0xfd, 0xe7, 0x25),
+])
+
+def _palette() -> np.ndarray:
+    steps = np.linspace(0, len(PALETTE_ANCHORS) - 1, 256)
+    return np.stack([
+        np.interp(steps, np.arange(len(PALETTE_ANCHORS)), PALETTE_ANCHORS[:, channel])
+        for channel in range(3)
+    ], axis=1).round().astype(np.uint8)
+
+PALETTE = _palette()
+
+def stft_columns(
+    samples: np.ndarray,
+    width: int,
+    n_fft: int = SPECTROGRAM_N_FFT,
+) -> np.ndarray:
+    """
+    STFT magnitudes of half-overlapping Hann windowed frames, max pooled
+    down to width columns, so long recordings keep their short events.
+    Returns an array of shape (width, n_fft // 2 + 1).
+    """
+    if len(samples) < n_fft:
+        samples = np.pad(samples, (0, n_fft - len(samples)))
+    frames = sliding_window_view(samples, n_fft)[::n_fft // 2]
+    window = np.hanning(n_fft).astype(np.float32)
+    edges = np.linspace(0, len(frames), width + 1).astype(np.intp)
+    columns = np.empty((width, n_fft // 2 + 1), dtype=np.float32)
+    batch = max(1, MAX_BATCH_FRAMES * width // len(frames))
+    for start in range(0, width, batch):
+        stop = min(width, start + batch)
+        low, high = edges[start], max(edges[stop], edges[start] + 1)
+        magnitude = np.abs(np.fft.rfft(frames[low:high] * window, axis=1))
+        columns[start:stop] = np.maximum.reduceat(magnitude, np.minimum(edges[start:stop] - low, len(magnitude) - 1), axis=0)
+    return columns
+
+def spectrogram_pixels(
+    samples: np.ndarray,
+    width: int = SPECTROGRAM_WIDTH,
+    height: int = SPECTROGRAM_HEIGHT,
+    n_fft: int = SPECTROGRAM_N_FFT,
+    db_range: float = SPECTROGRAM_DB_RANGE,
+) -> np.ndarray:
+    """
+    Scale the spectrogram of samples to a height x width image of palette indices,
+    with low frequencies at the bottom.
+    """
+    columns = stft_columns(samples, width, n_fft)
+    rows = np.linspace(0, columns.shape[1], height + 1).astype(np.intp)[:-1]
+    image = np.maximum.reduceat(columns, rows, axis=1).T[::-1]
+    if not image.any():
+        # silence has no loudest bin to scale against
+        return np.zeros(image.shape, dtype=np.uint8)
+    decibels = 20 * np.log10(image + 1e-10)
+    top = decibels.max()
+    scaled = (np.clip(decibels, top - db_range, top) - (top - db_range)) / db_range
+    return (scaled * 255).round().astype(np.uint8)
+
+def encode_png(pixels: np.ndarray, palette: np.ndarray = PALETTE) -> bytes:
+    """
+    Encode a 2D array of palette indices as an 8 bit indexed colour PNG.
+    """
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    height, width = pixels.shape
+    # each scanline is prefixed by its filter type, none
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels]).tobytes()
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        chunk(b"PLTE", palette.tobytes()),
+        chunk(b"IDAT", zlib.compress(scanlines, 9)),
+        chunk(b"IEND", b""),
+    ])
+
+def render_spectrogram(
+    source: str | bytes,
+    filetype: str,
+    offset: float | None = None,
+    duration: float | None = None,
+    width: int = SPECTROGRAM_WIDTH,
+    height: int = SPECTROGRAM_HEIGHT,
+    n_fft: int = SPECTROGRAM_N_FFT,
+) -> bytes:
+    """
+    Render a PNG spectrogram of an audio file, or of the segment
+    starting offset seconds in where given an offset and duration.
+    """
+    if offset is not None and duration is not None:
+        if filetype.lower() == "wav":
+            source = cut_wav(io.BytesIO(source) if isinstance(source, bytes) else source, offset, offset + duration)
+        elif filetype.lower() == "mp3":
+            source = cut_mp3(source, offset, offset + duration)
+    samples, _ = decode_audio(source, filetype)
+    return encode_png(spectrogram_pixels(samples, width, height, n_fft))
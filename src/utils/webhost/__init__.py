@@ -1,26 +1,60 @@
 import base64
 import os
+import pandas as pd
+import threading
+import time
 
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from loguru import logger
 
+from config import audio_cache_dir, audio_cache_bytes, root_dir
+from utils.webhost.disk_cache import DiskCache
 from utils.webhost.localhost import Localhost
 from utils.webhost.gdrive import Google_Drive
 
+AUDIO_EXTENSIONS = ('mp3','MP3','wav','WAV')
+
+# host and extension lookups are probed concurrently
+LOOKUP_WORKERS = 16
+
+# seconds a host has to answer a lookup before it's treated as a miss
+HOST_TIMEOUTS = {'local': 2.0, 'gdrive': 15.0}
+DEFAULT_HOST_TIMEOUT = 15.0
+
+# a host with this many probes still running past its timeout is treated as a miss rather than probed again
+HOST_MAX_STALLED_PROBES = LOOKUP_WORKERS // 4
+
 class AudioAPI:
     API = {}
+    cache = DiskCache(audio_cache_dir, audio_cache_bytes)
+    lookup_pool = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS, thread_name_prefix="audio-lookup")
+    # the host and extension that last served each dataset, ranked first among lookup hits
+    preferred = {}
+    # probes underway by dataset, host and path, with their deadlines, shared by concurrent lookups
+    probes = {}
+    # the number of lookups waiting on each probe
+    probe_users = {}
+    # reentrant, as cancelling a probe forgets it within the lock
+    lock = threading.RLock()
+    hosts_lock = threading.Lock()
 
     @classmethod
     def get_hosts(cls, dataset, config):
-        if not dataset in cls.API:
+        if dataset in cls.API:
+            return cls.API[dataset]
+        # concurrent lookups would otherwise each build the hosts, and their catalogs
+        with cls.hosts_lock:
+            if dataset in cls.API:
+                return cls.API[dataset]
             hosts = {}
 
             audio_path = config.get("Dataset", {}).get("audio_path", None)
             if audio_path is not None:
-                host = Localhost(audio_path)
+                host = Localhost(audio_path, AUDIO_EXTENSIONS, os.path.join(root_dir, dataset, 'audio-catalog.json'))
                 if host.is_active():
                     hosts['local'] = host
 
-            google_audio_path = config.get("Dataset", {}).get("audio_path", None)
+            google_audio_path = config.get("Dataset", {}).get("gdrive_sound_file_path", f"DASHBOARD_MP3/{dataset}/soundfiles")
             if google_audio_path is not None:
                 host = Google_Drive(dataset, google_audio_path)
                 if host.is_active():
@@ -32,22 +66,161 @@ class AudioAPI:
 
     @classmethod
     def get_audio_bytes(cls, name, dataset, config):
-        audio_path = name
-        hosts = cls.get_hosts(dataset, config)
+        host_name, audio_path = cls.find_audio(name, dataset, config)
+        if host_name is None:
+            return None, None, audio_path
+        audio_bytes, filetype = cls.get_hosts(dataset, config)[host_name].get_audio_bytes(audio_path)
+        return audio_bytes, filetype, audio_path
 
-        split_name = os.path.splitext(name)
-        audio_path_base = split_name[0]
+    @classmethod
+    def _has_audio(cls, host_name, host, audio_path):
+        try:
+            return host.has_audio(audio_path)
+        except Exception as e:
+            logger.warning(f"Lookup of \'{audio_path}\' at host \'{host_name}\' failed: {e}")
+            return False
+
+    @classmethod
+    def _probe(cls, dataset, host_name, host, audio_path) -> Future:
+        """
+        Ask a host for a file on the lookup pool, joining a probe for the same file
+        already underway. A probe can't be stopped once running, so while a host has
+        several probes overrunning its timeout it is treated as a miss rather than
+        sent more. Each probe is released once its answer is no longer waited on.
+        """
+        key = (dataset, host_name, audio_path)
+        now = time.monotonic()
+        with cls.lock:
+            future, _ = cls.probes.get(key, (None, None))
+            if future is None:
+                stalled = sum(
+                    probe[:2] == (dataset, host_name) and deadline < now
+                    for probe, (_, deadline) in cls.probes.items()
+                )
+                if stalled >= HOST_MAX_STALLED_PROBES:
+                    future = Future()
+                    future.set_result(False)
+                    return future
+                future = cls.lookup_pool.submit(cls._has_audio, host_name, host, audio_path)
+                cls.probes[key] = (future, now + HOST_TIMEOUTS.get(host_name, DEFAULT_HOST_TIMEOUT))
+                future.add_done_callback(lambda _: cls._forget(key))
+            cls.probe_users[future] = cls.probe_users.get(future, 0) + 1
+        return future
 
+    @classmethod
+    def _forget(cls, key) -> None:
+        with cls.lock:
+            cls.probes.pop(key, None)
+
+    @classmethod
+    def _release(cls, future) -> None:
+        """
+        Cancel a probe no other lookup is waiting on, where it has yet to start.
+        """
+        with cls.lock:
+            users = cls.probe_users.pop(future, 0) - 1
+            if users > 0:
+                cls.probe_users[future] = users
+            else:
+                future.cancel()
+
+    @classmethod
+    def find_audio(cls, name, dataset, config):
+        """
+        Locate an audio file without reading it, returning the host name and
+        the path with the extension the file was found under.
+        Hosts with a catalog are asked first, then every combination of the rest
+        is probed at once and the first hit wins, the host and extension that last
+        served the dataset where several answer together. Hosts slower than their
+        timeout are treated as a miss.
+        """
+        hosts = cls.get_hosts(dataset, config)
+        audio_path_base = os.path.splitext(name)[0]
+        # catalogued hosts answer without probing
         for host_name, host in hosts.items():
-            # Move file extension to sub class
-            for file_extension in ('mp3','MP3','wav','WAV'):
-                audio_path = f"{audio_path_base}.{file_extension}"
-                audio_bytes, filetype = host.get_audio_bytes(audio_path)
-                if audio_bytes is not None:
-                    logger.debug(f"Found file \'{audio_path}\' at host \'{host_name}\'")
-                    return audio_bytes, filetype, audio_path
-        else:
-            if len(split_name)>0:
-                audio_path = f"{audio_path_base}{split_name[1]}"
-            logger.warning(f"No audio file found at \'{audio_path}\'")
+            if hasattr(host, "find_audio") and (audio_path := host.find_audio(name)) is not None:
+                logger.debug(f"Found file \'{audio_path}\' at host \'{host_name}\'")
+                return host_name, audio_path
+        candidates = [
+            (host_name, file_extension)
+            for host_name, host in hosts.items()
+            if not hasattr(host, "find_audio")
+            for file_extension in AUDIO_EXTENSIONS
+        ]
+        # the host and extension that last served the dataset is probed with the rest, ranked first
+        preferred = cls.preferred.get(dataset)
+        if preferred in candidates:
+            candidates.remove(preferred)
+            candidates.insert(0, preferred)
+
+        now = time.monotonic()
+        futures = {}
+        for candidate in candidates:
+            host_name, file_extension = candidate
+            future = cls._probe(dataset, host_name, hosts[host_name], f"{audio_path_base}.{file_extension}")
+            futures[future] = (candidate, now + HOST_TIMEOUTS.get(host_name, DEFAULT_HOST_TIMEOUT))
+
+        found = None
+        pending = set(futures)
+        while pending and found is None:
+            timeout = max(deadline for _, deadline in (futures[future] for future in pending)) - time.monotonic()
+            done, pending = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            hits = [futures[future][0] for future in done if future.result()]
+            if hits:
+                # prefer the earlier host and extension where several answer at once
+                found = min(hits, key=candidates.index)
+            pending = {future for future in pending if futures[future][1] > time.monotonic()}
+        for future in futures:
+            cls._release(future)
+
+        if found is None:
+            logger.warning(f"No audio file found at \'{name}\'")
+            return None, name
+        host_name, file_extension = found
+        with cls.lock:
+            cls.preferred[dataset] = found
+        audio_path = f"{audio_path_base}.{file_extension}"
+        logger.debug(f"Found file \'{audio_path}\' at host \'{host_name}\'")
+        return host_name, audio_path
+
+    @classmethod
+    def audio_available(cls, dataset, config, file_paths):
+        """
+        Whether each file path has playable audio, where every host can tell
+        without probing, otherwise None.
+        """
+        hosts = cls.get_hosts(dataset, config)
+        if not all(hasattr(host, "available") for host in hosts.values()):
+            return None
+        available = pd.Series(False, index=file_paths.index)
+        for host in hosts.values():
+            if (host_available := host.available(file_paths)) is None:
+                return None
+            available |= host_available
+        return available
+
+    @classmethod
+    def open_audio(cls, name, dataset, config):
+        """
+        Open an audio file for streaming, returning either a local file path
+        or the file's bytes, along with its file type and resolved path.
+        Remote files are served from the disk cache, downloaded on first use.
+        """
+        host_name, audio_path = cls.find_audio(name, dataset, config)
+        if host_name is None:
             return None, None, audio_path
+        host = cls.get_hosts(dataset, config)[host_name]
+        filetype = audio_path.split('.')[-1]
+        if hasattr(host, "get_audio_file"):
+            return host.get_audio_file(audio_path), filetype, audio_path
+        try:
+            cached_path = cls.cache.fetch(
+                f"{dataset}/{host_name}/{audio_path}",
+                f".{filetype}",
+                lambda: host.get_audio_bytes(audio_path)[0],
+            )
+        except OSError as e:
+            logger.warning(f"Audio cache unavailable, reading {audio_path} from {host_name}: {e}")
+            audio_bytes, filetype = host.get_audio_bytes(audio_path)
+            return audio_bytes, filetype, audio_path
+        return (str(cached_path) if cached_path is not None else None), filetype, audio_path
@@ -0,0 +1,69 @@
+import cachetools
+import io
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+from utils.audio import cut_mp3, cut_wav
+from utils.webhost import AudioAPI
+from utils.webhost.previews import AudioPreviews
+
+# at most this many clips are cut at once
+CLIP_WORKERS = 4
+
+CLIP_CACHE_BYTES = 256 * 1024 * 1024
+
+class AudioClips:
+    pool = ThreadPoolExecutor(max_workers=CLIP_WORKERS, thread_name_prefix="audio-clip")
+    cache = cachetools.LRUCache(maxsize=CLIP_CACHE_BYTES, getsizeof=lambda clip: len(clip[0] or b""))
+    pending = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get_clip(cls, name, dataset, config, offset, duration, padding=0.0, original=False):
+        """
+        Cut the segment starting offset seconds into a recording, padded either side,
+        returning the clip's bytes, file type and the resolved audio path.
+        Clips are cut from the recording's preview where one is cached, unless original,
+        otherwise from the recording itself while its preview is transcoded in the background.
+        Concurrent requests for the same clip share a single extraction.
+        """
+        key = (dataset, name, round(offset, 3), round(duration, 3), round(padding, 3), original)
+        with cls.lock:
+            if key in cls.cache:
+                return cls.cache[key]
+            future = cls.pending.get(key)
+            if future is None:
+                future = cls.pool.submit(cls._extract, name, dataset, config, offset, duration, padding, original)
+                cls.pending[key] = future
+        try:
+            clip = future.result()
+        finally:
+            with cls.lock:
+                cls.pending.pop(key, None)
+        if clip[0] is not None and len(clip[0]) <= cls.cache.maxsize:
+            with cls.lock:
+                cls.cache[key] = clip
+        return clip
+
+    @classmethod
+    def _extract(cls, name, dataset, config, offset, duration, padding, original):
+        start = max(0.0, offset - padding)
+        end = offset + duration + padding
+        if not original:
+            preview_path, audio_path = AudioPreviews.cached_preview(name, dataset, config)
+            if preview_path is not None:
+                logger.debug(f"Cutting preview of {audio_path} [{start:.2f}s, {end:.2f}s]")
+                return cut_mp3(str(preview_path), start, end), "mp3", audio_path
+        source, filetype, audio_path = AudioAPI.open_audio(name, dataset, config)
+        if source is None:
+            return None, None, audio_path
+        logger.debug(f"Cutting {audio_path} [{start:.2f}s, {end:.2f}s]")
+        if filetype.lower() == "wav":
+            clip = cut_wav(io.BytesIO(source) if isinstance(source, bytes) else source, start, end)
+        elif filetype.lower() == "mp3":
+            clip = cut_mp3(source, start, end)
+        else:
+            raise ValueError(f"Cannot cut clips from '{filetype}' files")
+        return clip, filetype, audio_path
@@ -0,0 +1,169 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from loguru import logger
+from pathlib import Path
+from typing import Callable, Iterator
+
+# left by earlier versions, which locked each key with its own file
+LOCK_SUFFIX = ".lock"
+
+# keys share this many lock files, so locks don't accumulate with the cache
+LOCK_STRIPES = 64
+
+# eviction trims the cache to this fraction of its budget, so a full cache isn't rescanned on every store
+EVICT_TO = 0.9
+
+# the cache is recounted at least this often, picking up files stored by other workers
+RESCAN_INTERVAL = 60
+
+class DiskCache:
+    """
+    A size-bounded cache of files on local disk, shared by every worker on the host.
+
+    Files are named by a digest of their key. Writes go through a temporary file
+    renamed into place, so readers never see a partial file. Keys are striped over
+    a fixed set of lock files, ensuring only one thread or process downloads a file
+    at a time, the rest wait and read its result. Each hit touches the file's access
+    time, so eviction drops the least recently used files first, while its modified
+    time, which HTTP validators are built from, stays that of the download. The cache's size is tracked
+    as files are stored, and only recounted from disk when over budget or stale.
+    """
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.size = None
+        self.scanned_at = 0.0
+
+    def path(self, key: str, suffix: str = "") -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}{suffix}"
+
+    def get(self, key: str, suffix: str = "") -> Path | None:
+        path = self.path(key, suffix)
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def fetch(self, key: str, suffix: str, download: Callable[[], bytes | None]) -> Path | None:
+        """
+        Return the cached file for key, downloading it first on a miss.
+        None where the download finds nothing.
+        """
+        if (path := self.get(key, suffix)) is not None:
+            logger.trace(f"Disk cache hit for {key}")
+            return path
+        path = self.path(key, suffix)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._locked(path):
+            # another worker may have finished the download while we waited
+            if self.get(key, suffix) is not None:
+                return path
+            data = download()
+            if data is None:
+                return None
+            self._write(path, data)
+        logger.debug(f"Disk cache stored {key} ({len(data)} bytes)")
+        self._stored(path, len(data))
+        return path
+
+    def build(self, key: str, suffix: str, make: Callable[[str], bool]) -> Path | None:
+        """
+        Return the cached file for key, making it first on a miss. make writes the file
+        to the temporary path it is given, returning whether it made one. Unlike fetch,
+        the key's lock is only taken to rename the file into place, so a slow transcode
+        or render never holds up the keys sharing its lock. Concurrent misses may each
+        make the file, the first to finish is kept. None where make makes nothing.
+        """
+        if (path := self.get(key, suffix)) is not None:
+            logger.trace(f"Disk cache hit for {key}")
+            return path
+        path = self.path(key, suffix)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            if not make(tmp_path):
+                return None
+            n_bytes = os.path.getsize(tmp_path)
+            with self._locked(path):
+                if self.get(key, suffix) is not None:
+                    return path
+                os.replace(tmp_path, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+        logger.debug(f"Disk cache stored {key} ({n_bytes} bytes)")
+        self._stored(path, n_bytes)
+        return path
+
+    @contextlib.contextmanager
+    def _locked(self, path: Path) -> Iterator[None]:
+        stripe = int(path.name[:8], 16) % LOCK_STRIPES
+        with open(self.directory / f".lock-{stripe:02d}", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+    def _stored(self, path: Path, n_bytes: int) -> None:
+        with self.lock:
+            if self.size is not None:
+                self.size += n_bytes
+            due = (
+                self.size is None
+                or self.size > self.max_bytes
+                or time.monotonic() - self.scanned_at > RESCAN_INTERVAL
+            )
+        if due:
+            self.evict(keep=path)
+
+    def evict(self, keep: Path | None = None) -> None:
+        """
+        Recount the cache and, where it is over its byte budget, remove the least
+        recently used files until it is comfortably within it.
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(LOCK_SUFFIX):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(entry.path)
+                continue
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                files.append((stat.st_atime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        if total > self.max_bytes:
+            for _, size, file_path in sorted(files):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                if keep is not None and file_path == str(keep):
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(file_path)
+                    logger.debug(f"Disk cache evicted {file_path}")
+                total -= size
+        with self.lock:
+            self.size = total
+            self.scanned_at = time.monotonic()
@@ -6,25 +6,17 @@ from pydrive2.drive import GoogleDrive
 from pydrive2.files import GoogleDriveFileList
 
 from config import root_dir
-
-def parse_gdrive_path(gd_path):
-    if ':' in gd_path:
-        gd_path = gd_path.split(':')[1]
-    gd_path = gd_path.replace('\\', '/').replace('//', '/')
-    if gd_path.startswith('/'):
-        gd_path = gd_path[1:]
-    if gd_path.endswith('/'):
-        gd_path = gd_path[:-1]
-    return gd_path.split('/')
-
+from utils.webhost.gdrive_index import GDriveIndex, parse_gdrive_path
 
 class Google_Drive():
     def __init__(self, dataset, sound_file_path):
         self.dataset = dataset
         self.sound_file_path = sound_file_path
         self.key_file = os.path.join(root_dir,dataset,'gdrive-key.json')
+        self.index_dir = os.path.join(root_dir,dataset,'gdrive-index')
         self.active = False
         self.gdrive = None
+        self.index = None
 
         if os.path.isfile(self.key_file):
             self.settings = {
@@ -39,24 +31,7 @@ class Google_Drive():
             logger.debug(f"No gdrive key found under \'{self.key_file}\'")
 
     def resolve_path_to_id(self,folder_path):
-        _id = 'root'
-        folder_path = parse_gdrive_path(folder_path)
-
-        for idx, folder in enumerate(folder_path):
-            folder_list = self.gdrive.ListFile({'q': f"'{_id}' in parents and title='{folder}' and trashed=false", 'fields': 'items(id, title, mimeType)'}).GetList()
-
-            if len(folder_list) < 1:
-                logger.debug(f"Empty query for \'{folder}\'")
-                return None
-            elif len(folder_list) > 1:
-                logger.warning(f"More than 1 result for \'{folder}\': {str(folder_list)}")
-
-            _id = folder_list[0]['id']
-            title = folder_list[0]['title']
-            if idx == (len(folder_path) - 1) and folder == title:
-                break
-        return _id
-            
+        return self.index.resolve(folder_path)
 
     def authenticate(self):
         # Create instance of GoogleAuth
@@ -73,10 +48,15 @@ class Google_Drive():
         else:
             logger.debug(f"Authentificated GoogleDrive")
             self.active = True
+            self.index = GDriveIndex(self.gdrive, self.index_dir)
 
     def is_active(self):
         return self.active
 
+    def has_audio(self, audio_path):
+        file_path = os.path.join(self.sound_file_path, audio_path)
+        return self.resolve_path_to_id(file_path) is not None
+
     def get_audio_bytes(self, audio_path):
         if not self.active:
             logger.warning(f"Accessed host {type(self).__name__} despite being inactive.")
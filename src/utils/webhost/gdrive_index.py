@@ -0,0 +1,163 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from loguru import logger
+from pathlib import Path
+from typing import Any, Dict, List
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+# folder listings older than this are re-listed on their next lookup
+REFRESH_INTERVAL = 60 * 60
+
+def parse_gdrive_path(gd_path):
+    if ':' in gd_path:
+        gd_path = gd_path.split(':')[1]
+    gd_path = gd_path.replace('\\', '/').replace('//', '/')
+    if gd_path.startswith('/'):
+        gd_path = gd_path[1:]
+    if gd_path.endswith('/'):
+        gd_path = gd_path[:-1]
+    return gd_path.split('/')
+
+class GDriveIndex:
+    """
+    A persisted index of Google Drive folder listings, mapping paths to file ids.
+
+    Each folder is bulk-listed once with a single query, after which every child
+    resolves locally. A name absent from a fresh listing is a cached miss.
+    Listings are refreshed per folder once older than the refresh interval.
+
+    Each listing is persisted as its own file under the index directory, so workers
+    pick up each other's listings and a new listing only writes that folder.
+    Failing to persist a listing only costs a re-listing later. Folders are listed
+    without holding the index's lock, so a slow listing only holds up lookups
+    waiting on that same folder.
+
+    The client need only provide pydrive2's `ListFile(params).GetList()`.
+    """
+    def __init__(self, client, index_dir, refresh_interval=REFRESH_INTERVAL):
+        self.client = client
+        self.index_dir = Path(index_dir) if index_dir is not None else None
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.folders = {}
+        # folders being listed, set once each listing lands
+        self.listing = {}
+
+    def _path(self, folder_id: str) -> Path:
+        return self.index_dir / f"{folder_id}.json"
+
+    def _load(self, folder_id: str) -> Dict[str, Any] | None:
+        if self.index_dir is None:
+            return None
+        try:
+            with open(self._path(folder_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable gdrive listing '{self._path(folder_id)}': {e}")
+            return None
+
+    def _save(self, folder_id: str, listing: Dict[str, Any]) -> None:
+        if self.index_dir is None:
+            return
+        tmp_path = None
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=".", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(listing, f)
+            os.replace(tmp_path, self._path(folder_id))
+        except OSError as e:
+            logger.warning(f"Unable to persist gdrive listing of '{folder_id}': {e}")
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+
+    def _fresh(self, listing: Dict[str, Any] | None) -> bool:
+        return listing is not None and time.time() - listing["listed_at"] <= self.refresh_interval
+
+    def _list_folder(self, folder_id: str) -> Dict[str, Any]:
+        items = self.client.ListFile({
+            'q': f"'{folder_id}' in parents and trashed=false",
+            'fields': 'items(id, title, mimeType), nextPageToken',
+        }).GetList()
+        children = {}
+        for item in items:
+            if item['title'] in children:
+                logger.warning(f"More than 1 result for '{item['title']}' in folder '{folder_id}'")
+                continue
+            children[item['title']] = dict(id=item['id'], folder=item['mimeType'] == FOLDER_MIME_TYPE)
+        logger.debug(f"Listed {len(children)} items in gdrive folder '{folder_id}'")
+        return dict(listed_at=time.time(), children=children)
+
+    def _children(self, folder_id: str) -> Dict[str, Any]:
+        while True:
+            with self.lock:
+                listing = self.folders.get(folder_id)
+                if not self._fresh(listing):
+                    # another worker may have listed it since
+                    listing = self._load(folder_id)
+                    if self._fresh(listing):
+                        self.folders[folder_id] = listing
+                if self._fresh(listing):
+                    return listing["children"]
+                listed = self.listing.get(folder_id)
+                if listed is None:
+                    listed = self.listing[folder_id] = threading.Event()
+                    break
+            listed.wait()
+        try:
+            listing = self._list_folder(folder_id)
+            self._save(folder_id, listing)
+            with self.lock:
+                self.folders[folder_id] = listing
+        finally:
+            with self.lock:
+                self.listing.pop(folder_id).set()
+        return listing["children"]
+
+    def resolve(self, path: str | List[str]) -> str | None:
+        """
+        Resolve a path from the drive root to a file or folder id, None where it doesn't exist.
+        """
+        parts = parse_gdrive_path(path) if isinstance(path, str) else path
+        _id = 'root'
+        for part in parts:
+            child = self._children(_id).get(part)
+            if child is None:
+                logger.debug(f"No gdrive item '{part}' in '{'/'.join(parts)}'")
+                return None
+            _id = child['id']
+        return _id
+
+    def invalidate(self, path: str | List[str] | None = None) -> None:
+        """
+        Drop cached listings, for the folder holding path or entirely.
+        """
+        with self.lock:
+            if path is None:
+                folder_ids = list(self.folders)
+                if self.index_dir is not None and self.index_dir.is_dir():
+                    folder_ids += [listing.stem for listing in self.index_dir.glob("*.json")]
+                self.folders = {}
+            else:
+                parts = parse_gdrive_path(path) if isinstance(path, str) else path
+                _id = 'root'
+                for part in parts[:-1]:
+                    child = self.folders.get(_id, {}).get("children", {}).get(part)
+                    if child is None:
+                        break
+                    _id = child['id']
+                self.folders.pop(_id, None)
+                folder_ids = [_id]
+            if self.index_dir is not None:
+                for folder_id in set(folder_ids):
+                    with contextlib.suppress(OSError):
+                        self._path(folder_id).unlink()
@@ -0,0 +1,195 @@
+import contextlib
+import json
+import os
+import pandas as pd
+import tempfile
+import threading
+import time
+
+from loguru import logger
+from typing import Any, Dict, Iterable
+
+# a lookup missing the catalog rescans changed directories at most this often
+CATALOG_REFRESH_INTERVAL = 5 * 60
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+def _stem(audio_path: str) -> str:
+    return os.path.splitext(audio_path.replace("\\", "/").lstrip("/"))[0]
+
+class AudioCatalog:
+    """
+    A persisted catalog of the audio files under a directory, mapping each relative
+    stem to the file's path and extension, so lookups need no filesystem calls.
+
+    Directory listings are kept with their mtime. A refresh only stats each directory,
+    re-listing those whose entries changed, rather than every file. Only file names are
+    catalogued, which a directory's mtime tracks, so edits to a file's content never
+    leave the catalog stale. Scans, the first included, run in the background, the
+    persisted catalog being served meanwhile. A worker finding the catalog refreshed
+    by another recently loads it rather than rescanning.
+    """
+    def __init__(
+        self,
+        root: str,
+        catalog_path: str | None,
+        extensions: Iterable[str],
+        refresh_interval: float = CATALOG_REFRESH_INTERVAL,
+    ):
+        self.root = root
+        self.catalog_path = catalog_path
+        self.extensions = tuple(extensions)
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.refreshing = False
+        self.directories = self._load()
+        self.stems = self._index()
+        self.refreshed_at = self._saved_at()
+        self.ready = bool(self.directories)
+        if not self.ready or time.time() - self.refreshed_at > self.refresh_interval:
+            self.schedule_refresh()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.catalog_path is None or not os.path.isfile(self.catalog_path):
+            return {}
+        try:
+            with open(self.catalog_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable audio catalog '{self.catalog_path}': {e}")
+            return {}
+
+    def _save(self) -> None:
+        if self.catalog_path is None:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.catalog_path) or ".", prefix=".", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.directories, f)
+            os.replace(tmp_path, self.catalog_path)
+        except OSError as e:
+            logger.warning(f"Unable to persist audio catalog '{self.catalog_path}': {e}")
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+
+    def _saved_at(self) -> float:
+        """
+        When the persisted catalog was last scanned, by any worker.
+        """
+        if self.catalog_path is None:
+            return 0.0
+        try:
+            return os.stat(self.catalog_path).st_mtime
+        except OSError:
+            return 0.0
+
+    def _drop(self, directory: str) -> None:
+        for key in [key for key in self.directories if key == directory or key.startswith(f"{directory}/")]:
+            del self.directories[key]
+
+    def _scan(self, directory: str) -> bool:
+        try:
+            mtime = os.stat(os.path.join(self.root, directory)).st_mtime
+        except FileNotFoundError:
+            self._drop(directory)
+            return True
+        listing = self.directories.get(directory)
+        changed = listing is None or listing["mtime"] != mtime
+        if changed:
+            files, subdirs = [], []
+            with os.scandir(os.path.join(self.root, directory)) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.is_file() and os.path.splitext(entry.name)[1][1:] in self.extensions:
+                        files.append(entry.name)
+            for removed in set(listing["subdirs"] if listing else []) - set(subdirs):
+                self._drop(_join(directory, removed))
+            listing = self.directories[directory] = dict(mtime=mtime, subdirs=subdirs, files=files)
+        for subdir in listing["subdirs"]:
+            changed = self._scan(_join(directory, subdir)) or changed
+        return changed
+
+    def _index(self) -> Dict[str, Dict[str, Any]]:
+        stems = {}
+        for directory, listing in self.directories.items():
+            # catalogs from earlier versions map each file to its size
+            for name in listing["files"]:
+                stem, extension = os.path.splitext(name)
+                extension = extension[1:]
+                key = _join(directory, stem)
+                # where a recording exists in several formats, prefer the extension listed first
+                if key not in stems or self.extensions.index(extension) < self.extensions.index(stems[key]["extension"]):
+                    stems[key] = dict(path=_join(directory, name), extension=extension)
+        return stems
+
+    def refresh(self) -> None:
+        """
+        Rescan directories changed since the last scan, or load the catalog where
+        another worker has scanned since.
+        """
+        with self.lock:
+            start = time.time()
+            saved_at = self._saved_at()
+            if saved_at > self.refreshed_at and start - saved_at <= self.refresh_interval:
+                self.directories = self._load()
+                refreshed_at = saved_at
+            else:
+                if self._scan(""):
+                    self._save()
+                elif self.catalog_path is not None:
+                    # unchanged, but marked as scanned for the other workers
+                    with contextlib.suppress(OSError):
+                        os.utime(self.catalog_path)
+                refreshed_at = time.time()
+            self.stems = self._index()
+            self.refreshed_at = refreshed_at
+            self.ready = True
+        logger.debug(f"Catalogued {len(self.stems)} recordings under '{self.root}' in {time.time() - start:.2f}s")
+
+    def schedule_refresh(self) -> None:
+        """
+        Refresh on a background thread, unless a refresh is already underway.
+        """
+        with self.refresh_lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self._background_refresh, name="audio-catalog-refresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except OSError as e:
+            logger.warning(f"Unable to refresh audio catalog under '{self.root}': {e}")
+        finally:
+            self.refreshing = False
+
+    def lookup(self, audio_path: str) -> Dict[str, Any] | None:
+        """
+        The catalogued file for a path, whatever its extension, None where there is none.
+        A miss on a stale catalog schedules a refresh, so a new file is found on a later lookup.
+        """
+        stem = _stem(audio_path)
+        if stem not in self.stems and time.time() - self.refreshed_at > self.refresh_interval:
+            self.schedule_refresh()
+        return self.stems.get(stem)
+
+    def has_file(self, audio_path: str) -> bool:
+        """
+        Whether the exact file, extension included, is catalogued.
+        """
+        if self.lookup(audio_path) is None:
+            return False
+        directory, _, name = audio_path.replace("\\", "/").lstrip("/").rpartition("/")
+        return name in self.directories.get(directory, {}).get("files", {})
+
+    def available(self, file_paths: pd.Series) -> pd.Series:
+        """
+        Whether each file path has a recording in the catalog, in any format.
+        """
+        return file_paths.map(_stem).isin(list(self.stems))
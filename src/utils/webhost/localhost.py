@@ -1,25 +1,63 @@
 import os
 
 from loguru import logger
+from werkzeug.security import safe_join
+
+from utils.webhost.local_catalog import AudioCatalog
 
 class Localhost():
-    def __init__(self, sound_file_path):
+    def __init__(self, sound_file_path, extensions, catalog_path=None):
         self.sound_file_path = sound_file_path
         self.active = os.path.isdir(sound_file_path)
+        self.catalog = AudioCatalog(sound_file_path, catalog_path, extensions) if self.active else None
 
     def is_active(self):
         return self.active
 
+    def get_audio_file(self, audio_path):
+        if self.catalog is None:
+            return None
+        # refuse paths escaping the audio directory
+        src_path = safe_join(self.sound_file_path, audio_path)
+        if self.catalog.ready:
+            return src_path if self.catalog.has_file(audio_path) else None
+        # until the first scan completes, the file system is asked directly
+        return src_path if src_path is not None and os.path.isfile(src_path) else None
+
+    def has_audio(self, audio_path):
+        return self.get_audio_file(audio_path) is not None
+
+    def find_audio(self, audio_path):
+        """
+        The catalogued path for a recording whatever its extension, None where there is none.
+        """
+        if self.catalog is None:
+            return None
+        if not self.catalog.ready:
+            stem = os.path.splitext(audio_path)[0]
+            for extension in self.catalog.extensions:
+                if self.get_audio_file(f"{stem}.{extension}") is not None:
+                    return f"{stem}.{extension}"
+            return None
+        entry = self.catalog.lookup(audio_path)
+        return entry["path"] if entry is not None else None
+
+    def available(self, file_paths):
+        """
+        Whether each file path has a recording, None until the catalog can tell.
+        """
+        return self.catalog.available(file_paths) if self.catalog.ready else None
+
     def get_audio_bytes(self, audio_path):
         if not self.active:
             logger.warning(f"Accessed host {type(self).__name__} despite being inactive.")
 
-        src_path = os.path.join(self.sound_file_path, audio_path)
+        src_path = self.get_audio_file(audio_path)
         logger.debug(f"Fetching {src_path}")
         audio_bytes = None
         filetype = None
 
-        if os.path.isfile(src_path):
+        if src_path is not None:
             logger.debug(f"Open audio file \'{src_path}\'...")
             with open(src_path, "rb") as file:
                 try:
@@ -0,0 +1,56 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from typing import Iterable
+
+from utils.webhost import AudioAPI
+from utils.webhost.previews import AudioPreviews
+
+# at most this many recordings are prefetched at once
+PREFETCH_WORKERS = 4
+
+# recordings beyond this many waiting to be prefetched are dropped rather than queued
+PREFETCH_QUEUE = 64
+
+class AudioPrefetch:
+    pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="audio-prefetch")
+    pending = set()
+    lock = threading.Lock()
+
+    @classmethod
+    def prefetch(
+        cls,
+        dataset: str,
+        config: dict,
+        file_paths: Iterable[str],
+    ) -> None:
+        """
+        Warm the disk caches shared by every worker in the background for recordings
+        that will later be requested, transcoding their previews, or where previews
+        are unavailable, downloading them. Clips are then cut from the cache by
+        whichever worker serves them.
+        Recordings already being prefetched are skipped, as is everything once the queue is full.
+        """
+        for file_path in dict.fromkeys(file_paths):
+            key = (dataset, file_path)
+            with cls.lock:
+                if key in cls.pending:
+                    continue
+                if len(cls.pending) >= PREFETCH_QUEUE:
+                    logger.debug("Prefetch queue full, skipping remaining recordings")
+                    return
+                cls.pending.add(key)
+            cls.pool.submit(cls._fetch, key, config)
+
+    @classmethod
+    def _fetch(cls, key, config):
+        dataset, file_path = key
+        try:
+            if AudioPreviews.get_preview(file_path, dataset, config)[0] is None:
+                AudioAPI.open_audio(file_path, dataset, config)
+        except Exception as e:
+            logger.debug(f"Prefetch of {file_path} failed: {e}")
+        finally:
+            with cls.lock:
+                cls.pending.discard(key)
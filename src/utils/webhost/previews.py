@@ -0,0 +1,103 @@
+import subprocess
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from pathlib import Path
+from typing import Tuple
+
+from config import preview_dir, preview_bytes, preview_bitrate
+from utils.audio import FFMPEG, transcode_preview
+from utils.webhost import AudioAPI
+from utils.webhost.disk_cache import DiskCache
+
+# at most this many recordings are transcoded at once per worker
+PREVIEW_WORKERS = 2
+
+# requests beyond this many recordings waiting for a preview don't queue another
+PREVIEW_QUEUE = 32
+
+class AudioPreviews:
+    background = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="audio-preview")
+    pending = set()
+    store = DiskCache(preview_dir, preview_bytes)
+    lock = threading.Lock()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return FFMPEG is not None
+
+    @staticmethod
+    def _key(dataset, audio_path) -> str:
+        return f"{dataset}/{audio_path}/{preview_bitrate}"
+
+    @classmethod
+    def cached_preview(cls, name, dataset, config) -> Tuple[Path | None, str]:
+        """
+        Path to the MP3 preview of a recording where one has already been transcoded,
+        along with the resolved audio path. Otherwise None, and the preview is transcoded
+        in the background for later requests, so this one can be served from the original
+        without waiting.
+        """
+        host_name, audio_path = AudioAPI.find_audio(name, dataset, config)
+        if not cls.enabled() or host_name is None:
+            return None, audio_path
+        path = cls.store.get(cls._key(dataset, audio_path), ".mp3")
+        if path is None:
+            cls.schedule(audio_path, dataset, config)
+        return path, audio_path
+
+    @classmethod
+    def schedule(cls, name, dataset, config) -> None:
+        """
+        Transcode the preview of a recording in the background, unless it is already
+        waiting or too many others are.
+        """
+        key = (dataset, name)
+        with cls.lock:
+            if key in cls.pending or len(cls.pending) >= PREVIEW_QUEUE:
+                return
+            cls.pending.add(key)
+        cls.background.submit(cls._background, key, config)
+
+    @classmethod
+    def _background(cls, key, config) -> None:
+        dataset, name = key
+        try:
+            cls.get_preview(name, dataset, config)
+        except Exception as e:
+            logger.debug(f"Background transcode of {name} failed: {e}")
+        finally:
+            with cls.lock:
+                cls.pending.discard(key)
+
+    @classmethod
+    def get_preview(cls, name, dataset, config) -> Tuple[Path | None, str]:
+        """
+        Path to the MP3 preview of a recording, transcoded on first request,
+        along with the resolved audio path. None where previews are unavailable
+        or the recording can't be found or transcoded.
+        """
+        host_name, audio_path = AudioAPI.find_audio(name, dataset, config)
+        if not cls.enabled() or host_name is None:
+            return None, audio_path
+        try:
+            path = cls.store.build(
+                cls._key(dataset, audio_path),
+                ".mp3",
+                lambda output: cls._transcode(audio_path, dataset, config, output),
+            )
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Unable to transcode {audio_path}: {e.stderr.decode(errors='replace')}")
+            return None, audio_path
+        return path, audio_path
+
+    @classmethod
+    def _transcode(cls, audio_path, dataset, config, output) -> bool:
+        source, _, audio_path = AudioAPI.open_audio(audio_path, dataset, config)
+        if source is None:
+            return False
+        logger.debug(f"Transcoding preview of {audio_path}")
+        # ffmpeg runs as its own process, so the calling thread only waits on it
+        transcode_preview(source, preview_bitrate, output)
+        return True
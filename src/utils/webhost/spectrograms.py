@@ -0,0 +1,57 @@
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from loguru import logger
+from pathlib import Path
+
+from config import spectrogram_dir, spectrogram_bytes
+from utils.spectrogram import render_spectrogram, SPECTROGRAM_WIDTH, SPECTROGRAM_HEIGHT, SPECTROGRAM_N_FFT
+from utils.webhost import AudioAPI
+from utils.webhost.disk_cache import DiskCache
+
+# at most this many spectrograms are rendered at once per worker
+SPECTROGRAM_WORKERS = 2
+
+class Spectrograms:
+    pool = None
+    store = DiskCache(spectrogram_dir, spectrogram_bytes)
+    lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        # started on first use, so server workers each get their own, spawned rather than
+        # forked as the server's threads may hold locks a forked child would inherit
+        with cls.lock:
+            if cls.pool is None:
+                cls.pool = ProcessPoolExecutor(max_workers=SPECTROGRAM_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            return cls.pool
+
+    @classmethod
+    def key(cls, name, dataset, offset=None, duration=None, width=SPECTROGRAM_WIDTH, height=SPECTROGRAM_HEIGHT, n_fft=SPECTROGRAM_N_FFT):
+        if offset is not None and duration is not None:
+            offset, duration = round(float(offset), 3), round(float(duration), 3)
+        return f"{dataset}/{name}/{offset}/{duration}/{n_fft}/{width}x{height}"
+
+    @classmethod
+    def get_spectrogram(cls, name, dataset, config, offset=None, duration=None, **params) -> Path | None:
+        """
+        Path to the PNG spectrogram of a recording, or of a segment of it,
+        rendered on first request. None where the audio can't be found.
+        """
+        return cls.store.build(
+            cls.key(name, dataset, offset, duration, **params),
+            ".png",
+            lambda output: cls._render(name, dataset, config, offset, duration, output, **params),
+        )
+
+    @classmethod
+    def _render(cls, name, dataset, config, offset, duration, output, **params) -> bool:
+        source, filetype, audio_path = AudioAPI.open_audio(name, dataset, config)
+        if source is None:
+            return False
+        logger.debug(f"Rendering spectrogram of {audio_path}")
+        png = cls.executor().submit(render_spectrogram, source, filetype, offset, duration, **params).result()
+        with open(output, "wb") as f:
+            f.write(png)
+        return True